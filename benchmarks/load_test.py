@@ -0,0 +1,259 @@
+"""Concurrent-session load test for the Streamlit app.
+
+Each replica is a separate process that runs ``--sessions / --replicas``
+simulated loan officers as threads. Every session logs in through main.py and
+follows its navigation: General Dashboard, Individual Analytics (switching to
+random households) and Credit Score Education, repeating until the run ends.
+Caches and the DuckDB connection are shared inside a replica exactly as they are
+in a real server process.
+
+    python -m benchmarks.load_test --sessions 20 --replicas 2 --duration 60
+    python -m benchmarks.load_test --sessions 8 --database data/synthetic_x100.duckdb
+
+Reports p50/p95/p99 rerun latency per page, throughput and resident memory per
+replica, and exits with status 1 when any rerun raised an error. Runs against a local DuckDB file (a synthetic fixture by default), copied
+once per replica.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import resource
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from contextlib import nullcontext
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import numpy as np
+
+ROOT_DIR = Path(__file__).parent.parent.resolve()
+
+# st.Page url paths, which is what st.navigation hashes to identify a page
+NAVIGATION = {
+    "Dashboard": "Dashboard",
+    "Individual Analytics": "hhid_analytics",
+    "Credit Score Education": "farmer_education",
+}
+
+
+def _prepare_app_test(workdir):
+    """Make AppTest usable for concurrent, logged-in, multipage sessions
+
+    Streamlit 1.42's AppTest assumes one test at a time: every run installs and
+    then removes a mock Runtime, it runs without a logged-in user, and its pages
+    manager has no script cache, so pages dispatched by st.navigation execute as
+    empty scripts. The load test patches those three points for its own process.
+    Without a secrets.toml every rerun also re-parses the missing secrets and
+    shows an error, so the replica gets an empty one like a deployed server has.
+    """
+    from streamlit import config
+    from streamlit.runtime import Runtime
+    from streamlit.runtime.caching.storage.dummy_cache_storage import MemoryCacheStorageManager
+    from streamlit.runtime.media_file_manager import MediaFileManager
+    from streamlit.runtime.memory_media_file_storage import MemoryMediaFileStorage
+    from streamlit.testing.v1 import app_test, local_script_runner
+
+    shared_runtime = MagicMock(spec=Runtime)
+    shared_runtime.media_file_mgr = MediaFileManager(MemoryMediaFileStorage("/mock/media"))
+    shared_runtime.cache_storage_manager = MemoryCacheStorageManager()
+    Runtime._instance = shared_runtime
+    # AppTest assigns and clears ``Runtime._instance`` around each run; give it a
+    # subclass to write to so concurrent sessions keep the shared runtime
+    app_test.Runtime = type("SessionRuntime", (Runtime,), {})
+    config.set_option("global.appTest", True)
+    secrets_file = workdir / "secrets.toml"
+    secrets_file.write_text("")
+    config.set_option("secrets.files", [str(secrets_file)])
+    app_test.patch_config_options = lambda options: nullcontext()
+
+    original_init = local_script_runner.LocalScriptRunner.__init__
+
+    def init(self, *args, **kwargs):
+        original_init(self, *args, **kwargs)
+        self._user_info = {
+            "email": f"loadtest-{threading.get_ident()}@example.com",
+            "name": "Load Test Officer",
+            "is_logged_in": True,
+        }
+        self._pages_manager._script_cache = self._script_cache
+
+    local_script_runner.LocalScriptRunner.__init__ = init
+
+
+def _session(session_no, deadline, iterations, household_switches, think_time, samples):
+    from streamlit.testing.v1 import AppTest
+    from streamlit.util import calc_md5
+
+    rng = random.Random(session_no)
+    at = AppTest.from_file(str(ROOT_DIR / "main.py"), default_timeout=600)
+
+    def rerun(page):
+        started = time.perf_counter()
+        error = None
+        try:
+            at.run()
+            if at.exception:
+                error = at.exception[0].value
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        samples.append((page, time.perf_counter() - started, error))
+        if think_time:
+            time.sleep(rng.uniform(0, think_time))
+
+    def navigate(page):
+        at._page_hash = calc_md5(NAVIGATION[page])
+        rerun(page)
+
+    completed = 0
+    while time.monotonic() < deadline and (iterations is None or completed < iterations):
+        navigate("Dashboard")
+        navigate("Individual Analytics")
+        if at.selectbox:
+            households = at.selectbox[0].options
+            for _ in range(household_switches):
+                at.selectbox[0].set_value(rng.choice(households))
+                rerun("Individual Analytics [switch household]")
+        navigate("Credit Score Education")
+        completed += 1
+
+
+def _current_rss_mb():
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+
+
+def run_replica(replica_no, sessions, database, duration, iterations, household_switches, think_time):
+    os.chdir(ROOT_DIR)
+    sys.path.insert(0, str(ROOT_DIR))
+    from streamlit.logger import set_log_level
+    set_log_level("error")
+
+    with tempfile.TemporaryDirectory() as workdir:
+        workdir = Path(workdir)
+        # DuckDB lets one process write a file at a time and main.py records each
+        # login, so every replica works on its own copy of the database
+        shutil.copyfile(database, workdir / database.name)
+        os.environ["NAIJAYIELD_DUCKDB_PATH"] = str(workdir / database.name)
+        _prepare_app_test(workdir)
+
+        samples = []
+        rss_before = _current_rss_mb()
+        deadline = time.monotonic() + duration
+        started = time.perf_counter()
+        threads = [
+            threading.Thread(target=_session, daemon=True,
+                             args=(replica_no * 10_000 + i, deadline, iterations, household_switches, think_time,
+                                   samples))
+            for i in range(sessions)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        seconds = time.perf_counter() - started
+
+    return {
+        "replica": replica_no,
+        "sessions": sessions,
+        "seconds": seconds,
+        "samples": samples,
+        "rss_start_mb": rss_before,
+        "rss_end_mb": _current_rss_mb(),
+        "rss_peak_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }
+
+
+def summarize(replicas):
+    samples = [s for replica in replicas for s in replica["samples"]]
+    wall = max(replica["seconds"] for replica in replicas)
+    pages = {}
+    for page in sorted({page for page, _, _ in samples}):
+        latencies = np.array([seconds for p, seconds, _ in samples if p == page]) * 1000
+        pages[page] = {
+            "reruns": len(latencies),
+            "errors": sum(1 for p, _, error in samples if p == page and error),
+            "p50_ms": float(np.percentile(latencies, 50)),
+            "p95_ms": float(np.percentile(latencies, 95)),
+            "p99_ms": float(np.percentile(latencies, 99)),
+        }
+    all_latencies = np.array([seconds for _, seconds, _ in samples]) * 1000
+    return {
+        "sessions": sum(replica["sessions"] for replica in replicas),
+        "replicas": len(replicas),
+        "wall_seconds": wall,
+        "reruns": len(samples),
+        "errors": sum(1 for *_, error in samples if error),
+        "throughput_rps": len(samples) / wall if wall else 0.0,
+        "p50_ms": float(np.percentile(all_latencies, 50)) if len(all_latencies) else None,
+        "p95_ms": float(np.percentile(all_latencies, 95)) if len(all_latencies) else None,
+        "p99_ms": float(np.percentile(all_latencies, 99)) if len(all_latencies) else None,
+        "pages": pages,
+        "memory": [
+            {key: replica[key] for key in ("replica", "sessions", "rss_start_mb", "rss_end_mb", "rss_peak_mb")}
+            for replica in replicas
+        ],
+        "first_errors": sorted({error for *_, error in samples if error})[:5],
+    }
+
+
+def print_report(report):
+    print(f"\n{report['sessions']} sessions on {report['replicas']} replica(s), {report['wall_seconds']:.1f}s")
+    print(f"{report['reruns']} reruns, {report['errors']} errors, {report['throughput_rps']:.2f} reruns/s")
+    print(f"\n{'page':<42} {'reruns':>7} {'errors':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for page, stats in report["pages"].items():
+        print(f"{page:<42} {stats['reruns']:>7} {stats['errors']:>7} "
+              f"{stats['p50_ms']:>9.0f} {stats['p95_ms']:>9.0f} {stats['p99_ms']:>9.0f}")
+    if report["reruns"]:
+        print(f"{'all pages':<42} {report['reruns']:>7} {report['errors']:>7} "
+              f"{report['p50_ms']:>9.0f} {report['p95_ms']:>9.0f} {report['p99_ms']:>9.0f}")
+    print(f"\n{'replica':<8} {'sessions':>9} {'RSS start MB':>13} {'RSS end MB':>11} {'RSS peak MB':>12}")
+    for memory in report["memory"]:
+        print(f"{memory['replica']:<8} {memory['sessions']:>9} {memory['rss_start_mb']:>13.0f} "
+              f"{memory['rss_end_mb']:>11.0f} {memory['rss_peak_mb']:>12.0f}")
+    for error in report["first_errors"]:
+        print(f"error: {error}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=8, help="total concurrent sessions")
+    parser.add_argument("--replicas", type=int, default=1, help="processes the sessions are spread over")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds to keep sessions running")
+    parser.add_argument("--iterations", type=int, help="stop each session after this many navigation loops")
+    parser.add_argument("--household-switches", type=int, default=3)
+    parser.add_argument("--think-time", type=float, default=0.0, help="max random pause between reruns (s)")
+    parser.add_argument("--database", type=Path, help="local DuckDB file (default: synthetic fixture)")
+    parser.add_argument("--scale", type=float, default=1, help="synthetic fixture scale when --database is not given")
+    parser.add_argument("--output", type=Path, help="also write the report as JSON")
+    args = parser.parse_args(argv)
+
+    if args.database is None:
+        from benchmarks.run_benchmarks import fixture_path
+        args.database = fixture_path(args.scale)
+
+    per_replica = [args.sessions // args.replicas + (i < args.sessions % args.replicas) for i in range(args.replicas)]
+    context = multiprocessing.get_context("spawn")
+    with context.Pool(args.replicas) as pool:
+        replicas = pool.starmap(run_replica, [
+            (i, sessions, args.database.resolve(), args.duration, args.iterations,
+             args.household_switches, args.think_time)
+            for i, sessions in enumerate(per_replica)
+        ])
+
+    report = summarize(replicas)
+    print_report(report)
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2))
+    if report["errors"]:
+        # A rerun that raised is a failed run, however good the latencies look
+        print(f"\n{report['errors']} rerun(s) failed")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
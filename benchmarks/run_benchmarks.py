@@ -0,0 +1,250 @@
+"""Benchmark the data loaders, credit scoring, Dashboard aggregates and page reruns.
+
+Each case runs against a synthetic local DuckDB fixture (built once per scale
+under benchmarks/.fixtures) and reports the median wall time and peak traced
+memory. Results are compared with benchmarks/baseline.json.
+
+    python -m benchmarks.run_benchmarks                    # scales 1 and 10
+    python -m benchmarks.run_benchmarks --scales 1 10 100 --repeat 5
+    python -m benchmarks.run_benchmarks --save-baseline    # after an intended change
+    python -m benchmarks.run_benchmarks --fail-on-regression
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import duckdb
+
+ROOT_DIR = Path(__file__).parent.parent.resolve()
+FIXTURE_DIR = Path(__file__).parent / ".fixtures"
+BASELINE_PATH = Path(__file__).parent / "baseline.json"
+NOISE_SECONDS = 0.005
+NOISE_MB = 1.0
+# Snapshots written during a run go here, never to the app's snapshots/ folder
+SNAPSHOT_DIR = Path(tempfile.gettempdir()) / f"naijayield-benchmark-snapshots-{os.getpid()}"
+
+PAGES = {
+    "Dashboard": "page/Dashboard.py",
+    "Individual Analytics": "page/hhid_analytics.py",
+    "Credit Score Education": "page/farmer_education.py",
+    "Portfolio Risk": "page/portfolio_risk.py",
+    "Geographic Drill-Down": "page/geography.py",
+}
+
+
+def fixture_path(scale):
+    """Local DuckDB file for a scale, generated on first use"""
+    path = FIXTURE_DIR / f"synthetic_x{scale:g}.duckdb"
+    if not path.exists():
+        from utils.cube import build_credit_cube
+        from utils.features import build_household_features
+        from utils.geo import build_geo_rollup
+        from utils.sketches import build_loan_sketches
+        from utils.synthetic import generate
+        from utils.vintage import build_vintage_curves
+
+        FIXTURE_DIR.mkdir(parents=True, exist_ok=True)
+        print(f"building fixture {path.name} ...", file=sys.stderr)
+        conn = duckdb.connect(str(path))
+        generate(conn, scale=scale)
+        build_credit_cube(conn)
+        build_household_features(conn)
+        build_loan_sketches(conn)
+        build_vintage_curves(conn)
+        build_geo_rollup(conn)
+        conn.close()
+    return path
+
+
+def use_fixture(path):
+    """Point get_duckdb_connection() at a fixture and drop every cached result"""
+    os.environ["NAIJAYIELD_DUCKDB_PATH"] = str(path)
+    os.environ["NAIJAYIELD_SNAPSHOT_DIR"] = str(SNAPSHOT_DIR)
+    cold_start()
+
+
+def cold_start():
+    """Start like a fresh replica: no st.cache_data or st.cache_resource entries
+    (shared frames, connection) and an empty snapshot directory"""
+    import streamlit as st
+
+    st.cache_data.clear()
+    st.cache_resource.clear()
+    shutil.rmtree(SNAPSHOT_DIR, ignore_errors=True)
+
+
+def measure(func, repeat, setup=None):
+    """Median wall time over ``repeat`` runs, then one traced run for peak memory"""
+    timings = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+
+    if setup:
+        setup()
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"seconds": statistics.median(timings), "peak_mb": peak / 2**20}
+
+
+def loader_cases():
+    from utils.cube import load_credit_cube
+    from utils.filters import load_filtered_cube, load_filtered_sketches
+    from utils.geo import load_geo_rollup
+    from utils.loaders import load_credit_data, load_insurance_data, load_loan_records
+    from utils.vintage import load_vintage_curves
+
+    amount_filter = dict(purposes=(), zones=("NORTH WEST",), sectors=(), amount_range=(5_000, 100_000))
+    loaders = {
+        "load_credit_cube": (load_credit_cube, {}),
+        "load_filtered_cube[amount]": (load_filtered_cube, amount_filter),
+        "load_filtered_sketches[amount]": (load_filtered_sketches, amount_filter),
+        "load_credit_data": (load_credit_data, {}),
+        "load_insurance_data": (load_insurance_data, {}),
+        "load_loan_records": (load_loan_records, {}),
+        "load_vintage_curves": (load_vintage_curves, {}),
+        "load_geo_rollup": (load_geo_rollup, {}),
+    }
+    for name, (loader, kwargs) in loaders.items():
+        # Cold: every cache and snapshot is dropped before every run
+        yield f"loader.{name}", (lambda loader=loader, kwargs=kwargs: loader(**kwargs)), cold_start
+
+
+def scoring_cases():
+    from utils.loaders import load_insurance_data, load_loan_records
+    from utils.scoring import compute_credit_score, score_households
+
+    loans = load_loan_records()
+    fin = load_insurance_data()
+    household_ids = fin['HouseHoldID'].drop_duplicates().sample(n=min(50, fin['HouseHoldID'].nunique()), random_state=0)
+
+    def per_household():
+        # The page filters the full frames before scoring, so that is part of the cost
+        for household_id in household_ids:
+            compute_credit_score(loans[loans['HouseholdID'] == household_id],
+                                 fin[fin['HouseHoldID'] == household_id])
+
+    yield "scoring.per_household[x50]", per_household, None
+    yield "scoring.batch_all", lambda: score_households(loans, fin), None
+
+
+def aggregate_cases():
+    from utils.cube import cube_counts, load_credit_cube
+    from utils.filters import filter_cube
+
+    cube = load_credit_cube()
+
+    def dashboard_aggregates():
+        sliced = filter_cube(cube, zones=("NORTH WEST", "SOUTH WEST"))
+        cube_counts(sliced, 'Borrowed_Or_appliedLoan')
+        cube_counts(sliced, 'LoanPurpose')
+        cube_counts(sliced[sliced['LoanApplicationRejected'] == 1], 'PrimaryRejectionReason')
+        cube_counts(sliced, 'LoanSufficient')
+        cube_counts(sliced, 'IsFullyRepaid')
+        sliced.groupby('LoanPurpose')[['loan_amount_sum', 'loan_count']].sum()
+
+    yield "dashboard.aggregates", dashboard_aggregates, None
+
+
+def page_cases():
+    from streamlit.testing.v1 import AppTest
+
+    for name, script in PAGES.items():
+        def rerun(script=script):
+            at = AppTest.from_file(str(ROOT_DIR / script), default_timeout=600)
+            at.run()
+            if at.exception:
+                raise RuntimeError(f"{script} raised: {at.exception[0].value}")
+
+        yield f"page.{name}[cold]", rerun, cold_start
+        yield f"page.{name}[warm]", rerun, None
+
+
+def run(scales, repeat, only=None):
+    results = {}
+    for scale in scales:
+        use_fixture(fixture_path(scale))
+        for cases in (loader_cases, scoring_cases, aggregate_cases, page_cases):
+            for name, func, setup in cases():
+                if only and only not in name:
+                    continue
+                key = f"x{scale:g}/{name}"
+                results[key] = measure(func, repeat, setup)
+                print(f"{key:<55} {results[key]['seconds'] * 1000:>10.1f} ms {results[key]['peak_mb']:>9.1f} MB",
+                      file=sys.stderr)
+    return results
+
+
+def compare(results, baseline, tolerance, noise_seconds=NOISE_SECONDS):
+    """Print results next to the baseline; returns the names that regressed"""
+    regressions = []
+    print(f"\n{'benchmark':<55} {'ms':>10} {'base ms':>10} {'Δ time':>8} {'MB':>8} {'base MB':>8}")
+    for name, current in results.items():
+        base = baseline.get(name)
+        if base is None:
+            print(f"{name:<55} {current['seconds'] * 1000:>10.1f} {'-':>10} {'new':>8} {current['peak_mb']:>8.1f} {'-':>8}")
+            continue
+        time_change = current['seconds'] / base['seconds'] - 1 if base['seconds'] else 0
+        memory_change = current['peak_mb'] / base['peak_mb'] - 1 if base['peak_mb'] else 0
+        flag = ""
+        # Ignore relative swings on cases too small to measure reliably
+        slower = time_change > tolerance and current['seconds'] - base['seconds'] > noise_seconds
+        bigger = memory_change > tolerance and current['peak_mb'] - base['peak_mb'] > NOISE_MB
+        if slower or bigger:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(f"{name:<55} {current['seconds'] * 1000:>10.1f} {base['seconds'] * 1000:>10.1f} "
+              f"{time_change:>+8.0%} {current['peak_mb']:>8.1f} {base['peak_mb']:>8.1f}{flag}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scales", type=float, nargs="+", default=[1, 10])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--only", help="run only benchmarks whose name contains this text")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="relative slowdown or memory growth reported as a regression")
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    parser.add_argument("--output", type=Path, help="also write the results as JSON")
+    args = parser.parse_args(argv)
+
+    os.chdir(ROOT_DIR)
+    # Cached loaders run outside a Streamlit server here; silence the bare-mode notices
+    from streamlit.logger import set_log_level
+    set_log_level("error")
+    try:
+        results = run(args.scales, args.repeat, args.only)
+    finally:
+        shutil.rmtree(SNAPSHOT_DIR, ignore_errors=True)
+
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2))
+    baseline = json.loads(args.baseline.read_text()) if args.baseline.exists() else {}
+    regressions = compare(results, baseline, args.tolerance)
+
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps({**baseline, **results}, indent=2, sort_keys=True) + "\n")
+        print(f"\nbaseline updated: {args.baseline}")
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) above {args.tolerance:.0%}: " + ", ".join(regressions))
+        if args.fail_on_regression:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""Time cold imports of main.py and every page, and a cold rerun of the login screen.
+
+Each target runs in a fresh interpreter: its top-level import statements are
+executed (the module-level code is not), and `-X importtime` attributes the
+time to the packages it imports. main.py and the static pages must not import the
+analytics stack (HEAVY_PACKAGES); doing so is reported as a regression, as is a
+slowdown against benchmarks/startup_baseline.json.
+
+    python -m benchmarks.startup
+    python -m benchmarks.startup --save-baseline          # after an intended change
+    python -m benchmarks.startup --fail-on-regression
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from collections import Counter
+from pathlib import Path
+
+from .run_benchmarks import ROOT_DIR, compare
+
+BASELINE_PATH = Path(__file__).parent / "startup_baseline.json"
+HEAVY_PACKAGES = ["duckdb", "pandas", "numpy", "pyarrow", "plotly.express"]
+LOGIN_SCREEN = "login screen (main.py rerun)"
+# Cold starts swing by tens of milliseconds between runs; smaller slowdowns are not reported
+NOISE_SECONDS = 0.15
+# Entry points that must come up without HEAVY_PACKAGES
+LIGHT_TARGETS = ["main.py", LOGIN_SCREEN, "page/farmer_education.py", "page/farmer_portfolio.py"]
+
+# Separates interpreter start-up (and AppTest's own imports) from the target's in -X importtime output
+MARKER = "-- startup target --"
+# Run in the child interpreter: argv = [mode, path, marker]
+CHILD_SCRIPT = """
+import ast, json, resource, sys, time
+mode, path, marker = sys.argv[1:]
+if mode == "rerun":
+    from streamlit.testing.v1 import AppTest, local_script_runner
+    original_init = local_script_runner.LocalScriptRunner.__init__
+    def logged_out(self, *args, **kwargs):
+        original_init(self, *args, **kwargs)
+        self._user_info = {"is_logged_in": False}
+    local_script_runner.LocalScriptRunner.__init__ = logged_out
+else:
+    tree = ast.parse(open(path).read(), path)
+    imports = ast.Module([node for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom))], [])
+already_loaded = set(sys.modules)
+print(marker, file=sys.stderr, flush=True)
+started = time.perf_counter()
+if mode == "rerun":
+    app = AppTest.from_file(path, default_timeout=60).run()
+    if app.exception:
+        sys.exit(app.exception[0].message)
+else:
+    exec(compile(imports, path, "exec"), {"__name__": "__startup__"})
+print(json.dumps({
+    "seconds": time.perf_counter() - started,
+    "peak_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    "modules": sorted(set(sys.modules) - already_loaded),
+}))
+"""
+
+
+def _run_child(mode, path, importtime=False):
+    command = [sys.executable] + (["-X", "importtime"] if importtime else []) + ["-c", CHILD_SCRIPT, mode, path, MARKER]
+    completed = subprocess.run(command, cwd=ROOT_DIR, capture_output=True, text=True, check=True)
+    return json.loads(completed.stdout.strip().splitlines()[-1]), completed.stderr
+
+
+def import_breakdown(importtime_output, limit=5):
+    """Cumulative import time (seconds) of the top-level packages in -X importtime output"""
+    totals = Counter()
+    for line in importtime_output.split(MARKER, 1)[-1].splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|", 2)
+        # Top-level imports are indented by one space, their dependencies by more
+        if cumulative.strip().isdigit() and name.startswith(" ") and not name.startswith("  "):
+            totals[name.strip().split(".")[0]] += int(cumulative) / 1e6
+    return dict(totals.most_common(limit))
+
+
+def targets():
+    return [("import", "main.py")] + [("import", str(path.relative_to(ROOT_DIR)))
+                                      for path in sorted((ROOT_DIR / "page").glob("*.py"))]
+
+
+def run(repeat):
+    results, details = {}, {}
+    for mode, path in targets() + [("rerun", "main.py")]:
+        name = LOGIN_SCREEN if mode == "rerun" else path
+        samples = [_run_child(mode, path)[0] for _ in range(repeat)]
+        profiled, importtime_output = _run_child(mode, path, importtime=True)
+        results[name] = {
+            # Best of the runs: slower runs measure the machine's load more than the imports
+            "seconds": min(sample["seconds"] for sample in samples),
+            "peak_mb": statistics.median(sample["peak_mb"] for sample in samples),
+        }
+        details[name] = {
+            "heavy": [package for package in HEAVY_PACKAGES if package in profiled["modules"]],
+            "imports": import_breakdown(importtime_output),
+        }
+    return results, details
+
+
+def report(results, details):
+    print(f"{'target':<32} {'ms':>8} {'peak MB':>8}  {'analytics stack':<32} slowest imports")
+    for name, result in results.items():
+        heavy = ", ".join(details[name]["heavy"]) or "-"
+        imports = ", ".join(f"{package} {seconds * 1000:.0f}" for package, seconds in details[name]["imports"].items())
+        print(f"{name:<32} {result['seconds'] * 1000:>8.0f} {result['peak_mb']:>8.0f}  {heavy:<32} {imports}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="relative slowdown or memory growth reported as a regression")
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    parser.add_argument("--output", type=Path, help="also write the results as JSON")
+    args = parser.parse_args(argv)
+
+    results, details = run(args.repeat)
+    report(results, details)
+    if args.output:
+        args.output.write_text(json.dumps({name: {**results[name], **details[name]} for name in results}, indent=2))
+    baseline = json.loads(args.baseline.read_text()) if args.baseline.exists() else {}
+    regressions = compare(results, baseline, args.tolerance, NOISE_SECONDS)
+    for name in LIGHT_TARGETS:
+        if details.get(name, {}).get("heavy") and name not in regressions:
+            print(f"\n{name} imports the analytics stack: {', '.join(details[name]['heavy'])}")
+            regressions.append(name)
+
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps({**baseline, **results}, indent=2, sort_keys=True) + "\n")
+        print(f"\nbaseline updated: {args.baseline}")
+    if regressions:
+        print(f"\n{len(regressions)} regression(s): " + ", ".join(regressions))
+        if args.fail_on_regression:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,9 @@
 import streamlit as st
 import os
 from pathlib import Path
-from utils import load_css, add_bg_with_overlay, save_user_to_db, render_welcome_screen, set_naijayield_theme
+from utils import load_css, add_bg_with_overlay, save_user_to_db, render_welcome_screen, set_naijayield_theme, is_admin_user
+from utils.profiling import profile_rerun
+from utils.telemetry import start_metrics_writer
 
 sidebar_state = "expanded" if st.experimental_user.is_logged_in else "collapsed"
 
@@ -15,6 +17,7 @@ st.set_page_config(
 )
 
 ROOT_DIR = Path(__file__).parent.resolve()
+start_metrics_writer()
 load_css(os.path.join(ROOT_DIR, "static", "css", "style.css"))
 
 
@@ -44,13 +47,18 @@ else:
     home = st.Page("./page/Dashboard.py", title="General Dashboard", icon="📊", default=True)
     household_analytics = st.Page("./page/hhid_analytics.py", title="Individual Analytics", icon="👨‍🌾")
     farmer_education = st.Page("./page/farmer_education.py", title="Credit Score Education", icon="💡")
+    portfolio_risk = st.Page("./page/portfolio_risk.py", title="Portfolio Risk", icon="🏦")
+    geography = st.Page("./page/geography.py", title="Geographic Drill-Down", icon="🗺️")
     farmer_portfolio = st.Page("./page/farmer_portfolio.py", title="Farm Portfolio (Coming Soon)", icon="🆕")
 
     # pages = [home, household_analytics, farmer_education]
     available_pages = {
-            "Main Features": [home, household_analytics, farmer_education],
+            "Main Features": [home, household_analytics, farmer_education, portfolio_risk, geography],
             "Coming Soon": [farmer_portfolio]
         }
+    if is_admin_user():
+        available_pages["Admin"] = [st.Page("./page/admin_telemetry.py", title="Telemetry", icon="🛠️")]
     pg = st.navigation(available_pages)
 
-    pg.run()
+    with profile_rerun(pg.title):
+        pg.run()
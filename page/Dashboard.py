@@ -2,9 +2,19 @@ import streamlit as st
 import pandas as pd
 import numpy as np
 import plotly.express as px
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
-from utils import load_css, get_duckdb_connection
+from utils import load_css
+from utils.cube import load_credit_cube, cube_counts
+from utils.filters import render_sidebar_filters, load_filtered_cube, load_filtered_sketches
+from utils.sketches import QuantileSketch
+from utils.features import load_household_features
+from utils.inclusion import (load_adult_services, inclusion_rollup, service_shares, popcount, SERVICES,
+                             SERVICE_LABELS, SCORED_MASK)
+from utils.vintage import load_vintage_curves, repayment_curves, MAX_MONTHS
+from utils.export import export_file, count_export, EXPORTS, EXPORT_FORMATS, MAX_DOWNLOAD_ROWS
+from utils.credit_model import load_credit_model
+from utils.functions import get_duckdb_connection
+from utils.mappings import zone_dict, sector_dict
+from utils.profiling import checkpoint
 
 # Title and description
 st.title("🌱 Agricultural Credit Access Dashboard")
@@ -13,107 +23,29 @@ This dashboard provides insights into agricultural financing patterns and barrie
 for Nigerian farmers, analyzing loan applications, approvals, rejections, and repayment behaviors.
 """)
 
-conn = get_duckdb_connection()
-
-# Function to load data (replace with your actual data loading)
-@st.cache_data
-def load_credit_data():
-    try:
-        credit_loan_history = conn.execute("select * from combined_credit_LoanHistory_vw").fetch_df()       
-        credit_history = credit_loan_history.copy()
-    except:
-        # If file doesn't exist, show a file uploader
-        st.warning("Credit history data not found. Please upload your CSV file.")
-    
-    # Data preprocessing
-    # Define mappings for categorical variables
-    zone_dict = {
-    1: "NORTH CENTRAL",
-    2: "NORTH EAST",
-    3: "NORTH WEST",
-    4: "SOUTH EAST",
-    5: "SOUTH SOUTH",
-    6: "SOUTH WEST"
-    }
-
-    sector_dict = {
-        0 : "NEW",
-        1 : "URBAN",
-        2 : "RURAL"
-    }
-
-    loan_denial_reasons = {
-        1: "LACK OF COLLATERAL",
-        2: "NO SAVINGS/SHARES",
-        3: "BAD CREDIT HISTORY",
-        4: "ITEMS DIDN'T QUALIFY FOR A LOAN",
-        5: "LACK OF GUARANTORS",
-        6: "OTHER"
-    }
-
-    loan_purpose_reasons = {
-        1: "PURCHASE LAND",
-        2: "PURCHASE AGRICULTURAL INPUTS FOR FOOD CROP",
-        3: "PURCHASE INPUTS FOR CASH CROP",
-        4: "BUSINESS START UP CAPITAL",
-        5: "NON FARM BUSINESS COSTS",
-        6: "CEREMONIES (MARRIAGE, BURIAL, OTHER SOCIAL FUNCTIONS ETC)",
-        7: "EDUCATION",
-        8: "MOTOR VEHICLE PURCHASE",
-        9: "HOME PURCHASE OR CONSTRUCTION",
-        10: "OTHER HOUSEHOLD CONSUMPTION",
-        11: "OTHER (SPECIFY)"
-    }
-
-    loan_non_application_reasons = {
-    1: "BELIEVED IT WOULD BE REFUSED",
-    2: "TOO EXPENSIVE",
-    3: "TOO MUCH TROUBLE FOR WHAT IT WAS WORTH",
-    4: "INADEQUATE COLLATERAL",
-    6: "DO NOT LIKE TO BE IN DEBT",
-    7: "DO NOT KNOW ANY LENDER",
-    8: "OTHER (SPECIFY)"
-    }
-
-    
-    # Apply mappings
-    credit_history['PrimaryRejectionReason'] = credit_history['PrimaryRejectionReason'].map(loan_denial_reasons)
-    credit_history['PrimaryReasonNoBorrowing'] = credit_history['PrimaryReasonNoBorrowing'].map(loan_non_application_reasons)
-    credit_history['LoanPurpose'] = credit_history['LoanPurpose'].map(loan_purpose_reasons)
-    
-    # Convert numeric columns
-    numeric_columns = ['LoanAmount', 'IsFullyRepaid', 'TotalAmountPaid']
-    for col in numeric_columns:
-        credit_history[col] = pd.to_numeric(credit_history[col], errors='coerce')
-    
-    # Calculate repayment ratio
-    credit_history['RepaymentRatio'] = credit_history['TotalAmountPaid'] / credit_history['LoanAmount']
-    
-    return credit_history
-
-@st.cache_data
-def load_insurance_data():
-    try:
-        insurance_data_db = conn.execute("select * from savings_and_insurance_data").fetch_df()       
-        insurance_data = insurance_data_db.copy()
-    except:
-        # If file doesn't exist, show a file uploader
-        st.warning("Credit history data not found. Please upload your CSV file.")
-
-    return insurance_data
-
 # Load the data
-credit_history = load_credit_data()
-insurance_data = load_insurance_data()
+credit_cube = load_credit_cube()
+checkpoint("load cube")
 
 
 # Check if data is loaded
-if credit_history.empty:
+if credit_cube.empty:
     st.error("No data available. Please upload the credit history data to continue.")
     st.stop()
 
+# Sidebar filters apply to every chart below
+filters = render_sidebar_filters(credit_cube)
+credit_cube = load_filtered_cube(*filters)
+loan_sketches = load_filtered_sketches(*filters)
+checkpoint("filters")
+
+if credit_cube.empty:
+    st.warning("No records match the selected filters.")
+    st.stop()
+
 # Create tabs for different sections
-tab1, tab2, tab3, tab4 = st.tabs(["Loan Access Overview", "Rejection Analysis", "Loan Characteristics", "Repayment Analysis"])
+tab1, tab2, tab3, tab4, tab5, tab6 = st.tabs(["Loan Access Overview", "Rejection Analysis", "Loan Characteristics",
+                                              "Repayment Analysis", "Financial Inclusion", "Loan Vintages"])
 
 with tab1:
     st.header("Loan Access Overview")
@@ -123,7 +55,7 @@ with tab1:
     
     with col1:
         # 1. Loan Application Status Distribution
-        loan_status_counts = credit_history.groupby(['Borrowed_Or_appliedLoan']).size().reset_index(name='count')
+        loan_status_counts = cube_counts(credit_cube, 'Borrowed_Or_appliedLoan').reset_index(name='count')
         
         # Add labels
         loan_status_counts['Status'] = loan_status_counts['Borrowed_Or_appliedLoan'].map(
@@ -141,13 +73,13 @@ with tab1:
     with col2:
         # 2. Loan Application Outcomes
         # Calculate values for each category
-        approved = credit_history[credit_history['Borrowed_Or_appliedLoan'] == 1]
-        approved = approved[approved['LoanApplicationRejected'] != 1].shape[0]
+        approved = credit_cube[(credit_cube['Borrowed_Or_appliedLoan'] == 1) &
+                               (credit_cube['LoanApplicationRejected'] != 1)]['row_count'].sum()
         
-        rejected = credit_history[credit_history['LoanApplicationRejected'] == 1].shape[0]
+        rejected = credit_cube[credit_cube['LoanApplicationRejected'] == 1]['row_count'].sum()
         
-        needed_no_apply = credit_history[(credit_history['Borrowed_Or_appliedLoan'] != 1) & 
-                                        (credit_history['NeededLoan'] == 1)].shape[0]
+        needed_no_apply = credit_cube[(credit_cube['Borrowed_Or_appliedLoan'] != 1) & 
+                                      (credit_cube['NeededLoan'] == 1)]['row_count'].sum()
         
         outcomes_data = pd.DataFrame({
             'Outcome': ['Approved', 'Rejected', 'Needed but Did Not Apply'],
@@ -177,7 +109,7 @@ with tab1:
     # Second row - Loan purpose distribution
     st.subheader("Loan Purpose Distribution")
     
-    loan_purposes = credit_history['LoanPurpose'].dropna().value_counts().reset_index()
+    loan_purposes = cube_counts(credit_cube, 'LoanPurpose').reset_index()
     loan_purposes.columns = ['Purpose', 'Count']
     loan_purposes = loan_purposes.sort_values('Count', ascending=True).tail(10)  # Get top 10
     
@@ -191,6 +123,8 @@ with tab1:
                               plot_bgcolor='rgba(0,0,0,0)', font_color='#333333' )
     st.plotly_chart(fig, use_container_width=True)
 
+checkpoint("tab: Loan Access Overview")
+
 with tab2:
     st.header("Loan Rejection Analysis")
     
@@ -198,8 +132,8 @@ with tab2:
     
     with col1:
         # 3. Primary Reasons for Loan Rejection
-        rejection_reasons = credit_history[credit_history['LoanApplicationRejected'] == 1]['PrimaryRejectionReason']
-        rejection_counts = rejection_reasons.value_counts().reset_index()
+        rejected_rows = credit_cube[credit_cube['LoanApplicationRejected'] == 1]
+        rejection_counts = cube_counts(rejected_rows, 'PrimaryRejectionReason').reset_index()
         rejection_counts.columns = ['Reason', 'Count']
         rejection_counts = rejection_counts.sort_values('Count', ascending=True)
         
@@ -215,9 +149,9 @@ with tab2:
     
     with col2:
         # 4. Reasons for Not Applying Despite Need
-        no_apply_reasons = credit_history[(credit_history['Borrowed_Or_appliedLoan'] != 1) & 
-                                        (credit_history['NeededLoan'] == 1)]['PrimaryReasonNoBorrowing']
-        no_apply_counts = no_apply_reasons.value_counts().reset_index()
+        no_apply_rows = credit_cube[(credit_cube['Borrowed_Or_appliedLoan'] != 1) & 
+                                    (credit_cube['NeededLoan'] == 1)]
+        no_apply_counts = cube_counts(no_apply_rows, 'PrimaryReasonNoBorrowing').reset_index()
         no_apply_counts.columns = ['Reason', 'Count']
         no_apply_counts = no_apply_counts.sort_values('Count', ascending=True)
         
@@ -231,6 +165,8 @@ with tab2:
                               plot_bgcolor='rgba(0,0,0,0)', font_color='#333333' )
         st.plotly_chart(fig, use_container_width=True)
 
+checkpoint("tab: Rejection Analysis")
+
 with tab3:
     st.header("Loan Characteristics")
     
@@ -238,36 +174,43 @@ with tab3:
     
     with col1:
         # 5. Loan Amount Distribution
-        # Remove outliers for better visualization
-        loan_amounts = credit_history['LoanAmount'].dropna()
-        q1, q3 = loan_amounts.quantile([0.25, 0.75])
+        # Remove outliers for better visualization; quartiles come from the merged segment sketches
+        loan_amounts = QuantileSketch.from_rows(loan_sketches, 'LoanAmount')
+        q1, q3 = loan_amounts.quantiles([0.25, 0.75])
         iqr = q3 - q1
         upper_bound = q3 + 1.5 * iqr
-        filtered_amounts = loan_amounts[loan_amounts <= upper_bound]
-        
-        fig = px.histogram(filtered_amounts, 
-                          title='Distribution of Loan Amounts',
-                          labels={'value': 'Loan Amount (Naira)'},
-                          color_discrete_sequence=['#3498db'])
-        
-        # Add mean and median lines
-        fig.add_vline(x=filtered_amounts.mean(), line_dash="dash", line_color="red", 
-                     annotation_text=f"Mean: {filtered_amounts.mean():.2f}", 
-                     annotation_position="top")
-        
-        fig.add_vline(x=filtered_amounts.median(), line_dash="dash", line_color="green", 
-                     annotation_text=f"Median: {filtered_amounts.median():.2f}", 
-                     annotation_position="bottom")
+        filtered_amounts = loan_amounts.between(high=upper_bound)
         
-        fig.update_layout(yaxis_title='Frequency', paper_bgcolor='rgba(0,0,0,0)',
-                              plot_bgcolor='rgba(0,0,0,0)', font_color='#333333' )
-        st.plotly_chart(fig, use_container_width=True)
+        if filtered_amounts.count == 0:
+            st.info("No loan amounts for the selected filters.")
+        else:
+            edges = np.linspace(filtered_amounts.quantile(0), upper_bound, 41)
+            amount_bins = pd.DataFrame({'Loan Amount (Naira)': (edges[:-1] + edges[1:]) / 2,
+                                        'count': filtered_amounts.histogram(edges)})
+            
+            fig = px.bar(amount_bins, x='Loan Amount (Naira)', y='count',
+                        title='Distribution of Loan Amounts',
+                        color_discrete_sequence=['#3498db'])
+            
+            # Add mean and median lines
+            fig.add_vline(x=filtered_amounts.mean(), line_dash="dash", line_color="red", 
+                         annotation_text=f"Mean: {filtered_amounts.mean():.2f}", 
+                         annotation_position="top")
+            
+            fig.add_vline(x=filtered_amounts.quantile(0.5), line_dash="dash", line_color="green", 
+                         annotation_text=f"Median: {filtered_amounts.quantile(0.5):.2f}", 
+                         annotation_position="bottom")
+            
+            fig.update_layout(yaxis_title='Frequency', bargap=0, paper_bgcolor='rgba(0,0,0,0)',
+                                  plot_bgcolor='rgba(0,0,0,0)', font_color='#333333' )
+            st.plotly_chart(fig, use_container_width=True)
     
     with col2:
         # Loan amount by purpose
         # Group by loan purpose and calculate average amount
-        purpose_amounts = credit_history.groupby('LoanPurpose')['LoanAmount'].agg(['mean', 'count']).reset_index()
-        purpose_amounts.columns = ['Purpose', 'Mean', 'Count']
+        purpose_amounts = credit_cube.groupby('LoanPurpose')[['loan_amount_sum', 'loan_count']].sum().reset_index()
+        purpose_amounts.columns = ['Purpose', 'Sum', 'Count']
+        purpose_amounts['Mean'] = purpose_amounts['Sum'] / purpose_amounts['Count']
         
         # Filter to purposes with at least 5 loans for relevance
         purpose_amounts = purpose_amounts[purpose_amounts['Count'] >= 5]
@@ -286,10 +229,7 @@ with tab3:
     # Loan characteristics - additional metrics
     st.subheader("Loan Sufficiency Analysis")
     
-    # Convert to numeric
-    credit_history['LoanSufficient'] = pd.to_numeric(credit_history['LoanSufficient'], errors='coerce')
-    
-    loan_sufficiency = credit_history['LoanSufficient'].value_counts().reset_index()
+    loan_sufficiency = cube_counts(credit_cube, 'LoanSufficient').reset_index()
     loan_sufficiency.columns = ['Status', 'Count']
     loan_sufficiency['Label'] = loan_sufficiency['Status'].map({2: 'Insufficient', 1: 'Sufficient'})
     
@@ -301,6 +241,8 @@ with tab3:
     fig.update_layout(paper_bgcolor='rgba(0,0,0,0)',plot_bgcolor='rgba(0,0,0,0)', font_color='#333333' )
     st.plotly_chart(fig, use_container_width=True)
 
+checkpoint("tab: Loan Characteristics")
+
 with tab4:
     st.header("Loan Repayment Analysis")
     
@@ -308,7 +250,7 @@ with tab4:
     
     with col1:
         # 6. Loan Repayment Status
-        repayment_status = credit_history['IsFullyRepaid'].value_counts().reset_index()
+        repayment_status = cube_counts(credit_cube, 'IsFullyRepaid').reset_index()
         repayment_status.columns = ['Status', 'Count']
         repayment_status['Label'] = repayment_status['Status'].map({2: 'Not Fully Repaid', 1: 'Fully Repaid'})
         
@@ -322,25 +264,27 @@ with tab4:
     
     with col2:
         # Repayment ratio distribution
-        valid_ratios = credit_history['RepaymentRatio'].dropna()
         # Filter out extreme values
-        valid_ratios = valid_ratios[(valid_ratios >= 0) & (valid_ratios <= 2)]
+        valid_ratios = QuantileSketch.from_rows(loan_sketches, 'RepaymentRatio').between(0, 2)
+        mean_ratio = credit_cube['ratio_sum'].sum() / credit_cube['ratio_count'].sum()
+        edges = np.linspace(0, 2, 41)
+        ratio_bins = pd.DataFrame({'Repayment Ratio (Amount Paid / Amount Borrowed)': (edges[:-1] + edges[1:]) / 2,
+                                   'count': valid_ratios.histogram(edges)})
         
-        fig = px.histogram(valid_ratios, 
-                          title='Distribution of Loan Repayment Ratios',
-                          labels={'value': 'Repayment Ratio (Amount Paid / Amount Borrowed)'},
-                          color_discrete_sequence=['#3498db'])
+        fig = px.bar(ratio_bins, x='Repayment Ratio (Amount Paid / Amount Borrowed)', y='count',
+                    title='Distribution of Loan Repayment Ratios',
+                    color_discrete_sequence=['#3498db'])
         
         # Add full repayment and mean ratio lines
         fig.add_vline(x=1.0, line_dash="dash", line_color="red", 
                      annotation_text="Full Repayment", 
                      annotation_position="top")
         
-        fig.add_vline(x=valid_ratios.mean(), line_dash="dash", line_color="green", 
-                     annotation_text=f"Mean: {valid_ratios.mean():.2f}", 
+        fig.add_vline(x=mean_ratio, line_dash="dash", line_color="green", 
+                     annotation_text=f"Mean: {mean_ratio:.2f}", 
                      annotation_position="bottom")
         
-        fig.update_layout(yaxis_title='Frequency', paper_bgcolor='rgba(0,0,0,0)',
+        fig.update_layout(yaxis_title='Frequency', bargap=0, paper_bgcolor='rgba(0,0,0,0)',
                               plot_bgcolor='rgba(0,0,0,0)', font_color='#333333' )
         st.plotly_chart(fig, use_container_width=True)
     
@@ -368,6 +312,106 @@ with tab4:
     # fig.update_layout(yaxis_title='Repayment Rate (%)', yaxis_range=[0, 100])
     # st.plotly_chart(fig, use_container_width=True)
 
+checkpoint("tab: Repayment Analysis")
+
+with tab5:
+    st.header("Financial Inclusion")
+    st.caption("Zone and sector filters apply here; loan purpose and amount filters do not.")
+    _, zones, sectors, _ = filters
+    
+    # Households with savings and insurance answers, as service bitmasks
+    households = load_household_features()
+    adults = load_adult_services()
+    in_segment = households['respondents'] > 0
+    if zones:
+        in_segment &= households['Region'].map(zone_dict).isin(zones)
+    if sectors:
+        in_segment &= households['UrbanRuralSector'].map(sector_dict).isin(sectors)
+    households = households[in_segment]
+    if zones or sectors:
+        adults = adults[adults['HouseholdID'].isin(households['HouseholdID'])]
+    
+    if households.empty:
+        st.info("No financial inclusion data for the selected zones and sectors.")
+    else:
+        # Share of adults using each service
+        shares = service_shares(adults['services'], adults['answered'])
+        for col, (code, share) in zip(st.columns(len(shares)), shares.items()):
+            col.metric(f"Adults: {SERVICE_LABELS[code]}", f"{share:.1f}%")
+        
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            # Share of households where any adult uses each service
+            by_zone = inclusion_rollup(households, 'Region')[SERVICES].rename(index=zone_dict, columns=SERVICE_LABELS)
+            by_zone = by_zone.reset_index(names='Zone').melt(id_vars='Zone', var_name='Service', value_name='Households (%)')
+            
+            fig = px.bar(by_zone, x='Zone', y='Households (%)', color='Service', barmode='group',
+                        title='Households Using Each Service by Zone',
+                        color_discrete_sequence=px.colors.qualitative.Set2)
+            fig.update_layout(yaxis_range=[0, 100], paper_bgcolor='rgba(0,0,0,0)',
+                              plot_bgcolor='rgba(0,0,0,0)', font_color='#333333')
+            st.plotly_chart(fig, use_container_width=True)
+        
+        with col2:
+            # Breadth: how many of the four scored services a household uses
+            services_used = pd.Series(popcount(households['services_mask'].to_numpy() & SCORED_MASK))
+            breadth = services_used.value_counts().reindex(range(5), fill_value=0).reset_index()
+            breadth.columns = ['Services Used', 'Households']
+            
+            fig = px.bar(breadth, x='Services Used', y='Households',
+                        title='Households by Number of Financial Services Used (of 4)',
+                        color_discrete_sequence=['#2ecc71'])
+            fig.update_layout(paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)', font_color='#333333')
+            st.plotly_chart(fig, use_container_width=True)
+
+checkpoint("tab: Financial Inclusion")
+
+with tab6:
+    st.header("Loan Vintages")
+    st.caption("The loan purpose filter applies here; zone, sector and amount filters do not. "
+               "A loan counts as repaid in the month of its expected final payment.")
+    purposes = filters[0]
+    
+    # Precomputed cumulative curves per cohort, added up over the selected cohorts
+    curves = load_vintage_curves()
+    if purposes:
+        curves = curves[curves['LoanPurpose'].isin(purposes)]
+    
+    if curves.empty:
+        st.info("No loan vintages for the selected loan purposes.")
+    else:
+        compare_by = st.radio("Compare by", ["Vintage year", "Vintage quarter", "Lender type", "Loan purpose"],
+                              horizontal=True)
+        by = {'Vintage year': 'vintage_year', 'Vintage quarter': 'vintage', 'Lender type': 'LenderType',
+              'Loan purpose': 'LoanPurpose'}[compare_by]
+        vintages = repayment_curves(curves, by)
+        vintages[by] = vintages[by].astype(str)
+        
+        fig = px.line(vintages, x='month', y='repaid_share', color=by,
+                      title=f'Cumulative Share of Loans Fully Repaid by {compare_by}',
+                      labels={'month': 'Months Since Loan Received', 'repaid_share': 'Loans Fully Repaid (%)',
+                              by: compare_by},
+                      color_discrete_sequence=px.colors.qualitative.Set2)
+        fig.update_layout(yaxis_range=[0, 100], paper_bgcolor='rgba(0,0,0,0)',
+                          plot_bgcolor='rgba(0,0,0,0)', font_color='#333333')
+        st.plotly_chart(fig, use_container_width=True)
+        
+        # Loans, amount and repaid shares at a few horizons
+        horizons = [6, 12, 24]
+        summary = vintages[vintages['month'] == 0].set_index(by)[['loans', 'amount']]
+        for months in horizons:
+            at = vintages[vintages['month'] == months].set_index(by)
+            summary[f'Repaid by {months} Months'] = at['repaid_share']
+        summary['Amount Repaid'] = vintages[vintages['month'] == MAX_MONTHS].set_index(by)['amount_repaid_share']
+        st.dataframe(
+            summary.reset_index().rename(columns={by: compare_by, 'loans': 'Loans', 'amount': 'Amount Lent'})
+            .style.format({'Amount Lent': "₦{:,.0f}", 'Amount Repaid': "{:.1f}%",
+                           **{f'Repaid by {months} Months': "{:.1f}%" for months in horizons}}),
+            hide_index=True, use_container_width=True,
+        )
+
+checkpoint("tab: Loan Vintages")
 
 # # Add a section for creditworthiness factors
 # st.header("Creditworthiness Factors")
@@ -383,26 +427,6 @@ with tab4:
 # especially focusing on young agripreneurs who may lack traditional collateral.
 # """)
 
-# # Add a sidebar with filters
-# st.sidebar.header("Filters")
-# st.sidebar.markdown("Filter the data to explore specific segments")
-
-# # Add loan purpose filter if available
-# if 'LoanPurpose' in credit_history.columns:
-#     purposes = credit_history['LoanPurpose'].dropna().unique()
-#     selected_purposes = st.sidebar.multiselect("Loan Purpose", options=purposes)
-    
-#     if selected_purposes:
-#         st.sidebar.info(f"You've selected {len(selected_purposes)} loan purposes. The dashboard would filter to show only loans for these purposes.")
-
-# # Add loan amount range filter
-# min_amount = int(credit_history['LoanAmount'].min())
-# max_amount = int(credit_history['LoanAmount'].max())
-# amount_range = st.sidebar.slider("Loan Amount Range", min_amount, max_amount, (min_amount, max_amount))
-
-# if amount_range != (min_amount, max_amount):
-#     st.sidebar.info(f"You've selected loans between {amount_range[0]} and {amount_range[1]} Naira. The dashboard would filter to show only these loans.")
-
 # # Add about section
 # st.sidebar.markdown("---")
 # st.sidebar.header("About")
@@ -427,13 +451,35 @@ with tab4:
 #     key="report-pdf"
 # )
 
-# st.sidebar.download_button(
-#     label="Download Dashboard Data (CSV)",
-#     data=credit_history.to_csv().encode('utf-8'),
-#     file_name="credit_history_data.csv",
-#     mime="text/csv",
-#     key="data-csv"
-# )
+# Download the filtered data: exported only on request, streamed from DuckDB in chunks
+st.sidebar.markdown("---")
+st.sidebar.header("Download")
+with st.sidebar.form("export"):
+    dataset = st.selectbox("Data", list(EXPORTS), format_func=EXPORTS.get)
+    export_format = st.radio("Format", list(EXPORT_FORMATS), format_func=str.upper, horizontal=True)
+    st.caption("Credit data takes every filter; household profiles and scores take the zone and sector filters.")
+    prepare = st.form_submit_button("Prepare Download")
+
+if prepare:
+    export_filters = dict(zip(['purposes', 'zones', 'sectors', 'amount_range'], filters))
+    conn = get_duckdb_connection()
+    rows = count_export(conn, dataset, export_filters)
+    if rows > MAX_DOWNLOAD_ROWS:
+        st.sidebar.warning(f"{rows:,} rows is more than a page download holds ({MAX_DOWNLOAD_ROWS:,}). "
+                           f"Narrow the filters, or stream it from the scoring service's /export/{dataset}.{export_format}.")
+    else:
+        with st.spinner(f"Exporting {rows:,} rows..."):
+            model = load_credit_model() if dataset == 'scores' else None
+            with export_file(conn, dataset, export_format, export_filters, model) as output:
+                data = output.read()
+        st.sidebar.download_button(
+            label=f"Download {EXPORTS[dataset]} ({rows:,} rows)",
+            data=data,
+            file_name=f"naijayield_{dataset}.{export_format}",
+            mime=EXPORT_FORMATS[export_format],
+            key="data-export"
+        )
+checkpoint("export")
 
 # # Footer
 # st.markdown("---")
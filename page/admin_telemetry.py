@@ -0,0 +1,41 @@
+import streamlit as st
+import pandas as pd
+from utils import is_admin_user
+from utils.telemetry import cache_report, resident_memory_bytes, peak_memory_bytes, active_sessions, write_metrics
+
+if not is_admin_user():
+    st.error("This page is only available to administrators.")
+    st.stop()
+
+st.title("🛠️ Cache & Memory Telemetry")
+st.markdown("Numbers for this replica since it started. Use them to set cache TTLs and `max_entries`.")
+
+col1, col2, col3 = st.columns(3)
+col1.metric("Resident Memory", f"{resident_memory_bytes() / 2**20:,.0f} MB")
+col2.metric("Peak Memory", f"{peak_memory_bytes() / 2**20:,.0f} MB")
+sessions = active_sessions()
+col3.metric("Active Sessions", "-" if sessions is None else sessions)
+
+report = pd.DataFrame(cache_report())
+if report.empty:
+    st.info("No cached function has been called yet.")
+else:
+    report['cache'] = report['cache'].str.replace('utils.', '', regex=False)
+    report['hit_rate'] = report['hit_rate'] * 100
+    report['size_mb'] = report['bytes'].astype(float) / 2**20  # unknown (None) when Streamlit hides the sizes
+    st.subheader("Caches")
+    st.dataframe(
+        report[['cache', 'kind', 'calls', 'hits', 'misses', 'hit_rate', 'recomputes', 'compute_seconds',
+                'entries', 'size_mb']],
+        hide_index=True,
+        use_container_width=True,
+        column_config={
+            'hit_rate': st.column_config.NumberColumn("Hit Rate", format="%.1f%%"),
+            'recomputes': st.column_config.NumberColumn("Recomputes", help="Misses for arguments that were cached before: evicted, expired or cleared"),
+            'compute_seconds': st.column_config.NumberColumn("Compute (s)", format="%.2f"),
+            'size_mb': st.column_config.NumberColumn("Size (MB)", format="%.2f"),
+        },
+    )
+
+if st.button("Write metrics file now"):
+    st.success(f"Metrics written to {write_metrics()}")
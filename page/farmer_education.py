@@ -307,6 +307,109 @@ if total_income > 0:
     else:
         st.error("❌ Your debt ratio is too high. Most lenders would consider this risky. Focus on reducing your debt.")
 
+# Loan What-If Simulator
+st.markdown("<h2>Loan What-If Simulator</h2>", unsafe_allow_html=True)
+st.markdown("<p>Explore which loans you can afford before you apply. Every combination of loan amount, repayment period, interest rate and change in income below is checked against the income and other debts you entered in the calculator above.</p>", unsafe_allow_html=True)
+
+sim_col1, sim_col2 = st.columns(2)
+
+with sim_col1:
+    amount_range = st.slider("Loan Amount (₦)", 50_000, 5_000_000, (100_000, 2_000_000), step=50_000)
+    tenor_range = st.slider("Repayment Period (months)", 1, 60, (3, 36))
+    
+with sim_col2:
+    rate_range = st.slider("Annual Interest Rate (%)", 0, 60, (5, 35))
+    shock_range = st.slider("Change in Income (%)", -80, 50, (-40, 20),
+                            help="How much your income could fall or rise, e.g. -30% after a poor harvest")
+
+if total_income > 0:
+    # Imported only when the simulator renders, so the page itself stays free of the analytics stack
+    import numpy as np
+    import plotly.express as px
+    from utils.loan_simulator import simulate_loans, amortization_schedule, DTI_HEALTHY, DTI_CONCERNING
+    
+    # Grid axes as tuples, so each input set is simulated once and memoized
+    amounts = tuple(np.linspace(*amount_range, 40).round(-3))
+    tenors = tuple(np.unique(np.linspace(*tenor_range, 12).round()))
+    rates = tuple(np.linspace(*rate_range, 15).round(1))
+    shocks = np.linspace(*shock_range, 7).round()
+    if shock_range[0] <= 0 <= shock_range[1]:
+        shocks = np.append(shocks, 0)  # always offer the current income when it is in range
+    shocks = tuple(np.unique(shocks))
+    scenarios = simulate_loans(amounts, tenors, rates, shocks, total_income, other_debts)
+    st.caption(f"{scenarios.size:,} scenarios: {len(amounts)} amounts × {len(tenors)} periods × "
+               f"{len(rates)} interest rates × {len(shocks)} income changes")
+    
+    pick_col1, pick_col2 = st.columns(2)
+    with pick_col1:
+        rate = st.select_slider("Interest rate to show", options=rates, value=rates[len(rates) // 2],
+                                format_func=lambda value: f"{value:g}%")
+    with pick_col2:
+        shock = st.select_slider("Income change to show", options=shocks,
+                                 value=0.0 if 0.0 in shocks else shocks[len(shocks) // 2],
+                                 format_func=lambda value: f"{value:+g}%")
+    rate_index, shock_index = rates.index(rate), shocks.index(shock)
+    amount_labels = [f"₦{amount:,.0f}" for amount in amounts]
+    tenor_labels = [f"{tenor:g}" for tenor in tenors]
+    
+    heat_col1, heat_col2 = st.columns(2)
+    
+    with heat_col1:
+        fig = px.imshow(scenarios.dti[:, :, rate_index, shock_index], x=tenor_labels, y=amount_labels,
+                        origin='lower', aspect='auto', zmin=0, zmax=2 * DTI_CONCERNING,
+                        color_continuous_scale='RdYlGn_r',
+                        labels={'x': 'Repayment Period (months)', 'y': 'Loan Amount', 'color': 'DTI %'},
+                        title=f'Debt-to-Income Ratio at {rate:g}% interest, {shock:+g}% income')
+        fig.update_layout(paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)', font_color='#333333')
+        st.plotly_chart(fig, use_container_width=True)
+    
+    with heat_col2:
+        fig = px.imshow(scenarios.affordable_share()[:, :, rate_index], x=tenor_labels, y=amount_labels,
+                        origin='lower', aspect='auto', zmin=0, zmax=100, color_continuous_scale='RdYlGn',
+                        labels={'x': 'Repayment Period (months)', 'y': 'Loan Amount', 'color': '% of cases'},
+                        title=f'Still Affordable (DTI ≤ {DTI_HEALTHY}%) Across Income Changes, at {rate:g}% interest')
+        fig.update_layout(paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)', font_color='#333333')
+        st.plotly_chart(fig, use_container_width=True)
+    
+    fig = px.imshow(scenarios.max_affordable()[:, :, shock_index].T, x=tenor_labels, y=[f"{value:g}%" for value in rates],
+                    origin='lower', aspect='auto', color_continuous_scale='Greens', text_auto='.3s',
+                    labels={'x': 'Repayment Period (months)', 'y': 'Annual Interest Rate', 'color': 'Max loan (₦)'},
+                    title=f'Largest Affordable Loan (DTI ≤ {DTI_HEALTHY}%) at {shock:+g}% income')
+    fig.update_layout(paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)', font_color='#333333')
+    st.plotly_chart(fig, use_container_width=True)
+    
+    # Repayment plan of one loan
+    st.markdown("<h3>Repayment Plan</h3>", unsafe_allow_html=True)
+    plan_col1, plan_col2, plan_col3 = st.columns(3)
+    with plan_col1:
+        plan_amount = st.number_input("Loan Amount (₦)", min_value=1_000, value=int(amounts[len(amounts) // 4]), step=10_000)
+    with plan_col2:
+        plan_tenor = st.number_input("Repayment Period (months)", min_value=1, max_value=120, value=12)
+    with plan_col3:
+        plan_rate = st.number_input("Annual Interest Rate (%)", min_value=0.0, max_value=100.0, value=float(rate))
+    
+    schedule = amortization_schedule(plan_amount, plan_tenor, plan_rate)
+    plan_payment = schedule['Payment'].iloc[0]
+    plan_dti = (plan_payment + other_debts) / total_income * 100
+    metric_col1, metric_col2, metric_col3 = st.columns(3)
+    metric_col1.metric("Monthly Payment", f"₦{plan_payment:,.0f}")
+    metric_col2.metric("Total Interest", f"₦{schedule['Interest'].sum():,.0f}")
+    metric_col3.metric("Debt-to-Income Ratio", f"{plan_dti:.1f}%",
+                       delta="healthy" if plan_dti <= DTI_HEALTHY else "risky" if plan_dti > DTI_CONCERNING else "concerning",
+                       delta_color="normal" if plan_dti <= DTI_HEALTHY else "inverse")
+    
+    fig = px.bar(schedule, x='Month', y=['Principal', 'Interest'], title='Monthly Payment Breakdown',
+                 labels={'value': 'Amount (₦)', 'variable': ''},
+                 color_discrete_map={'Principal': '#2E7D32', 'Interest': '#f39c12'})
+    fig.update_layout(paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)', font_color='#333333')
+    st.plotly_chart(fig, use_container_width=True)
+    
+    with st.expander("Full repayment schedule"):
+        st.dataframe(schedule.style.format({column: "₦{:,.0f}" for column in ['Payment', 'Interest', 'Principal', 'Balance']}),
+                     hide_index=True, use_container_width=True)
+else:
+    st.info("Enter your monthly income in the calculator above to simulate loans.")
+
 # FAQ Section
 with st.expander("Frequently Asked Questions"):
     st.markdown("""
@@ -0,0 +1,76 @@
+import streamlit as st
+import plotly.express as px
+from utils.geo import load_geo_index, geo_metrics, GEO_LEVELS, LEVEL_NAMES
+from utils.inclusion import SERVICES, SERVICE_LABELS
+from utils.profiling import checkpoint
+
+# Title and description
+st.title("🗺️ Geographic Drill-Down")
+st.markdown("""
+Compare credit access, financial inclusion and harvests across Nigeria's geopolitical zones, then drill into the
+states of a zone and the local government areas (LGAs) of a state.
+""")
+
+index = load_geo_index()
+checkpoint("load index")
+
+if index.rollup.empty:
+    st.error("No geographic data available.")
+    st.stop()
+
+METRICS = {
+    'borrowing_rate': ("Borrowed or Applied (%)", "{:.1f}%"),
+    'rejection_rate': ("Applications Rejected (%)", "{:.1f}%"),
+    'repayment_rate': ("Loans Fully Repaid (%)", "{:.1f}%"),
+    'average_loan': ("Average Loan", "₦{:,.0f}"),
+    **{code: (f"{SERVICE_LABELS[code]} (%)", "{:.1f}%") for code in SERVICES},
+    'harvest_value': ("Harvest Value per Farming Household", "₦{:,.0f}"),
+    'crop_sales_value': ("Crop Sales per Farming Household", "₦{:,.0f}"),
+}
+
+# Drill down: every level's options are the children of the area above it
+path = ()
+col1, col2, col3 = st.columns(3)
+for col, level in zip([col1, col2], LEVEL_NAMES[1:3]):
+    children = index.children(path)
+    options = dict(zip(children['area'], children[GEO_LEVELS[len(path)]].astype(int)))
+    choice = col.selectbox(level, [f"All {level.lower()}s"] + list(options))
+    if choice not in options:
+        break
+    path += (options[choice],)
+with col3:
+    metric = st.selectbox("Compare", list(METRICS), format_func=lambda name: METRICS[name][0])
+checkpoint("drill-down")
+
+# Headline numbers of the selected area
+area = geo_metrics(index.area(path).to_frame().T.infer_objects()).iloc[0]
+st.subheader(area['area'])
+col1, col2, col3, col4, col5 = st.columns(5)
+col1.metric("Households", f"{area['households']:,.0f}")
+for col, name in zip([col2, col3, col4, col5], ['borrowing_rate', 'rejection_rate', 'repayment_rate', 'HasBankAccount']):
+    col.metric(METRICS[name][0], METRICS[name][1].format(area[name]))
+
+# The areas one level down
+level = LEVEL_NAMES[len(path) + 1]
+breakdown = geo_metrics(index.children(path))
+label, number_format = METRICS[metric]
+ranked = breakdown.sort_values(metric, ascending=True)
+
+fig = px.bar(ranked, y='area', x=metric, orientation='h', title=f'{label} by {level}',
+             labels={'area': level, metric: label}, hover_data={'households': ':,'},
+             color_discrete_sequence=['#2ecc71'])
+fig.add_vline(x=area[metric], line_dash="dash", line_color="gray",
+              annotation_text=area['area'], annotation_position="top right")
+fig.update_layout(height=max(400, 22 * len(ranked)), paper_bgcolor='rgba(0,0,0,0)',
+                  plot_bgcolor='rgba(0,0,0,0)', font_color='#333333')
+st.plotly_chart(fig, use_container_width=True)
+
+st.dataframe(
+    breakdown.rename(columns={'area': level, 'households': 'Households',
+                              **{name: label for name, (label, _) in METRICS.items()}})
+    .style.format({label: number_format for label, number_format in METRICS.values()}, na_rep="–"),
+    hide_index=True, use_container_width=True,
+)
+st.caption("Financial service shares cover households with savings survey answers; harvest values cover "
+           "households with plots. LGAs are shown by survey code.")
+checkpoint("results")
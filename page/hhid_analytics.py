@@ -3,8 +3,16 @@ import pandas as pd
 import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
-from plotly.subplots import make_subplots
-from utils import load_css, get_duckdb_connection
+from utils import load_css
+from utils.loaders import load_credit_data, load_insurance_data
+from utils.features import load_household_features, inclusion_rates, score_features, INCLUSION_RATES
+from utils.inclusion import services_in, popcount, SCORED_MASK, SERVICE_LABELS
+from utils.scoring import risk_category
+from utils.peers import load_peer_index, peer_metrics, PEER_GROUPS, PEER_METRICS
+from utils.similarity import load_similarity_index, similar_households
+from utils.credit_model import load_credit_model, repayment_by_service
+from utils.mappings import loan_denial_reasons, loan_purpose_reasons, loan_non_application_reasons, zone_dict, sector_dict, state_dict
+from utils.profiling import checkpoint
 
 
 # Title and description
@@ -14,107 +22,14 @@ This tool provides a comprehensive credit profile for individual farming househo
 combining loan history with financial inclusion data to determine creditworthiness.
 """)
 
-# Connect to database
-conn = get_duckdb_connection()
-
-
-
-# Data preprocessing
-# Define mappings for categorical variables
-zone_dict = {
-    1: "NORTH CENTRAL",
-    2: "NORTH EAST",
-    3: "NORTH WEST",
-    4: "SOUTH EAST",
-    5: "SOUTH SOUTH",
-    6: "SOUTH WEST"
-    }
-
-sector_dict = {
-    0 : "NEW",
-    1 : "URBAN",
-    2 : "RURAL"
-}
-
-loan_denial_reasons = {
-    1: "LACK OF COLLATERAL",
-    2: "NO SAVINGS/SHARES",
-    3: "BAD CREDIT HISTORY",
-    4: "ITEMS DIDN'T QUALIFY FOR A LOAN",
-    5: "LACK OF GUARANTORS",
-    6: "OTHER"
-}
-
-loan_purpose_reasons = {
-    1: "PURCHASE LAND",
-    2: "PURCHASE AGRICULTURAL INPUTS FOR FOOD CROP",
-    3: "PURCHASE INPUTS FOR CASH CROP",
-    4: "BUSINESS START UP CAPITAL",
-    5: "NON FARM BUSINESS COSTS",
-    6: "CEREMONIES (MARRIAGE, BURIAL, OTHER SOCIAL FUNCTIONS ETC)",
-    7: "EDUCATION",
-    8: "MOTOR VEHICLE PURCHASE",
-    9: "HOME PURCHASE OR CONSTRUCTION",
-    10: "OTHER HOUSEHOLD CONSUMPTION",
-    11: "OTHER (SPECIFY)"
-}
-
-loan_non_application_reasons = {
-1: "BELIEVED IT WOULD BE REFUSED",
-2: "TOO EXPENSIVE",
-3: "TOO MUCH TROUBLE FOR WHAT IT WAS WORTH",
-4: "INADEQUATE COLLATERAL",
-6: "DO NOT LIKE TO BE IN DEBT",
-7: "DO NOT KNOW ANY LENDER",
-8: "OTHER (SPECIFY)"
-}
-
-# Load credit history data
-@st.cache_data
-def load_credit_data():
-    try:
-        credit_loan_history = conn.execute("select * from combined_credit_LoanHistory_vw").fetch_df()       
-        credit_history = credit_loan_history.copy()
-    except:
-        # If file doesn't exist, show a file uploader
-        st.warning("Credit history data not found. Please upload your CSV file.")
-    
-
-    # Apply mappings
-    credit_history['PrimaryRejectionReason'] = credit_history['PrimaryRejectionReason'].map(loan_denial_reasons)
-    credit_history['PrimaryReasonNoBorrowing'] = credit_history['PrimaryReasonNoBorrowing'].map(loan_non_application_reasons)
-    credit_history['LoanPurpose'] = credit_history['LoanPurpose'].map(loan_purpose_reasons)
-    
-    # Convert numeric columns
-    numeric_columns = ['LoanAmount', 'IsFullyRepaid', 'TotalAmountPaid']
-    for col in numeric_columns:
-        credit_history[col] = pd.to_numeric(credit_history[col], errors='coerce')
-    
-    # Calculate repayment ratio
-    credit_history['RepaymentRatio'] = credit_history['TotalAmountPaid'] / credit_history['LoanAmount']
-    
-    return credit_history
-
-# Load financial inclusion data
-@st.cache_data
-def load_insurance_data():
-    try:
-        insurance_data_db = conn.execute("select * from savings_and_insurance_data").fetch_df()       
-        insurance_data = insurance_data_db.copy()
-    except:
-        # If file doesn't exist, show a file uploader
-        st.warning("Credit history data not found. Please upload your CSV file.")
-
-    return insurance_data
-
-
 # Load the data
 credit_data = load_credit_data()
 fin_data = load_insurance_data()
-
-
-# getting credit data with LoadIds:
-cred_loadid = conn.execute("select * from credit_history_loan_2;").fetch_df()
+# One row per household: loan counts, decoded inclusion rates, ...
+features = load_household_features()
+# Trained model (scripts.train_credit_model), None until its artifact exists
+credit_model = load_credit_model()
+checkpoint("load data")
 
 # Get unique household IDs from both datasets
 household_ids = set()
@@ -134,12 +49,17 @@ if household_ids:
 
 # Create credit profile if user clicks search
 if selected_household:
-    subset_loanid = cred_loadid[cred_loadid['HouseholdID'] == selected_household]
     # Get data for the selected household
     household_credit = credit_data[credit_data['HouseHoldID'] == selected_household] if not credit_data.empty else pd.DataFrame()
     household_fin = fin_data[fin_data['HouseHoldID'] == selected_household] if not fin_data.empty else pd.DataFrame()
-    household_cred_loadid =  subset_loanid if not subset_loanid.empty else pd.DataFrame()
-    
+    household_features = features[features['HouseholdID'] == selected_household]
+
+    # The feature table can miss a listed household while it is stale or being rebuilt
+    if household_features.empty and not (household_credit.empty and household_fin.empty):
+        st.warning(f"The profile of Household {selected_household} is not available yet. "
+                   "Please try again after the next data refresh.")
+        st.stop()
+
     # Check if we have data for this household
     if household_credit.empty and household_fin.empty:
         st.error(f"No data found for Household ID: {selected_household}")
@@ -160,24 +80,21 @@ if selected_household:
                 has_borrowed = household_credit['Borrowed_Or_appliedLoan'].iloc[0] == 1
             
             if has_borrowed:
+                loan_record = household_features.iloc[0]
                 # Count loans
-                loan_count = 0
-                if 'LoanID' in household_cred_loadid.columns:
-                    loan_count = household_cred_loadid['LoanID'].nunique()
+                loan_count = loan_record['distinct_loans']
                 
                 st.metric("Loans Taken", f"{loan_count}")
                 
                 # Calculate total borrowed
-                total_borrowed = 0
-                if 'LoanAmount' in household_cred_loadid.columns:
-                    total_borrowed = household_cred_loadid['LoanAmount'].sum()
+                total_borrowed = loan_record['loan_amount_total']
                 
                 st.metric("Total Borrowed", f"₦{total_borrowed:,.0f}")
                 
                 # Calculate repayment rate
                 repayment_rate = 0
-                if 'IsFullyRepaid' in household_cred_loadid.columns:
-                    repayment_rate = (2 - household_cred_loadid['IsFullyRepaid'].mean()) * 100
+                if loan_record['loan_count'] > 0:
+                    repayment_rate = loan_record['repayment_rate'] * 100
                 
                 repayment_color = "normal"
                 if repayment_rate >= 80:
@@ -223,22 +140,19 @@ if selected_household:
             
             if not household_fin.empty:
                 # Calculate financial inclusion metrics
-                has_bank = household_fin['HasBankAccount'].iloc[0] == 1 if 'HasBankAccount' in household_fin.columns else False
-                has_coop = household_fin['UsedCooperative'].iloc[0] == 1 if 'UsedCooperative' in household_fin.columns else False
-                has_savings = household_fin['UsedInformalSavingsGroups'].iloc[0] == 1 if 'UsedInformalSavingsGroups' in household_fin.columns else False
-                has_insurance = household_fin['HasInsurance'].iloc[0] == 1 if 'HasInsurance' in household_fin.columns else False
+                services = household_features['first_respondent_services'].iloc[0]
+                used = services_in(services)
+                has_bank = 'HasBankAccount' in used
+                has_coop = 'UsedCooperative' in used
+                has_savings = 'UsedInformalSavingsGroups' in used
+                has_insurance = 'HasInsurance' in used
                 
                 # Count financial services used
-                services_count = sum([has_bank, has_coop, has_savings, has_insurance])
+                services_count = popcount(services & SCORED_MASK)
                 
                 st.metric("Financial Services Used", f"{services_count}/4")
                 
-                metrics = {
-                        'Bank Account': (2 - household_fin['HasBankAccount'].mean()) * 100,
-                        'Cooperative': (2 - household_fin['UsedCooperative'].mean()) * 100,
-                        'Informal Savings': (2 - household_fin['UsedInformalSavingsGroups'].mean()) * 100,
-                        'Insurance': (2 - household_fin['HasInsurance'].mean()) * 100,
-                    }
+                metrics = {SERVICE_LABELS[code]: rate for code, rate in inclusion_rates(household_features).iloc[0].items()}
                 # Show financial inclusion score
                 categories = list(metrics.keys())
                 values = [metrics[cat]/100 for cat in categories]
@@ -311,89 +225,15 @@ if selected_household:
             st.subheader("Creditworthiness")
             
             # Calculate combined creditworthiness score
-            credit_score = 0
-            max_score = 0
-            score_components = {}
-            
-            # 1. Repayment history (40 points)
-            repayment_score = 0
-            if not household_cred_loadid.empty and 'IsFullyRepaid' in household_cred_loadid.columns:
-                # Count loans that are fully repaid (IsFullyRepaid = 1 means fully repaid)
-                fully_repaid_count = (household_cred_loadid['IsFullyRepaid'] == 1).sum()
-                total_loans = len(household_cred_loadid)
-                
-                # Calculate repayment rate (0-100%)
-                repayment_rate = fully_repaid_count / total_loans if total_loans > 0 else 0
-                
-                # Convert to score (0-40 points)
-                repayment_score = repayment_rate * 40
-                
-                credit_score += repayment_score
-                score_components['Repayment History'] = repayment_score
-                max_score += 40
-
-            # 2. Loan utilization (20 points)
-            utilization_score = 0
-            if not household_cred_loadid.empty and 'LoanPurpose' in household_cred_loadid.columns:
-                # Higher score for agricultural and productive purposes
-                productive_purposes = [1, 2, 3, 4]  # Land, ag inputs, business
-                
-                # Count productive loans
-                productive_count = household_cred_loadid[household_cred_loadid['LoanPurpose'].isin(productive_purposes)].shape[0]
-                total_count = len(household_cred_loadid)
-                
-                if total_count > 0:
-                    utilization_score = (productive_count / total_count) * 20
-                    credit_score += utilization_score
-                    score_components['Loan Utilization'] = utilization_score
-                max_score += 20
-            
-            # 3. Financial inclusion (40 points)
-            # Calculate financial inclusion score based on the metrics
-            if not household_fin.empty:
-                # Reuse the financial inclusion score calculated earlier
-                inclusion_metrics = {
-                    'Bank Account': (2 - household_fin['HasBankAccount'].mean()) * 100,
-                    'Cooperative': (2 - household_fin['UsedCooperative'].mean()) * 100,
-                    'Informal Savings': (2 - household_fin['UsedInformalSavingsGroups'].mean()) * 100,
-                    'Insurance': (2 - household_fin['HasInsurance'].mean()) * 100,
-                }
-                
-                # Calculate average inclusion score (0-100)
-                inclusion_values = list(inclusion_metrics.values())
-                financial_inclusion_score = sum(inclusion_values) / len(inclusion_values) if inclusion_values else 0
-                
-                # Convert to 0-40 points
-                fin_inclusion_score = financial_inclusion_score * 0.4
-                credit_score += fin_inclusion_score
-                score_components['Financial Inclusion'] = fin_inclusion_score
-                max_score += 40
-            
-            # Calculate final score (scaled to 100)
-            final_score = (credit_score / max_score * 100) if max_score > 0 else 0
-            
-            # Determine risk category
-            if final_score >= 80:
-                risk_category = "Very Low Risk"
-                color = "darkgreen"
-            elif final_score >= 60:
-                risk_category = "Low Risk"
-                color = "green"
-            elif final_score >= 40:
-                risk_category = "Medium Risk"
-                color = "orange"
-            elif final_score >= 20:
-                risk_category = "High Risk"
-                color = "red"
-            else:
-                risk_category = "Very High Risk"
-                color = "darkred"
+            credit_result = score_features(household_features).iloc[0]
+            final_score = credit_result['score']
+            risk_label, color = risk_category(final_score)
             
             # Display credit score gauge
             fig = go.Figure(go.Indicator(
                 mode="gauge+number",
                 value=final_score,
-                title={'text': risk_category},
+                title={'text': risk_label},
                 gauge={
                     'axis': {'range': [0, 100]},
                     'bar': {'color': color},
@@ -412,44 +252,105 @@ if selected_household:
             st.plotly_chart(fig, use_container_width=True)
             
             # Show loan recommendation
+            max_loan = credit_result['max_loan']
             if final_score >= 80:
-                max_loan = "₦500,000+"
                 st.success(f"**Recommended Max Loan**: {max_loan}")
             elif final_score >= 60:
-                max_loan = "₦250,000-500,000"
                 st.info(f"**Recommended Max Loan**: {max_loan}")
             elif final_score >= 40:
-                max_loan = "₦100,000-250,000"
                 st.warning(f"**Recommended Max Loan**: {max_loan}")
-            elif final_score >= 20:
-                max_loan = "₦50,000-100,000"
-                st.error(f"**Recommended Max Loan**: {max_loan}")
             else:
-                max_loan = "< ₦50,000"
                 st.error(f"**Recommended Max Loan**: {max_loan}")
+            
+            if credit_model is not None:
+                outcome = credit_model.predict(household_features).iloc[0]
+                st.caption(f"Model-estimated repayment probability: **{outcome['repaid']:.0%}**, "
+                           f"rejection risk if applying: **{outcome['rejected']:.0%}**")
+        
+        # Peer comparison
+        st.subheader("How This Household Compares")
+        peer_index = load_peer_index()
+        household_metrics = peer_metrics(household_features).iloc[0]
+        household_row = household_features.iloc[0]
+        group_names = {
+            'All households': "All households",
+            'Zone': zone_dict.get(household_row['Region'], "Unknown zone"),
+            'Sector': sector_dict.get(household_row['UrbanRuralSector'], "Unknown sector"),
+            'State': state_dict.get(household_row['State'], "Unknown state"),
+        }
+        
+        percentiles = pd.DataFrame({
+            (f"{group}: {group_names[group]}" if column else group): [
+                peer_index.percentile(metric, household_metrics[metric], column, household_row[column] if column else None)
+                for metric in PEER_METRICS]
+            for group, column in PEER_GROUPS.items()
+        }, index=list(PEER_METRICS.values()))
+        
+        peer_cols = st.columns([3, 2])
+        with peer_cols[0]:
+            st.caption("Percentile within each peer group: the share of peers with a lower value (— when it does not apply)")
+            st.dataframe(percentiles.map(lambda pct: "—" if pd.isna(pct) else f"{pct:.0f}%"), use_container_width=True)
+        
+        with peer_cols[1]:
+            peer_group = st.radio("Score distribution within", list(PEER_GROUPS), horizontal=True)
+            column = PEER_GROUPS[peer_group]
+            edges = np.linspace(0, 100, 21)
+            counts = peer_index.histogram('score', edges, column, household_row[column] if column else None)
+            distribution = pd.DataFrame({'Credit Score': edges[:-1] + 2.5, 'Households': counts})
+            
+            fig = px.bar(distribution, x='Credit Score', y='Households',
+                        title=f"{group_names[peer_group]}: {counts.sum():,} households",
+                        color_discrete_sequence=['#95a5a6'])
+            fig.update_traces(width=4.5)
+            fig.add_vline(x=final_score, line_dash="dash", line_color=color,
+                         annotation_text="This household", annotation_position="top")
+            fig.update_layout(height=300, margin=dict(l=10, r=10, t=50, b=10), paper_bgcolor='rgba(0,0,0,0)',
+                              plot_bgcolor='rgba(0,0,0,0)', font_color='#333333')
+            st.plotly_chart(fig, use_container_width=True)
+        
+        # Nearest households in loan history, financial services, location and farm size
+        st.subheader("Farmers Like You")
+        positions, distances = load_similarity_index().similar_to(selected_household)
+        neighbours = similar_households(features, positions, distances)
+        
+        if neighbours.empty:
+            st.info("No similar households found")
+        else:
+            borrowers = neighbours[neighbours['loan_count'] > 0]
+            like_cols = st.columns(4)
+            like_cols[0].metric("Borrowed or Applied", f"{neighbours['borrowed_or_applied'].sum()} of {len(neighbours)}")
+            like_cols[1].metric("Applications Rejected", f"{neighbours['application_rejected'].sum()} of {len(neighbours)}")
+            like_cols[2].metric("Borrowers Fully Repaid",
+                                f"{(borrowers['repaid_loans'] == borrowers['loan_count']).sum()} of {len(borrowers)}")
+            like_cols[3].metric("Average Credit Score", f"{neighbours['score'].mean():.1f}")
+            
+            st.caption(f"The {len(neighbours)} most similar households in loan history, financial services, "
+                       "location, household size and harvest (smaller distance = more similar)")
+            st.dataframe(pd.DataFrame({
+                'Household': neighbours['HouseholdID'].astype(str),
+                'Zone': neighbours['Region'].map(zone_dict),
+                'Sector': neighbours['UrbanRuralSector'].map(sector_dict),
+                'Loans': neighbours['loan_count'],
+                'Fully Repaid': neighbours['repaid_loans'],
+                'Rejected': neighbours['application_rejected'].map({True: "Yes", False: "No"}),
+                'Services Used': popcount(neighbours['services']),
+                'Credit Score': neighbours['score'].round(1),
+                'Risk': neighbours['risk_category'],
+                'Distance': neighbours['distance'].round(2),
+            }), hide_index=True, use_container_width=True)
         
         # Detailed Household Credit Information
         st.markdown("---")
+    checkpoint("credit profile")
         
     st.subheader("Household Financial Inclusion Explorer")
         
-    # Filter data for the selected household
-    household_data = fin_data[fin_data['HouseHoldID'] == selected_household]
-    
-    if not household_data.empty:
+    if not household_features.empty and household_features['respondents'].iloc[0] > 0:
         st.write(f"Analyzing financial inclusion for Household ID: {selected_household}")
         
-        # Count adults in household
-        adult_count = len(household_data)
-        
         # Calculate household metrics
-        metrics = {
-            'Bank Account': (2 - household_data['HasBankAccount'].mean()) * 100,
-            'Cooperative': (2 - household_data['UsedCooperative'].mean()) * 100,
-            'Informal Savings': (2 - household_data['UsedInformalSavingsGroups'].mean()) * 100,
-            'Insurance': (2 - household_data['HasInsurance'].mean()) * 100,
-            'Proxy Banking': (2 - household_data['HasProxyBankingAccess'].mean()) * 100
-        }
+        rates = inclusion_rates(household_features, codes=list(INCLUSION_RATES)).iloc[0]
+        metrics = {SERVICE_LABELS[code]: rate for code, rate in rates.items()}
         
         # Display metrics in columns
         cols = st.columns(5)
@@ -558,17 +459,26 @@ if selected_household:
             st.success("This household has a strong financial inclusion profile. Maintaining these practices will support good creditworthiness.")
     else:
         st.error("No data found for the selected household.")
+    checkpoint("financial inclusion explorer")
 
     # Add a section on Financial Inclusion to your Creditworthiness Factors section
     st.header("Financial Inclusion Factors in Creditworthiness")
-    st.markdown("""
-    Based on our analysis of savings and insurance data, the following financial inclusion factors strongly predict creditworthiness:
+    # Share of loans fully repaid by borrowing households with and without each service
+    service_repayment = repayment_by_service(features).map(lambda value: 0 if pd.isna(value) else value)
+    bank, multiple, insurance, savings = (service_repayment.loc[name] for name in
+                                          ['HasBankAccount', 'Multiple services', 'HasInsurance', 'UsedInformalSavingsGroups'])
+    st.markdown(f"""
+    Based on the loans of borrowing households in the survey data, the following financial inclusion factors relate to creditworthiness:
 
-    1. **Formal Bank Account Access**: Farmers with bank accounts demonstrate 27% higher loan repayment rates
-    2. **Diversity of Financial Services**: Using multiple financial services (bank, cooperative, savings groups) correlates with better credit behavior
+    1. **Formal Bank Account Access**: Farmers with bank accounts fully repaid {bank['with']:.0f}% of their loans, against {bank['without']:.0f}% for those without ({bank['relative_difference']:+.0f}%)
+    2. **Diversity of Financial Services**: Households using two or more financial services (bank, cooperative, savings groups, insurance, proxy banking) repaid {multiple['with']:.0f}% of their loans, against {multiple['without']:.0f}% ({multiple['relative_difference']:+.0f}%)
     3. **Financial Literacy**: Those who research and compare financial products before using them show better loan management
-    4. **Insurance Coverage**: Having agricultural insurance indicates risk awareness and correlates with higher repayment rates
-    5. **Savings Behavior**: Regular participation in formal or informal savings mechanisms demonstrates financial discipline
+    4. **Insurance Coverage**: Insured households repaid {insurance['with']:.0f}% of their loans, against {insurance['without']:.0f}% for uninsured ones ({insurance['relative_difference']:+.0f}%)
+    5. **Savings Behavior**: Members of informal savings groups repaid {savings['with']:.0f}% of their loans, against {savings['without']:.0f}% for non-members ({savings['relative_difference']:+.0f}%)
 
     These financial inclusion factors can be combined with traditional credit factors to create a more comprehensive credit scoring model for young agripreneurs.
-    """)
\ No newline at end of file
+    """)
+    if credit_model is not None:
+        repaid = credit_model.targets['repaid']['metrics']
+        st.caption(f"The trained credit model predicts full repayment from these factors with an AUC of {repaid['auc']:.2f} "
+                   f"on {repaid['rows']:,} held-out loans (trained {credit_model.trained_at}).")
\ No newline at end of file
@@ -0,0 +1,126 @@
+import streamlit as st
+import pandas as pd
+import numpy as np
+import plotly.express as px
+from utils.features import load_household_features
+from utils.portfolio_risk import (simulate_portfolio, load_portfolio_loans, load_loss_severities, loss_summary,
+                                  expected_losses, RISK_CATEGORIES, LOAN_SIZING, TAIL_LEVELS)
+from utils.mappings import zone_dict
+from utils.profiling import checkpoint
+
+# Title and description
+st.title("🏦 Portfolio Risk")
+st.markdown("""
+Simulate the losses of a loan portfolio: one loan per selected household, sized from its recommended max-loan band.
+Each household defaults with a probability derived from the repayment records, and a defaulted loan loses a share
+of its amount drawn from what unrepaid loans in the data actually lost.
+""")
+
+features = load_household_features()
+checkpoint("load data")
+
+with st.form("portfolio"):
+    col1, col2 = st.columns(2)
+    with col1:
+        categories = st.multiselect("Risk Categories", RISK_CATEGORIES, default=RISK_CATEGORIES[:3])
+        zones = st.multiselect("Zones (all when empty)", list(zone_dict.values()))
+        pasted_ids = st.text_area("Or paste household IDs (overrides the filters above)",
+                                  placeholder="10001, 10002, 10003")
+    with col2:
+        sizing = st.selectbox("Loan Size within the Max-Loan Band", list(LOAN_SIZING), index=1)
+        max_households = st.number_input("Maximum Households (a random sample when more match)",
+                                         min_value=10, max_value=50_000, value=1_000, step=100)
+        paths = st.select_slider("Simulated Paths", options=[10_000, 50_000, 100_000, 200_000, 500_000],
+                                 value=200_000, format_func=lambda value: f"{value:,}")
+    st.form_submit_button("Run Simulation")
+
+# Select the households
+if pasted_ids.strip():
+    requested = pd.to_numeric(pd.Series(pasted_ids.replace(",", " ").split()), errors='coerce')
+    household_ids = features['HouseholdID'][features['HouseholdID'].isin(requested)]
+    unknown = requested.isna().sum() + (~requested.dropna().isin(features['HouseholdID'])).sum()
+    if unknown:
+        st.warning(f"{unknown:,} of the pasted IDs are not known households and were left out")
+else:
+    # Risk category of every household
+    candidates = load_portfolio_loans(sizing)
+    selected = candidates['risk_category'].isin(categories)
+    if zones:
+        selected &= candidates['Region'].map(zone_dict).isin(zones)
+    household_ids = candidates.loc[selected, 'HouseholdID']
+    if len(household_ids) > max_households:
+        household_ids = household_ids.sample(int(max_households), random_state=0)
+
+if household_ids.empty:
+    st.info("No households match the selection.")
+    st.stop()
+
+with st.spinner(f"Simulating {paths:,} paths over {len(household_ids):,} households..."):
+    loans, losses = simulate_portfolio(tuple(sorted(household_ids.tolist())), sizing, paths)
+checkpoint("simulation")
+
+summary = loss_summary(losses, loans['amount'].sum())
+exposure = summary['exposure']
+
+# Headline numbers
+col1, col2, col3, col4, col5 = st.columns(5)
+col1.metric("Households", f"{len(loans):,}")
+col2.metric("Exposure", f"₦{exposure:,.0f}")
+col3.metric("Expected Loss", f"₦{summary['expected_loss']:,.0f}",
+            f"{summary['expected_loss'] / exposure:.1%} of exposure" if exposure else None, delta_color="off")
+col4.metric("Value at Risk (99%)", f"₦{summary['var_0.99']:,.0f}",
+            f"{summary['var_0.99'] / exposure:.1%} of exposure" if exposure else None, delta_color="off")
+col5.metric("Expected Shortfall (99%)", f"₦{summary['es_0.99']:,.0f}",
+            f"{summary['es_0.99'] / exposure:.1%} of exposure" if exposure else None, delta_color="off")
+
+col1, col2 = st.columns([3, 2])
+
+with col1:
+    # Loss distribution over the simulated paths
+    counts, edges = np.histogram(losses, bins=60)
+    distribution = pd.DataFrame({'Portfolio Loss (Naira)': (edges[:-1] + edges[1:]) / 2, 'Paths': counts})
+    fig = px.bar(distribution, x='Portfolio Loss (Naira)', y='Paths',
+                 title=f'Distribution of Portfolio Losses over {len(losses):,} Paths',
+                 color_discrete_sequence=['#3498db'])
+    fig.add_vline(x=summary['expected_loss'], line_dash="dash", line_color="green",
+                  annotation_text="Expected loss", annotation_position="top left")
+    fig.add_vline(x=summary['var_0.99'], line_dash="dash", line_color="red",
+                  annotation_text="VaR 99%", annotation_position="top right")
+    fig.update_layout(bargap=0, paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)', font_color='#333333')
+    st.plotly_chart(fig, use_container_width=True)
+
+with col2:
+    st.subheader("Tail Losses")
+    tail = pd.DataFrame({
+        'Confidence': [f"{level:.1%}" for level in TAIL_LEVELS],
+        'Value at Risk': [summary[f'var_{level:g}'] for level in TAIL_LEVELS],
+        'Expected Shortfall': [summary[f'es_{level:g}'] for level in TAIL_LEVELS],
+    })
+    tail['% of Exposure'] = tail['Expected Shortfall'] / exposure * 100 if exposure else np.nan
+    st.dataframe(tail.style.format({'Value at Risk': "₦{:,.0f}", 'Expected Shortfall': "₦{:,.0f}",
+                                    '% of Exposure': "{:.1f}%"}),
+                 hide_index=True, use_container_width=True)
+    st.caption("Value at risk: the loss exceeded on only (100 − confidence)% of paths. "
+               "Expected shortfall: the average loss on those paths.")
+
+# Where the expected loss comes from
+loans['expected_loss'] = expected_losses(loans, load_loss_severities()['loss_fraction'].to_numpy())
+by_category = loans.groupby('risk_category').agg(
+    households=('HouseholdID', 'size'),
+    exposure=('amount', 'sum'),
+    default_probability=('default_probability', 'mean'),
+    expected_loss=('expected_loss', 'sum'),
+).reindex([category for category in RISK_CATEGORIES if category in set(loans['risk_category'])])
+by_category['share_of_loss'] = by_category['expected_loss'] / by_category['expected_loss'].sum() * 100
+
+st.subheader("Risk by Category")
+st.dataframe(
+    by_category.reset_index().rename(columns={
+        'risk_category': 'Risk Category', 'households': 'Households', 'exposure': 'Exposure',
+        'default_probability': 'Mean Default Probability', 'expected_loss': 'Expected Loss',
+        'share_of_loss': 'Share of Expected Loss',
+    }).style.format({'Exposure': "₦{:,.0f}", 'Mean Default Probability': "{:.1%}", 'Expected Loss': "₦{:,.0f}",
+                     'Share of Expected Loss': "{:.1f}%"}),
+    hide_index=True, use_container_width=True,
+)
+checkpoint("results")
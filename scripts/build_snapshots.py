@@ -0,0 +1,49 @@
+"""Write the Arrow snapshots of every snapshotted loader before replicas start.
+
+Tables whose content changed without an ETL refresh stamp are stamped first (a
+full checksum of every source table), so the snapshots cover their new rows.
+
+    python -m scripts.build_snapshots               # snapshots/ (NAIJAYIELD_SNAPSHOT_DIR)
+    python -m scripts.build_snapshots --rebuild     # drop existing snapshots first
+"""
+import argparse
+import time
+
+import utils.cube  # noqa: F401  (registers load_credit_cube)
+import utils.features  # noqa: F401
+import utils.geo  # noqa: F401
+import utils.inclusion  # noqa: F401
+import utils.sketches  # noqa: F401
+import utils.loaders  # noqa: F401
+import utils.vintage  # noqa: F401
+from utils.functions import get_duckdb_connection
+from utils.snapshots import SNAPSHOT_LOADERS, snapshot_dir, verify_checksums
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rebuild", action="store_true", help="delete existing snapshots and write them again")
+    args = parser.parse_args()
+
+    directory = snapshot_dir()
+    if directory is None:
+        parser.error("snapshots are switched off (NAIJAYIELD_SNAPSHOT_DIR)")
+    if args.rebuild:
+        for path in directory.glob("*.arrow"):
+            path.unlink()
+
+    tables = {table for load in SNAPSHOT_LOADERS.values() for table in load.tables}
+    for table in verify_checksums(get_duckdb_connection(), tables):
+        print(f"stamped {table}: content changed since the last check")
+
+    print(f"{'loader':<24}{'rows':>12}{'seconds':>10}{'MB':>10}  file")
+    for name, load in sorted(SNAPSHOT_LOADERS.items()):
+        started = time.perf_counter()
+        frame = load()
+        seconds = time.perf_counter() - started
+        path = max(directory.glob(f"{name}-*.arrow"), key=lambda path: path.stat().st_mtime)
+        print(f"{name:<24}{len(frame):>12,}{seconds:>10.2f}{path.stat().st_size / 2**20:>10.1f}  {path.name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""Write a synthetic GHS-schema dataset into a local DuckDB file.
+
+    python -m scripts.generate_synthetic_data data/synthetic_x10.duckdb --scale 10
+    NAIJAYIELD_DUCKDB_PATH=data/synthetic_x10.duckdb streamlit run main.py
+"""
+import argparse
+import time
+from pathlib import Path
+
+import duckdb
+
+from utils.cube import build_credit_cube
+from utils.features import build_household_features
+from utils.geo import build_geo_rollup
+from utils.sketches import build_loan_sketches
+from utils.vintage import build_vintage_curves
+from utils.synthetic import BASE_HOUSEHOLDS, generate
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("database", help="DuckDB file to create or overwrite")
+    parser.add_argument("--scale", type=float, default=1.0,
+                        help=f"multiple of the real survey size ({BASE_HOUSEHOLDS:,} households)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--chunk-households", type=int, default=100_000,
+                        help="households generated per batch; bounds peak memory")
+    args = parser.parse_args(argv)
+
+    Path(args.database).parent.mkdir(parents=True, exist_ok=True)
+    conn = duckdb.connect(args.database)
+
+    def progress(chunk_no, households, seconds):
+        print(f"chunk {chunk_no}: {households:,} households in {seconds:.1f}s")
+
+    started = time.perf_counter()
+    row_counts = generate(conn, scale=args.scale, seed=args.seed,
+                          chunk_households=args.chunk_households, progress=progress)
+    cube_rows = build_credit_cube(conn)
+    feature_rows = build_household_features(conn)
+    sketch_rows = build_loan_sketches(conn)
+    vintage_rows = build_vintage_curves(conn)
+    geo_rows = build_geo_rollup(conn)
+    conn.close()
+
+    for table, rows in row_counts.items():
+        print(f"{table:<30} {rows:>14,}")
+    print(f"{'credit_rollup_cube':<30} {cube_rows:>14,}")
+    print(f"{'household_features':<30} {feature_rows:>14,}")
+    print(f"{'loan_value_sketches':<30} {sketch_rows:>14,}")
+    print(f"{'loan_vintage_curves':<30} {vintage_rows:>14,}")
+    print(f"{'geo_rollup':<30} {geo_rows:>14,}")
+    print(f"done in {time.perf_counter() - started:.1f}s -> {args.database}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Rank the slowest and most frequent queries in the DuckDB query log.
+
+    python -m scripts.query_report                       # logs/queries.jsonl
+    python -m scripts.query_report --since 2025-06-01T08:00 --page Dashboard
+    python -m scripts.query_report --log /var/log/naijayield/queries.jsonl --top 20
+"""
+import argparse
+
+import pandas as pd
+
+from utils.querylog import read_query_log
+
+
+def summarize(log):
+    """One row per query fingerprint with count, latency percentiles, rows, bytes and pages"""
+    grouped = log.groupby('query_id')
+    summary = pd.DataFrame({
+        'calls': grouped.size(),
+        'errors': grouped['error'].count(),
+        'total_ms': grouped['seconds'].sum() * 1000,
+        'p50_ms': grouped['seconds'].median() * 1000,
+        'p95_ms': grouped['seconds'].quantile(0.95) * 1000,
+        'max_ms': grouped['seconds'].max() * 1000,
+        'avg_rows': grouped['rows'].mean(),
+        'avg_mb': grouped['bytes'].mean() / 2**20,
+        'pages': grouped['page'].agg(lambda pages: ", ".join(sorted(pages.dropna().unique()))),
+        'sessions': grouped['session'].nunique(),
+        'sql': grouped['sql'].first(),
+    })
+    return summary
+
+
+def print_table(title, table, top, sql_width):
+    print(f"\n{title}")
+    columns = ['calls', 'errors', 'total_ms', 'p50_ms', 'p95_ms', 'max_ms', 'avg_rows', 'avg_mb', 'sessions', 'pages']
+    table = table.head(top).copy()
+    table['sql'] = table['sql'].str.slice(0, sql_width)
+    with pd.option_context('display.width', 250, 'display.max_columns', None, 'display.max_colwidth', sql_width,
+                           'display.float_format', '{:,.1f}'.format):
+        print(table[columns + ['sql']].to_string())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--log", help="query log file (default: NAIJAYIELD_QUERY_LOG or logs/queries.jsonl)")
+    parser.add_argument("--since", help="only records at or after this ISO timestamp (UTC)")
+    parser.add_argument("--page", help="only queries issued by this page, e.g. Dashboard or hhid_analytics")
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--sql-width", type=int, default=80)
+    args = parser.parse_args(argv)
+
+    log = read_query_log(args.log)
+    if log.empty:
+        print("query log is empty")
+        return
+    log['ts'] = pd.to_datetime(log['ts'], utc=True)
+    for column in ('rows', 'bytes', 'page', 'session', 'error'):
+        if column not in log:
+            log[column] = None
+    log['rows'] = pd.to_numeric(log['rows'])
+    log['bytes'] = pd.to_numeric(log['bytes'])
+    if args.since:
+        log = log[log['ts'] >= pd.Timestamp(args.since, tz='UTC')]
+    if args.page:
+        log = log[log['page'] == args.page]
+    if log.empty:
+        print("no queries match the filters")
+        return
+
+    print(f"{len(log):,} queries, {log['query_id'].nunique()} distinct, "
+          f"{log['ts'].min():%Y-%m-%d %H:%M:%S} .. {log['ts'].max():%Y-%m-%d %H:%M:%S} UTC, "
+          f"{log['seconds'].sum() * 1000:,.0f} ms in total")
+
+    summary = summarize(log)
+    print_table("Slowest queries (by p95)", summary.sort_values('p95_ms', ascending=False), args.top, args.sql_width)
+    print_table("Most frequent queries", summary.sort_values('calls', ascending=False), args.top, args.sql_width)
+    print_table("Most total time", summary.sort_values('total_ms', ascending=False), args.top, args.sql_width)
+
+    by_page = log.groupby(log['page'].fillna('(outside a page)')).agg(
+        queries=('query_id', 'size'), total_ms=('seconds', lambda s: s.sum() * 1000),
+        p95_ms=('seconds', lambda s: s.quantile(0.95) * 1000), max_ms=('seconds', lambda s: s.max() * 1000))
+    print("\nTime by page")
+    print(by_page.sort_values('total_ms', ascending=False).to_string(float_format='{:,.1f}'.format))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""Score households in bulk with the Individual Analytics credit score rules.
+
+Household IDs are split into chunks that worker processes score in parallel,
+each with its own read-only DuckDB connection; results are streamed to the
+output file chunk by chunk, in input order. Runs against the local file in
+NAIJAYIELD_DUCKDB_PATH (or --database) or MotherDuck, without a Streamlit server.
+
+    python -m scripts.score_households all --output scores.parquet
+    python -m scripts.score_households 10001 10002 10003 --output scores.csv
+    python -m scripts.score_households --ids-file lender_list.csv --output scores.parquet --workers 4
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from utils.functions import open_duckdb_connection
+from utils.scoring import INCLUSION_SERVICES, score_households
+
+DEFAULT_CHUNK_SIZE = 5_000
+NO_DATA = "No data"
+
+# Same household list as the Individual Analytics selector
+ALL_HOUSEHOLDS_QUERY = """
+SELECT DISTINCT HouseHoldID FROM combined_credit_LoanHistory_vw WHERE HouseHoldID IS NOT NULL
+UNION
+SELECT DISTINCT HouseHoldID FROM savings_and_insurance_data WHERE HouseHoldID IS NOT NULL
+ORDER BY 1
+"""
+LOANS_QUERY = """
+SELECT l.HouseholdID, l.IsFullyRepaid, l.LoanPurpose
+FROM credit_history_loan_2 l SEMI JOIN chunk_ids c ON l.HouseholdID = c.household_id
+"""
+KNOWN_QUERY = """
+SELECT DISTINCT v.HouseHoldID FROM combined_credit_LoanHistory_vw v SEMI JOIN chunk_ids c ON v.HouseHoldID = c.household_id
+UNION
+SELECT DISTINCT f.HouseHoldID FROM savings_and_insurance_data f SEMI JOIN chunk_ids c ON f.HouseHoldID = c.household_id
+"""
+FIN_QUERY = f"""
+SELECT f.HouseHoldID, {", ".join(f"f.{service}" for service in INCLUSION_SERVICES)}
+FROM savings_and_insurance_data f SEMI JOIN chunk_ids c ON f.HouseHoldID = c.household_id
+"""
+
+_conn = None
+
+
+def _open_worker_connection(threads=None):
+    global _conn
+    _conn = open_duckdb_connection(read_only=True)
+    if threads:
+        # One DuckDB thread per worker process instead of every worker using every core
+        _conn.execute(f"SET threads TO {threads}")
+
+
+def score_chunk(household_ids):
+    """Scores for one chunk of household IDs; IDs the Individual Analytics page does not know are marked "No data"."""
+    _conn.register("chunk_ids", pd.DataFrame({"household_id": household_ids}))
+    try:
+        loans = _conn.execute(LOANS_QUERY).fetch_df()
+        fin = _conn.execute(FIN_QUERY).fetch_df()
+        known = _conn.execute(KNOWN_QUERY).fetch_df()
+    finally:
+        _conn.unregister("chunk_ids")
+    scores = score_households(loans, fin, household_ids=household_ids)
+    missing = ~scores['HouseholdID'].isin(known['HouseHoldID'])
+    scores.loc[missing, 'score'] = float('nan')
+    scores.loc[missing, ['risk_category', 'max_loan']] = NO_DATA
+    return scores
+
+
+class ScoreWriter:
+    """Appends score chunks to a Parquet (one row group per chunk) or CSV file"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.format = "parquet" if self.path.suffix.lower() in (".parquet", ".pq") else "csv"
+        self._parquet = None
+        self.rows = 0
+
+    def write(self, chunk):
+        if self.format == "parquet":
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if self._parquet is None:
+                self._parquet = pq.ParquetWriter(self.path, table.schema)
+            self._parquet.write_table(table.cast(self._parquet.schema))
+        else:
+            chunk.to_csv(self.path, mode="w" if self.rows == 0 else "a", header=self.rows == 0, index=False)
+        self.rows += len(chunk)
+
+    def close(self):
+        if self._parquet is not None:
+            self._parquet.close()
+
+
+def read_household_ids(args):
+    if args.ids_file:
+        ids = pd.read_csv(args.ids_file, header=None, comment="#").iloc[:, 0]
+        # Accept a header line such as "HouseholdID"
+        ids = pd.to_numeric(ids, errors="coerce").dropna()
+        return ids.astype("int64").drop_duplicates().tolist()
+    if args.households == ["all"]:
+        conn = open_duckdb_connection(read_only=True)
+        try:
+            return [row[0] for row in conn.execute(ALL_HOUSEHOLDS_QUERY).fetchall()]
+        finally:
+            conn.close()
+    return list(dict.fromkeys(int(household) for household in args.households))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("households", nargs="*", help='household IDs, or "all"')
+    parser.add_argument("--ids-file", type=Path, help="file with one household ID per line (or a CSV whose first column holds them)")
+    parser.add_argument("--output", "-o", type=Path, required=True, help="results file; .parquet or .csv")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="scoring processes (default: one per core)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="households per chunk")
+    parser.add_argument("--database", type=Path, help="local DuckDB file (default: NAIJAYIELD_DUCKDB_PATH or MotherDuck)")
+    args = parser.parse_args(argv)
+    if bool(args.households) == bool(args.ids_file):
+        parser.error('give household IDs, "all", or --ids-file')
+    if args.database:
+        # Inherited by the worker processes
+        os.environ["NAIJAYIELD_DUCKDB_PATH"] = str(args.database)
+
+    started = time.perf_counter()
+    household_ids = read_household_ids(args)
+    chunks = [household_ids[start:start + args.chunk_size] for start in range(0, len(household_ids), args.chunk_size)]
+    workers = max(1, min(args.workers, len(chunks)))
+    print(f"scoring {len(household_ids):,} households in {len(chunks)} chunk(s) on {workers} worker(s)", file=sys.stderr)
+
+    writer = ScoreWriter(args.output)
+    no_data = 0
+    try:
+        if workers == 1:
+            _open_worker_connection()
+            results = map(score_chunk, chunks)
+            pool = None
+        else:
+            # spawn: DuckDB's thread pool does not survive a fork
+            pool = multiprocessing.get_context("spawn").Pool(workers, initializer=_open_worker_connection,
+                                                             initargs=(1,))
+            results = pool.imap(score_chunk, chunks)
+        for scores in results:
+            writer.write(scores)
+            no_data += (scores['risk_category'] == NO_DATA).sum()
+            print(f"\r{writer.rows:,}/{len(household_ids):,} households", end="", file=sys.stderr)
+        if pool is not None:
+            pool.close()
+            pool.join()
+    finally:
+        writer.close()
+    print(f"\nwrote {writer.rows:,} scores to {args.output} in {time.perf_counter() - started:.1f}s"
+          + (f" ({no_data:,} IDs had no data)" if no_data else ""), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,317 @@
+"""HTTP/JSON credit scoring service for partner loan-origination systems.
+
+Scores every household once at startup from the household feature table, with
+the Individual Analytics credit profile rules (utils.scoring) and, when its
+artifact exists, the trained repayment model (utils.credit_model), and answers
+from that in-memory index. The data version (the ETL refresh stamps of the feature
+table and its sources, or NAIJAYIELD_DATA_VERSION) is checked every
+--reload-interval seconds; when it changes a new index is built in the background
+and swapped in without dropping requests.
+
+Exports stream the filtered credit data, household profiles or scores from DuckDB
+in chunks (utils.export) with chunked transfer encoding, on a connection of their
+own, so memory stays bounded and scoring requests are served meanwhile. Filters
+take the Dashboard labels and may repeat, e.g. ?zone=NORTH+WEST&zone=NORTH+EAST.
+
+    python -m scripts.scoring_service --database data/synthetic_x10.duckdb --port 8600
+
+    GET  /health                                   index version, size and load time
+    GET  /score/<household_id>                     one household
+    POST /score  {"household_ids": [10001, ...]}   up to MAX_BATCH households
+    GET  /export/<credit|households|scores>.<csv|parquet>?purpose=&zone=&sector=&min_amount=&max_amount=
+"""
+import argparse
+import json
+import logging
+import math
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import pandas as pd
+
+from scripts.score_households import NO_DATA
+from utils.credit_model import read_credit_model
+from utils.export import EXPORTS, EXPORT_FORMATS, write_export
+from utils.features import features_data_version, read_household_features, score_features
+from utils.functions import open_duckdb_connection
+from utils.mappings import loan_purpose_reasons, sector_dict, zone_dict
+
+DEFAULT_PORT = 8600
+DEFAULT_RELOAD_INTERVAL = 60
+MAX_BATCH = 10_000
+EXPORT_BUFFER_BYTES = 64 * 1024  # bytes per HTTP chunk of an export
+# Export query parameter -> (export_query() argument, accepted labels)
+EXPORT_FILTERS = {
+    'purpose': ('purposes', loan_purpose_reasons),
+    'zone': ('zones', zone_dict),
+    'sector': ('sectors', sector_dict),
+}
+# Output name of each score_households component, as in compute_credit_score()
+COMPONENTS = {
+    'repayment_score': 'Repayment History',
+    'utilization_score': 'Loan Utilization',
+    'inclusion_score': 'Financial Inclusion',
+}
+
+_logger = logging.getLogger("naijayield.scoring_service")
+
+
+class HouseholdIndex:
+    """Scores of every household, looked up by ID through a hash index"""
+
+    def __init__(self, conn, version):
+        started = time.perf_counter()
+        features = read_household_features(conn)
+        scores = score_features(features)
+        model = read_credit_model()
+        if model is not None:
+            scores['repayment_probability'] = model.predict(features)['repaid'].to_numpy()
+
+        self.version = version
+        self.model = model
+        self.loaded_at = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        self._ids = pd.Index(scores['HouseholdID'])
+        self._columns = {column: scores[column].to_numpy() for column in scores.columns if column != 'HouseholdID'}
+        self.load_seconds = time.perf_counter() - started
+
+    def __len__(self):
+        return len(self._ids)
+
+    def lookup(self, household_ids):
+        """One result dict per ID, in request order; unknown IDs get a "No data" result"""
+        positions = self._ids.get_indexer(household_ids)
+        return [self._result(household_id, position) for household_id, position in zip(household_ids, positions)]
+
+    def _result(self, household_id, position):
+        if position < 0:
+            return {'household_id': household_id, 'score': None, 'components': {},
+                    'risk_category': NO_DATA, 'max_loan': NO_DATA}
+        values = {column: array[position] for column, array in self._columns.items()}
+        result = {
+            'household_id': household_id,
+            'score': round(float(values['score']), 2),
+            'components': {name: round(float(values[column]), 2) for column, name in COMPONENTS.items()
+                           if not math.isnan(values[column])},
+            'risk_category': values['risk_category'],
+            'max_loan': values['max_loan'],
+        }
+        if 'repayment_probability' in values:
+            result['repayment_probability'] = round(float(values['repayment_probability']), 4)
+        return result
+
+
+def export_filters(query):
+    """export_query() filters from parsed query parameters; raises ValueError on an unknown label or bad amount"""
+    filters = {}
+    for parameter, (argument, mapping) in EXPORT_FILTERS.items():
+        labels = query.get(parameter, [])
+        unknown = set(labels) - set(mapping.values())
+        if unknown:
+            raise ValueError(f"unknown {parameter} {', '.join(sorted(unknown))}")
+        filters[argument] = tuple(labels)
+    if 'min_amount' in query or 'max_amount' in query:
+        try:
+            filters['amount_range'] = (float(query.get('min_amount', ['-inf'])[0]),
+                                       float(query.get('max_amount', ['inf'])[0]))
+        except ValueError:
+            raise ValueError("min_amount and max_amount must be numbers") from None
+    return filters
+
+
+class ChunkedWriter:
+    """Binary file object that sends what is written as HTTP/1.1 chunks of about EXPORT_BUFFER_BYTES"""
+
+    def __init__(self, wfile):
+        self._wfile = wfile
+        self._buffer = bytearray()
+        self.closed = False
+
+    def write(self, data):
+        self._buffer += data
+        if len(self._buffer) >= EXPORT_BUFFER_BYTES:
+            self.flush()
+        return len(data)
+
+    def flush(self):
+        if self._buffer:
+            self._wfile.write(b"%x\r\n" % len(self._buffer) + self._buffer + b"\r\n")
+            self._buffer.clear()
+
+    def close(self):
+        # Writers close their sink when they finish: the response is ended by finish()
+        self.flush()
+
+    def finish(self):
+        self.flush()
+        self._wfile.write(b"0\r\n\r\n")
+        self.closed = True
+
+
+class ScoringService:
+    """Holds the current HouseholdIndex and replaces it when the data version changes"""
+
+    def __init__(self, reload_interval=DEFAULT_RELOAD_INTERVAL):
+        self.reload_interval = reload_interval
+        self.index = None
+        self.reloads = 0
+        self._reload_lock = threading.Lock()
+
+    def reload(self, force=False):
+        """Build a new index if the data changed; returns True when it was swapped in"""
+        with self._reload_lock:
+            # A short-lived read-only connection, so the ETL can take the write lock in between
+            conn = open_duckdb_connection(read_only=True)
+            try:
+                version = features_data_version(conn)
+                if not force and self.index is not None and version == self.index.version:
+                    return False
+                index = HouseholdIndex(conn, version)
+            finally:
+                conn.close()
+            # Requests in flight keep the index they started with
+            self.index = index
+            self.reloads += 1
+            _logger.info("loaded %s households (data version %s) in %.2fs", f"{len(index):,}", version,
+                         index.load_seconds)
+            return True
+
+    def watch(self):
+        def loop():
+            while True:
+                time.sleep(self.reload_interval)
+                try:
+                    self.reload()
+                except Exception:
+                    _logger.exception("reload failed; still serving data version %s", self.index.version)
+
+        threading.Thread(target=loop, daemon=True, name="scoring-index-reload").start()
+
+    def health(self):
+        index = self.index
+        return {'status': 'ok', 'data_version': index.version, 'households': len(index),
+                'loaded_at': index.loaded_at, 'load_seconds': round(index.load_seconds, 3), 'reloads': self.reloads}
+
+
+class ScoringRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive for partners calling in their request path
+    # Headers and body are written separately; with Nagle on, the body waits ~40 ms for the client's delayed ACK
+    disable_nagle_algorithm = True
+    service = None
+    quiet = False
+
+    def do_GET(self):
+        path = urlsplit(self.path).path  # without the query string
+        if path == "/health":
+            return self._send(200, self.service.health())
+        if path.startswith("/score/"):
+            household_id = self._parse_id(path[len("/score/"):])
+            if household_id is None:
+                return self._send(400, {'error': "household ID must be an integer"})
+            return self._send(200, self.service.index.lookup([household_id])[0])
+        if path.startswith("/export/"):
+            return self._export()
+        self._send(404, {'error': f"unknown path {path}"})
+
+    def do_POST(self):
+        path = urlsplit(self.path).path
+        if path != "/score":
+            return self._send(404, {'error': f"unknown path {path}"})
+        try:
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            raw_ids = body['household_ids']
+        except (ValueError, KeyError, TypeError):
+            return self._send(400, {'error': 'expected a JSON body like {"household_ids": [10001, 10002]}'})
+        if not isinstance(raw_ids, list) or len(raw_ids) > MAX_BATCH:
+            return self._send(413 if isinstance(raw_ids, list) else 400,
+                              {'error': f"household_ids must be a list of at most {MAX_BATCH:,} IDs"})
+        household_ids = [self._parse_id(raw_id) for raw_id in raw_ids]
+        if None in household_ids:
+            return self._send(400, {'error': "household IDs must be integers"})
+        index = self.service.index
+        self._send(200, {'data_version': index.version, 'results': index.lookup(household_ids)})
+
+    def _export(self):
+        url = urlsplit(self.path)
+        dataset, _, export_format = url.path[len("/export/"):].partition(".")
+        if dataset not in EXPORTS or export_format not in EXPORT_FORMATS:
+            return self._send(404, {'error': f"exports are /export/<{'|'.join(EXPORTS)}>.<{'|'.join(EXPORT_FORMATS)}>"})
+        try:
+            filters = export_filters(parse_qs(url.query))
+        except ValueError as e:
+            return self._send(400, {'error': str(e)})
+        model = self.service.index.model if dataset == 'scores' else None
+
+        # Its own short-lived read-only connection, like an index reload
+        conn = open_duckdb_connection(read_only=True)
+        try:
+            self.send_response(200)
+            self.send_header("Content-Type", EXPORT_FORMATS[export_format])
+            self.send_header("Content-Disposition", f'attachment; filename="naijayield_{dataset}.{export_format}"')
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            output = ChunkedWriter(self.wfile)
+            try:
+                rows = write_export(output, conn, dataset, export_format, filters, model)
+            except Exception:
+                # Headers are sent: drop the connection without the last chunk, so the client sees a failed download
+                _logger.exception("export %s failed", self.path)
+                self.close_connection = True
+                return
+            output.finish()
+            _logger.info("exported %s rows to %s", f"{rows:,}", self.path)
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _parse_id(raw_id):
+        try:
+            return int(raw_id)
+        except (TypeError, ValueError):
+            return None
+
+    def _send(self, status, payload):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if not self.quiet:
+            super().log_message(format, *args)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database", help="local DuckDB file (default: NAIJAYIELD_DUCKDB_PATH or MotherDuck)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--reload-interval", type=float, default=DEFAULT_RELOAD_INTERVAL,
+                        help="seconds between data version checks")
+    parser.add_argument("--quiet", action="store_true", help="no access log")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    if args.database:
+        os.environ["NAIJAYIELD_DUCKDB_PATH"] = args.database
+
+    service = ScoringService(args.reload_interval)
+    service.reload()
+    service.watch()
+    handler = type("Handler", (ScoringRequestHandler,), {'service': service, 'quiet': args.quiet})
+    server = ThreadingHTTPServer((args.host, args.port), handler)
+    _logger.info("scoring service listening on http://%s:%d", args.host, args.port)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""Train the credit model and save it as a versioned artifact.
+
+Fits one logistic regression per outcome in utils.credit_model.TARGETS on the
+household feature table, evaluates it on a fixed held-out share of households,
+and writes models/credit_model-v<MODEL_VERSION>.json (or --output), which the
+Individual Analytics page and the scoring service load once per process.
+
+    python -m scripts.train_credit_model --database data/synthetic_x10.duckdb
+    python -m scripts.train_credit_model --l2 10 --holdout 0.3 --output /tmp/credit_model.json
+"""
+import argparse
+import os
+
+import numpy as np
+
+from utils.credit_model import (HOLDOUT_SHARE, L2_PENALTY, TARGETS, save_credit_model, scoring_throughput,
+                                train_credit_model)
+from utils.features import features_data_version, read_household_features
+from utils.functions import open_duckdb_connection
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database", help="local DuckDB file (default: NAIJAYIELD_DUCKDB_PATH or MotherDuck)")
+    parser.add_argument("--output", help="artifact path (default: NAIJAYIELD_MODEL_PATH or models/)")
+    parser.add_argument("--l2", type=float, default=L2_PENALTY, help="L2 penalty on standardized coefficients")
+    parser.add_argument("--holdout", type=float, default=HOLDOUT_SHARE, help="share of households held out")
+    parser.add_argument("--top", type=int, default=5, help="strongest predictors to list per outcome")
+    args = parser.parse_args(argv)
+    if args.database:
+        os.environ["NAIJAYIELD_DUCKDB_PATH"] = args.database
+
+    conn = open_duckdb_connection(read_only=True)
+    try:
+        features = read_household_features(conn)
+        data_version = features_data_version(conn)
+        model = train_credit_model(conn, features, args.l2, args.holdout, data_version)
+    finally:
+        conn.close()
+
+    print(f"{'outcome':<28} {'train':>8} {'held out':>9} {'base':>6} {'AUC':>6} {'log loss':>9} {'Brier':>6} {'acc':>6}")
+    for name, target in model.targets.items():
+        metrics = target['metrics']
+        print(f"{TARGETS[name]:<28} {metrics['training_rows']:>8,} {metrics['rows']:>9,} {metrics['base_rate']:>6.1%} "
+              f"{metrics['auc']:>6.3f} {metrics['log_loss']:>9.4f} {metrics['brier']:>6.4f} {metrics['accuracy']:>6.1%}")
+    for name in model.targets:
+        odds = model.odds_ratios(name)
+        strongest = odds.loc[np.log(odds).abs().sort_values(ascending=False).index[:args.top]]
+        print(f"\n{TARGETS[name]}: odds ratio per standard deviation")
+        for predictor, ratio in strongest.items():
+            print(f"  {predictor:<32} {ratio:>6.2f}")
+
+    print(f"\nscoring: {scoring_throughput(model, features):,.0f} households/s over {len(features):,} households")
+    print(f"saved {save_credit_model(model, args.output)} (data version {data_version})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+import numpy as np
+import pandas as pd
+
+import utils.portfolio_risk as portfolio_risk
+
+
+def household_features(households=200, seed=0):
+    rng = np.random.default_rng(seed)
+    loans = rng.integers(0, 4, households)
+    features = pd.DataFrame({
+        'HouseholdID': np.arange(10001, 10001 + households),
+        'Region': rng.integers(1, 7, households),
+        'loan_count': loans,
+        'repaid_loans': rng.binomial(loans, 0.6),
+        'productive_loans': rng.binomial(loans, 0.5),
+        'respondents': rng.integers(0, 3, households),
+    })
+    for column in ['bank_account_rate', 'cooperative_rate', 'informal_savings_rate', 'insurance_rate',
+                   'proxy_banking_rate']:
+        features[column] = np.where(features['respondents'] > 0, rng.random(households), np.nan)
+    return features
+
+
+def test_default_probability_does_not_depend_on_the_portfolio(monkeypatch):
+    features = household_features()
+    monkeypatch.setattr(portfolio_risk, 'load_household_features', lambda: features)
+    monkeypatch.setattr(portfolio_risk, 'load_loss_severities',
+                        lambda: pd.DataFrame({'loss_fraction': [0.2, 0.5, 1.0]}))
+    portfolio_risk.load_portfolio_loans.clear()
+    portfolio_risk.simulate_portfolio.clear()
+
+    population = portfolio_risk.portfolio_loans(features).set_index('HouseholdID')['default_probability']
+    # Households without loans only get a non-zero rate from the rest of the population
+    no_loans = tuple(features.loc[features['loan_count'] == 0, 'HouseholdID'].head(20))
+    mixed = tuple(features['HouseholdID'].head(50))
+    for household_ids in [no_loans, mixed, no_loans[:1]]:
+        loans, losses = portfolio_risk.simulate_portfolio(household_ids, paths=1_000)
+        probabilities = loans.set_index('HouseholdID')['default_probability']
+        assert list(probabilities.index) == sorted(household_ids)
+        np.testing.assert_allclose(probabilities, population.loc[probabilities.index])
+    assert (population.loc[list(no_loans)] > 0).all()
+    assert losses.mean() > 0
@@ -0,0 +1,31 @@
+import duckdb
+import numpy as np
+
+from utils.features import FEATURES_QUERY, score_features
+from utils.scoring import compute_credit_score
+from utils.synthetic import generate
+
+
+def test_score_features_matches_compute_credit_score():
+    conn = duckdb.connect()
+    generate(conn, scale=0.1, seed=7)
+    # Every synthetic household answers the savings survey: drop some so all four cases occur
+    conn.execute("DELETE FROM savings_and_insurance_data WHERE HouseHoldID % 5 = 0")
+    features = conn.execute(FEATURES_QUERY).fetch_df()
+    loans = conn.execute("SELECT * FROM credit_history_loan_2").fetch_df()
+    fin = conn.execute("SELECT * FROM savings_and_insurance_data").fetch_df()
+    scores = score_features(features).set_index('HouseholdID')
+
+    components = {'Repayment History': 'repayment_score', 'Loan Utilization': 'utilization_score',
+                  'Financial Inclusion': 'inclusion_score'}
+    loan_groups, fin_groups = dict(list(loans.groupby('HouseholdID'))), dict(list(fin.groupby('HouseHoldID')))
+    assert scores['repayment_score'].notna().any() and scores['repayment_score'].isna().any()
+    assert scores['inclusion_score'].notna().any() and scores['inclusion_score'].isna().any()
+    for household_id, row in scores.iterrows():
+        expected = compute_credit_score(loan_groups.get(household_id, loans.iloc[:0]),
+                                        fin_groups.get(household_id, fin.iloc[:0]))
+        np.testing.assert_allclose(row['score'], expected['score'], atol=1e-9)
+        assert row['risk_category'] == expected['risk_category']
+        assert row['max_loan'] == expected['max_loan']
+        for component, column in components.items():
+            np.testing.assert_allclose(row[column], expected['components'].get(component, np.nan), atol=1e-9)
@@ -0,0 +1,60 @@
+import numpy as np
+
+from utils.similarity import BLOCK_GAP, CATEGORY_WEIGHT, SimilarityIndex
+
+
+def block_vectors(rows=300, blocks=6, seed=0):
+    """Gaussian features plus a one-hot block column weighted like feature_vectors()"""
+    rng = np.random.default_rng(seed)
+    block = rng.integers(0, blocks, rows)
+    vectors = np.hstack([rng.normal(size=(rows, 4)), np.eye(blocks)[block] * CATEGORY_WEIGHT])
+    return vectors.astype(np.float32), np.arange(10001, 10001 + rows), block
+
+
+def brute_force(vectors, vector, k, exclude=None):
+    distances = np.sqrt(np.square(vectors.astype(np.float64) - vector, dtype=np.float64).sum(axis=1))
+    if exclude is not None:
+        distances[exclude] = np.inf
+    rows = np.argsort(distances, kind='stable')[:k]
+    return rows, distances[rows]
+
+
+def test_block_pruning_matches_a_full_scan():
+    vectors, household_ids, block = block_vectors()
+    index = SimilarityIndex(vectors, household_ids, block, BLOCK_GAP)
+    # k=3 mostly stays in the block; k=80 exceeds every block and falls back to all rows
+    for k in [1, 3, 10, 80]:
+        for row in range(0, len(vectors), 7):
+            rows, distances = index.nearest(vectors[row], k, block[row])
+            expected_rows, expected_distances = brute_force(vectors, vectors[row], k)
+            np.testing.assert_array_equal(rows, expected_rows)
+            np.testing.assert_allclose(distances, expected_distances, rtol=1e-5, atol=1e-5)
+
+
+def test_query_far_from_its_block_falls_back_to_other_blocks():
+    vectors, household_ids, block = block_vectors()
+    index = SimilarityIndex(vectors, household_ids, block, BLOCK_GAP)
+    # Far from everything in block 0 but near rows of block 1 once the block column is ignored
+    query = vectors[np.flatnonzero(block == 1)[0]].copy()
+    query[4:] = 0
+    query[4] = CATEGORY_WEIGHT
+    query[:4] += 3
+    rows, distances = index.nearest(query, 5, 0)
+    expected_rows, expected_distances = brute_force(vectors, query, 5)
+    np.testing.assert_array_equal(rows, expected_rows)
+    np.testing.assert_allclose(distances, expected_distances, rtol=1e-5, atol=1e-5)
+
+
+def test_similar_to_leaves_the_household_out():
+    vectors, household_ids, block = block_vectors()
+    index = SimilarityIndex(vectors, household_ids, block, BLOCK_GAP)
+    unblocked = SimilarityIndex(vectors, household_ids)
+    for row in range(0, len(vectors), 11):
+        rows, distances = index.similar_to(household_ids[row], 10)
+        expected_rows, expected_distances = brute_force(vectors, vectors[row], 10, exclude=row)
+        np.testing.assert_array_equal(rows, expected_rows)
+        np.testing.assert_allclose(distances, expected_distances, rtol=1e-5, atol=1e-5)
+        np.testing.assert_array_equal(unblocked.similar_to(household_ids[row], 10)[0], rows)
+
+    rows, distances = index.similar_to(1, 10)
+    assert len(rows) == 0 and len(distances) == 0
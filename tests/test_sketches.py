@@ -0,0 +1,45 @@
+import numpy as np
+
+from utils.sketches import RELATIVE_ACCURACY, ZERO_BUCKET, QuantileSketch, bucket_index
+
+QS = [0, 0.01, 0.1, 0.25, 0.5, 0.75, 0.9, 0.99, 1]
+
+
+def loan_amounts(size, seed=0):
+    return np.round(np.random.default_rng(seed).lognormal(10, 1.5, size), -2)
+
+
+def test_merged_sketch_equals_sketch_of_all_values():
+    first, second = loan_amounts(1_000, seed=1), loan_amounts(2_500, seed=2)
+    merged = QuantileSketch.from_values(first).merge(QuantileSketch.from_values(second))
+    expected = QuantileSketch.from_values(np.concatenate([first, second]))
+    np.testing.assert_array_equal(merged.buckets, expected.buckets)
+    np.testing.assert_array_equal(merged.counts, expected.counts)
+    assert merged.count == 3_500
+
+
+def test_quantiles_are_within_the_relative_accuracy():
+    values = loan_amounts(5_000)
+    sketch = QuantileSketch.from_values(values)
+    # Pandas' rank q * (n - 1) rounded down to a value: the sketch reports its bucket
+    expected = np.quantile(values, QS, method='lower')
+    np.testing.assert_allclose(sketch.quantiles(QS), expected, rtol=RELATIVE_ACCURACY * (1 + 1e-9))
+    assert abs(sketch.mean() - values.mean()) <= RELATIVE_ACCURACY * values.mean()
+
+
+def test_zero_negative_and_missing_values():
+    values = np.array([0.0, -5.0, np.nan, 100.0, 200.0])
+    np.testing.assert_array_equal(bucket_index(values[:2]), [ZERO_BUCKET, ZERO_BUCKET])
+    sketch = QuantileSketch.from_values(values)
+    assert sketch.count == 4
+    assert sketch.quantile(0) == 0.0
+    assert sketch.quantile(1 / 3) == 0.0
+    np.testing.assert_allclose(sketch.quantile(1), 200.0, rtol=RELATIVE_ACCURACY)
+    np.testing.assert_array_equal(sketch.histogram([0, 50, 250]), [2, 2])
+
+
+def test_empty_sketch():
+    sketch = QuantileSketch.from_values([np.nan])
+    assert sketch.count == 0
+    assert np.isnan(sketch.quantiles(QS)).all()
+    assert np.isnan(sketch.mean())
@@ -0,0 +1,23 @@
+import numpy as np
+import pandas as pd
+
+from utils.snapshots import read_snapshot, write_snapshot
+
+
+def test_snapshot_round_trip(tmp_path):
+    frame = pd.DataFrame({
+        'HouseholdID': np.arange(10001, 10006),
+        'loan_amount': [1500.0, np.nan, 0.0, np.nan, 250.5],
+        'State': ['Lagos', 'Kano', None, 'Oyo', 'Kano'],
+        # Labels mapped from codes leave NaN, not None, for unknown codes
+        'Region': pd.Series([1, 2, 7, 3, 7]).map({1: 'North Central', 2: 'North East', 3: 'North West'}),
+        'has_loans': [True, False, True, False, True],
+    })
+    path = tmp_path / 'nested' / 'features-abc.arrow'
+    write_snapshot(frame, path)
+    restored = read_snapshot(path)
+
+    pd.testing.assert_frame_equal(restored, frame)
+    assert restored['State'][2] is None
+    assert isinstance(restored['Region'][2], float) and np.isnan(restored['Region'][2])
+    assert list(tmp_path.joinpath('nested').iterdir()) == [path]
@@ -1 +1 @@
-from .functions import get_duckdb_connection, load_css, add_bg_with_overlay, save_user_to_db, render_welcome_screen, set_naijayield_theme
\ No newline at end of file
+from .functions import get_duckdb_connection, open_duckdb_connection, is_admin_user, load_css, add_bg_with_overlay, save_user_to_db, render_welcome_screen, set_naijayield_theme
\ No newline at end of file
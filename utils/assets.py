@@ -0,0 +1,143 @@
+import hashlib
+import os
+import re
+import shutil
+from pathlib import Path
+
+from .telemetry import cache_resource
+
+# Static assets. CSS is minified once per process and inlined (Streamlit serves
+# static files other than images as text/plain, which browsers refuse as a
+# stylesheet). The background image is resized and recompressed once into
+# static/build/ and served by Streamlit's static file serving
+# (server.enableStaticServing); URLs carry ?v=<content hash>, for which Tornado
+# sends a ten-year Cache-Control, so browsers only download a new version.
+STATIC_DIR = Path(__file__).parent.parent.resolve() / "static"
+BUILD_DIR = STATIC_DIR / "build"
+STATIC_URL = "app/static"
+BACKGROUND_IMAGE = STATIC_DIR / "images" / "Agriculture_background.jpg"
+BACKGROUND_WIDTHS = (480, 960, 1600)  # capped at the width of the source image
+WEBP_QUALITY = 72
+JPEG_QUALITY = 78
+
+
+_CSS_STRING = re.compile(r"""("(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*')""")
+
+
+def _minify_css_code(css):
+    css = re.sub(r"\s+", " ", css)
+    css = re.sub(r"\s*([{};:,>])\s*", r"\1", css)
+    return css.replace(";}", "}")
+
+
+def minify_css(css):
+    """Drop comments and insignificant whitespace from a stylesheet, leaving quoted strings alone"""
+    css = re.sub(r"/\*.*?\*/", "", css, flags=re.S)
+    # re.split with a capturing group alternates code and string pieces
+    pieces = _CSS_STRING.split(css)
+    return "".join(piece if index % 2 else _minify_css_code(piece) for index, piece in enumerate(pieces)).strip()
+
+
+@cache_resource(show_spinner=False)
+def _minified_css_file(css_file, mtime):
+    with open(css_file, 'r') as f:
+        return minify_css(f.read())
+
+
+def minified_css(css_file):
+    """Minified contents of a CSS file, read once per process (again only if the file changes)"""
+    return _minified_css_file(str(css_file), os.stat(css_file).st_mtime_ns)
+
+
+def content_hash(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha1(f.read()).hexdigest()[:10]
+
+
+def static_url(path):
+    """URL of a file under static/, versioned by its content so it can be cached for good"""
+    relative = Path(path).resolve().relative_to(STATIC_DIR).as_posix()
+    return f"{STATIC_URL}/{relative}?v={content_hash(path)}"
+
+
+def _save_atomically(image, path, **options):
+    tmp_path = path.with_name(f"{path.stem}.{os.getpid()}.tmp{path.suffix}")
+    image.save(tmp_path, **options)
+    os.replace(tmp_path, path)
+
+
+def _built_variants(prefix):
+    webp_paths = sorted(BUILD_DIR.glob(f"{prefix}-*w.webp"), key=lambda path: int(path.stem.rsplit("-", 1)[1][:-1]))
+    return [(int(path.stem.rsplit("-", 1)[1][:-1]), path, path.with_suffix(".jpg"))
+            for path in webp_paths if path.with_suffix(".jpg").exists()]
+
+
+def build_responsive_images(source, widths=BACKGROUND_WIDTHS):
+    """Resized WebP and progressive JPEG copies of ``source`` in static/build/
+
+    Returns (width, webp_path, jpeg_path) tuples, smallest first. Files are named
+    after a hash of the source and the build settings, so they are built once
+    per version; later processes only look them up.
+    """
+    with open(source, 'rb') as f:
+        settings = repr((widths, WEBP_QUALITY, JPEG_QUALITY)).encode()
+        version = hashlib.sha1(f.read() + settings).hexdigest()[:10]
+    prefix = f"{Path(source).stem}-{version}"
+    variants = _built_variants(prefix)
+    if variants:
+        return variants
+
+    from PIL import Image
+
+    BUILD_DIR.mkdir(parents=True, exist_ok=True)
+    with Image.open(source) as image:
+        image = image.convert("RGB")
+        for width in sorted({min(width, image.width) for width in widths}):
+            stem = BUILD_DIR / f"{prefix}-{width}w"
+            resized = image.resize((width, round(image.height * width / image.width)), Image.LANCZOS)
+            jpeg_path = stem.with_suffix(".jpg")
+            _save_atomically(resized, jpeg_path, format="JPEG", quality=JPEG_QUALITY, optimize=True,
+                             progressive=True)
+            if width == image.width and jpeg_path.stat().st_size > Path(source).stat().st_size:
+                # Recompressing an already small JPEG at full size only makes it bigger
+                tmp_path = jpeg_path.with_name(f"{jpeg_path.stem}.{os.getpid()}.tmp.jpg")
+                shutil.copyfile(source, tmp_path)
+                os.replace(tmp_path, jpeg_path)
+            # The WebP goes last: _built_variants treats a version as built once its .webp files exist
+            _save_atomically(resized, stem.with_suffix(".webp"), format="WEBP", quality=WEBP_QUALITY, method=6)
+    for old in BUILD_DIR.glob(f"{Path(source).stem}-*"):
+        if not old.name.startswith(prefix):
+            old.unlink(missing_ok=True)
+    return _built_variants(prefix)
+
+
+@cache_resource(show_spinner=False)
+def background_variants():
+    """(width, webp URL, jpeg URL) for the background image, smallest first
+
+    Falls back to the original JPEG when the variants cannot be built (e.g. a read-only checkout).
+    """
+    try:
+        return [(width, static_url(webp_path), static_url(jpeg_path))
+                for width, webp_path, jpeg_path in build_responsive_images(BACKGROUND_IMAGE)]
+    except (OSError, ImportError):
+        return [(None, None, static_url(BACKGROUND_IMAGE))]
+
+
+def background_css(selector, overlay=None):
+    """background-image rules for ``selector`` that pick the background variant for the viewport width"""
+    layers = f"{overlay}, " if overlay else ""
+    rules = []
+    previous_width = None
+    for width, webp_url, jpeg_url in background_variants():
+        # Browsers without image-set() type() keep the plain JPEG declaration
+        declarations = f"background-image:{layers}url('{jpeg_url}');"
+        if webp_url:
+            declarations += (f"background-image:{layers}image-set(url('{webp_url}') type('image/webp'),"
+                             f"url('{jpeg_url}') type('image/jpeg'));")
+        rule = f"{selector}{{{declarations}}}"
+        if previous_width:
+            rule = f"@media (min-width:{previous_width + 1}px){{{rule}}}"
+        rules.append(rule)
+        previous_width = width
+    return "".join(rules)
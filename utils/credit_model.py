@@ -0,0 +1,258 @@
+import json
+import os
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from .telemetry import cache_resource
+from .features import inclusion_rates, INCLUSION_RATES
+from .inclusion import SERVICES, service_flags, popcount
+from .mappings import zone_dict, sector_dict
+
+# Logistic regression credit model trained by scripts.train_credit_model on the
+# outcomes in the survey: whether each loan in credit_history_loan_2 was fully
+# repaid, and whether a household that applied was rejected. Predictors are
+# household feature rows (utils.features) only, never the outcomes being
+# predicted, so any household can be scored, with or without a loan history.
+# The artifact is a small JSON file (models/credit_model-v<MODEL_VERSION>.json,
+# NAIJAYIELD_MODEL_PATH to override) loaded once per process.
+DEFAULT_MODEL_DIR = Path(__file__).parent.parent.resolve() / "models"
+# Bump when the predictors change: artifacts of other versions are ignored
+MODEL_VERSION = 1
+L2_PENALTY = 1.0
+HOLDOUT_SHARE = 0.2
+SPLIT_SEED = 20240501
+# Predicted outcome -> description
+TARGETS = {
+    'repaid': "Loan fully repaid",
+    'rejected': "Loan application rejected",
+}
+COUNT_PREDICTORS = ['member_count', 'plot_count', 'crop_count']
+AMOUNT_PREDICTORS = ['salary_income', 'harvest_value', 'crop_sales_value']  # naira, log-scaled
+
+LOANS_QUERY = """
+SELECT HouseholdID, IsFullyRepaid = 1 AS repaid
+FROM credit_history_loan_2
+WHERE IsFullyRepaid IN (1, 2)
+"""
+
+
+def model_path():
+    """Artifact of the current MODEL_VERSION"""
+    setting = os.getenv("NAIJAYIELD_MODEL_PATH")
+    return Path(setting) if setting else DEFAULT_MODEL_DIR / f"credit_model-v{MODEL_VERSION}.json"
+
+
+def model_matrix(features):
+    """Predictor matrix (float64, one row per feature row) and its column names"""
+    rates = inclusion_rates(features, list(INCLUSION_RATES)) / 100
+    members = features['member_count'].where(features['member_count'] > 0)
+    predictors = pd.DataFrame({
+        **service_flags(features['services_mask']).astype(float).add_prefix('uses_'),
+        **rates.fillna(0).add_suffix('_rate'),
+        'services_used': popcount(features['services_mask']).astype(float),
+        'no_savings_answers': (features['respondents'] == 0).astype(float),
+        **{column: np.log1p(features[column].astype(float)) for column in COUNT_PREDICTORS + AMOUNT_PREDICTORS},
+        'working_share': (features['working_members'] / members).fillna(0),
+        # Fixed categories, so every matrix has the columns the model was trained with
+        **{f"zone_{code}": (features['Region'] == code).astype(float) for code in zone_dict},
+        **{f"sector_{code}": (features['UrbanRuralSector'] == code).astype(float) for code in sector_dict},
+    }, index=features.index)
+    return predictors.to_numpy(dtype=np.float64), list(predictors.columns)
+
+
+def training_targets(conn, features):
+    """Row positions in ``features`` and 0/1 outcomes of each target's training examples
+
+    ``repaid`` has one example per loan and ``rejected`` one per household that
+    borrowed or applied for a loan.
+    """
+    loans = conn.execute(LOANS_QUERY).fetch_df()
+    positions = pd.Index(features['HouseholdID']).get_indexer(loans['HouseholdID'])
+    known = positions >= 0
+    applied = np.flatnonzero(features['borrowed_or_applied'].to_numpy(dtype=bool))
+    return {
+        'repaid': (positions[known], loans['repaid'].to_numpy(dtype=float)[known]),
+        'rejected': (applied, features['application_rejected'].to_numpy(dtype=float)[applied]),
+    }
+
+
+def holdout_mask(household_ids, share=HOLDOUT_SHARE, seed=SPLIT_SEED):
+    """True for the households set aside for evaluation (a fixed random share, by household)"""
+    unique_ids = np.unique(household_ids)
+    rng = np.random.default_rng(seed)
+    held_out = unique_ids[rng.random(len(unique_ids)) < share]
+    return np.isin(household_ids, held_out)
+
+
+def fit_logistic(x, y, l2=L2_PENALTY, iterations=25, tolerance=1e-8):
+    """L2-regularized logistic regression by Newton's method on standardized ``x``
+
+    Returns (intercept, coefficients); the intercept is not penalized.
+    """
+    design = np.column_stack([np.ones(len(x)), x])
+    penalty = np.full(design.shape[1], float(l2))
+    penalty[0] = 0
+    weights = np.zeros(design.shape[1])
+    for _ in range(iterations):
+        probability = 1 / (1 + np.exp(-(design @ weights)))
+        gradient = design.T @ (probability - y) + penalty * weights
+        hessian = (design.T * (probability * (1 - probability))) @ design + np.diag(penalty)
+        step = np.linalg.solve(hessian, gradient)
+        weights -= step
+        if np.abs(step).max() < tolerance:
+            break
+    return weights[0], weights[1:]
+
+
+def auc(y, scores):
+    """Area under the ROC curve (Mann-Whitney, ties count half)"""
+    y = np.asarray(y, dtype=bool)
+    positives, negatives = y.sum(), (~y).sum()
+    if positives == 0 or negatives == 0:
+        return float('nan')
+    ranks = pd.Series(scores).rank().to_numpy()
+    return float((ranks[y].sum() - positives * (positives + 1) / 2) / (positives * negatives))
+
+
+def evaluate(y, probability):
+    """Held-out metrics of predicted probabilities against 0/1 outcomes"""
+    clipped = np.clip(probability, 1e-12, 1 - 1e-12)
+    return {
+        'rows': int(len(y)),
+        'base_rate': float(np.mean(y)),
+        'auc': auc(y, probability),
+        'log_loss': float(-np.mean(y * np.log(clipped) + (1 - y) * np.log(1 - clipped))),
+        'brier': float(np.mean((probability - y) ** 2)),
+        'accuracy': float(np.mean((probability >= 0.5) == y)),
+    }
+
+
+class CreditModel:
+    """Logistic regression per target over the model_matrix() predictors"""
+
+    def __init__(self, predictors, center, scale, targets, trained_at=None, data_version=None):
+        self.predictors = list(predictors)
+        self.center = np.asarray(center, dtype=float)
+        self.scale = np.asarray(scale, dtype=float)
+        # target -> {'intercept', 'coefficients', 'metrics'}
+        self.targets = {name: {**target, 'coefficients': np.asarray(target['coefficients'], dtype=float)}
+                        for name, target in targets.items()}
+        self.trained_at = trained_at
+        self.data_version = data_version
+
+    def predict(self, features):
+        """Probability of each target per feature row, in one matrix product"""
+        x, predictors = model_matrix(features)
+        if predictors != self.predictors:
+            raise ValueError("feature rows do not match the model's predictors; retrain the model")
+        x = (x - self.center) / self.scale
+        names = list(self.targets)
+        weights = np.column_stack([self.targets[name]['coefficients'] for name in names])
+        intercepts = np.array([self.targets[name]['intercept'] for name in names])
+        return pd.DataFrame(1 / (1 + np.exp(-(x @ weights + intercepts))), columns=names, index=features.index)
+
+    def odds_ratios(self, target):
+        """Change in the odds of ``target`` per standard deviation of each predictor"""
+        return pd.Series(np.exp(self.targets[target]['coefficients']), index=self.predictors)
+
+    def to_artifact(self):
+        return {
+            'model_version': MODEL_VERSION,
+            'trained_at': self.trained_at,
+            'data_version': self.data_version,
+            'predictors': self.predictors,
+            'center': self.center.tolist(),
+            'scale': self.scale.tolist(),
+            'targets': {name: {**target, 'coefficients': target['coefficients'].tolist()}
+                        for name, target in self.targets.items()},
+        }
+
+    @classmethod
+    def from_artifact(cls, artifact):
+        return cls(artifact['predictors'], artifact['center'], artifact['scale'], artifact['targets'],
+                   artifact.get('trained_at'), artifact.get('data_version'))
+
+
+def train_credit_model(conn, features, l2=L2_PENALTY, holdout=HOLDOUT_SHARE, data_version=None):
+    """Fit every target on the training households and report metrics on the held-out ones"""
+    x, predictors = model_matrix(features)
+    center = x.mean(axis=0)
+    scale = x.std(axis=0)
+    scale[scale == 0] = 1
+    x = (x - center) / scale
+    household_ids = features['HouseholdID'].to_numpy()
+
+    targets = {}
+    for name, (positions, y) in training_targets(conn, features).items():
+        held_out = holdout_mask(household_ids[positions], holdout)
+        intercept, coefficients = fit_logistic(x[positions[~held_out]], y[~held_out], l2)
+        probability = 1 / (1 + np.exp(-(x[positions[held_out]] @ coefficients + intercept)))
+        targets[name] = {
+            'intercept': float(intercept),
+            'coefficients': coefficients,
+            'metrics': {**evaluate(y[held_out], probability), 'training_rows': int((~held_out).sum())},
+        }
+    trained_at = datetime.now(timezone.utc).isoformat(timespec="seconds")
+    return CreditModel(predictors, center, scale, targets, trained_at, data_version)
+
+
+def scoring_throughput(model, features, repeats=5):
+    """Households scored per second by CreditModel.predict() over ``features``"""
+    started = time.perf_counter()
+    for _ in range(repeats):
+        model.predict(features)
+    return len(features) * repeats / (time.perf_counter() - started)
+
+
+def save_credit_model(model, path=None):
+    """Write the model artifact atomically; returns its path"""
+    path = Path(path) if path else model_path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    tmp_path.write_text(json.dumps(model.to_artifact(), indent=2))
+    os.replace(tmp_path, path)
+    return path
+
+
+def read_credit_model(path=None):
+    """The trained model, or None when no artifact of the current MODEL_VERSION exists"""
+    path = Path(path) if path else model_path()
+    try:
+        artifact = json.loads(path.read_text())
+    except (OSError, ValueError):
+        return None
+    if artifact.get('model_version') != MODEL_VERSION:
+        return None
+    return CreditModel.from_artifact(artifact)
+
+
+@cache_resource(show_spinner=False)
+def load_credit_model():
+    """read_credit_model(), once per process"""
+    return read_credit_model()
+
+
+def repayment_by_service(features, codes=SERVICES):
+    """Share of loans fully repaid by borrowing households with and without each service
+
+    Rows are the services of ``codes`` plus 'Multiple services' (two or more used).
+    """
+    borrowers = features[features['loan_count'] > 0]
+    flags = service_flags(borrowers['services_mask'], codes)
+    flags['Multiple services'] = popcount(borrowers['services_mask']) >= 2
+    rows = {}
+    for name, uses in flags.items():
+        with_service, without = borrowers[uses.to_numpy()], borrowers[~uses.to_numpy()]
+        rows[name] = {
+            'with': with_service['repaid_loans'].sum() / with_service['loan_count'].sum() * 100
+            if len(with_service) else np.nan,
+            'without': without['repaid_loans'].sum() / without['loan_count'].sum() * 100
+            if len(without) else np.nan,
+            'borrowers_with': len(with_service),
+        }
+    rates = pd.DataFrame.from_dict(rows, orient='index')
+    rates['relative_difference'] = (rates['with'] / rates['without'] - 1) * 100
+    return rates
@@ -0,0 +1,111 @@
+from .functions import get_duckdb_connection
+from .shared import shared_frame
+from .snapshots import snapshot, stamp_tables
+from .mappings import zone_dict, sector_dict, loan_denial_reasons, loan_purpose_reasons, loan_non_application_reasons
+
+# Materialized by the ETL notebook; the Dashboard reads this instead of the row-level view
+CUBE_TABLE = "credit_rollup_cube"
+
+CUBE_DIMENSIONS = [
+    "Region",
+    "UrbanRuralSector",
+    "LoanPurpose",
+    "PrimaryRejectionReason",
+    "PrimaryReasonNoBorrowing",
+    "Borrowed_Or_appliedLoan",
+    "LoanApplicationRejected",
+    "NeededLoan",
+    "LoanSufficient",
+    "IsFullyRepaid",
+]
+
+# One row per combination of dimension values. row_count keeps the row semantics
+# of combined_credit_LoanHistory_vw (a household repeats once per loan), and the
+# ratio measures only cover repayment ratios in the [0, 2] range the Dashboard plots.
+# {loan_filter} lets callers push a WHERE clause on the view down into the rollup
+CUBE_QUERY_TEMPLATE = """
+WITH household_location AS (
+    SELECT HouseHoldID,
+           any_value(Region) AS Region,
+           any_value(UrbanRuralSector) AS UrbanRuralSector
+    FROM Individual_level_data
+    GROUP BY HouseHoldID
+),
+loans AS (
+    SELECT
+        c.HouseHoldID,
+        c.LoanPurpose,
+        c.PrimaryRejectionReason,
+        c.PrimaryReasonNoBorrowing,
+        c.Borrowed_Or_appliedLoan,
+        c.LoanApplicationRejected,
+        c.NeededLoan,
+        TRY_CAST(c.LoanSufficient AS DOUBLE) AS LoanSufficient,
+        TRY_CAST(c.IsFullyRepaid AS DOUBLE) AS IsFullyRepaid,
+        TRY_CAST(c.LoanAmount AS DOUBLE) AS LoanAmount,
+        TRY_CAST(c.TotalAmountPaid AS DOUBLE) AS TotalAmountPaid,
+        TRY_CAST(c.TotalAmountPaid AS DOUBLE) / NULLIF(TRY_CAST(c.LoanAmount AS DOUBLE), 0) AS RepaymentRatio
+    FROM combined_credit_LoanHistory_vw c
+    {loan_filter}
+)
+SELECT
+    hl.Region,
+    hl.UrbanRuralSector,
+    l.LoanPurpose,
+    l.PrimaryRejectionReason,
+    l.PrimaryReasonNoBorrowing,
+    l.Borrowed_Or_appliedLoan,
+    l.LoanApplicationRejected,
+    l.NeededLoan,
+    l.LoanSufficient,
+    l.IsFullyRepaid,
+    count(*) AS row_count,
+    count(l.LoanAmount) AS loan_count,
+    sum(l.LoanAmount) AS loan_amount_sum,
+    min(l.LoanAmount) AS loan_amount_min,
+    max(l.LoanAmount) AS loan_amount_max,
+    sum(l.TotalAmountPaid) AS amount_paid_sum,
+    count(l.RepaymentRatio) FILTER (WHERE l.RepaymentRatio BETWEEN 0 AND 2) AS ratio_count,
+    sum(l.RepaymentRatio) FILTER (WHERE l.RepaymentRatio BETWEEN 0 AND 2) AS ratio_sum
+FROM loans l
+LEFT JOIN household_location hl ON l.HouseHoldID = hl.HouseHoldID
+GROUP BY ALL
+"""
+
+CUBE_QUERY = CUBE_QUERY_TEMPLATE.format(loan_filter="")
+
+
+def build_credit_cube(conn):
+    """Materialize the Dashboard rollup cube (run from the ETL notebook)"""
+    conn.execute(f"CREATE OR REPLACE TABLE {CUBE_TABLE} AS {CUBE_QUERY}")
+    conn.execute(f"COMMENT ON TABLE {CUBE_TABLE} IS 'Dashboard rollup of combined_credit_LoanHistory_vw'")
+    stamp_tables(conn, CUBE_TABLE)
+    return conn.execute(f"SELECT count(*) FROM {CUBE_TABLE}").fetchone()[0]
+
+
+def label_cube(cube):
+    """Replace survey codes with the labels shown on the Dashboard"""
+    cube = cube.copy()
+    cube['Region'] = cube['Region'].map(zone_dict)
+    cube['UrbanRuralSector'] = cube['UrbanRuralSector'].map(sector_dict)
+    cube['PrimaryRejectionReason'] = cube['PrimaryRejectionReason'].map(loan_denial_reasons)
+    cube['PrimaryReasonNoBorrowing'] = cube['PrimaryReasonNoBorrowing'].map(loan_non_application_reasons)
+    cube['LoanPurpose'] = cube['LoanPurpose'].map(loan_purpose_reasons)
+    return cube
+
+
+@shared_frame
+@snapshot(CUBE_TABLE, "combined_credit_LoanHistory_vw", "Individual_level_data")
+def load_credit_cube():
+    conn = get_duckdb_connection()
+    try:
+        cube = conn.execute(f"select * from {CUBE_TABLE}").fetch_df()
+    except Exception:
+        # Cube not materialized yet: aggregate on the database side instead
+        cube = conn.execute(CUBE_QUERY).fetch_df()
+    return label_cube(cube)
+
+
+def cube_counts(cube, by, measure='row_count'):
+    """Sum a cube measure per value of ``by``, dropping missing values"""
+    return cube.groupby(by)[measure].sum()
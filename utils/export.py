@@ -0,0 +1,143 @@
+import tempfile
+import pyarrow as pa
+from .features import FEATURE_TABLE, FEATURES_QUERY, score_features
+from .filters import loan_filter, household_filter
+from .querylog import QueryLoggingConnection
+
+# Data exports for the Dashboard and the export service. Rows stream from DuckDB
+# as Arrow record batches of EXPORT_CHUNK_ROWS and are written to the output as
+# they arrive (one CSV block or Parquet row group per batch), so memory stays
+# bounded by one batch whatever the export size. Each export query runs on its
+# own cursor, so a long export does not hold up the queries of other sessions,
+# and is written to the query log like the page queries.
+EXPORT_CHUNK_ROWS = 50_000
+# Streamlit keeps a page download in memory for the session (a few MB at this
+# size): larger exports stream from the scoring service's /export instead
+MAX_DOWNLOAD_ROWS = 20_000
+EXPORTS = {
+    'credit': "Filtered credit data",
+    'households': "Household profiles",
+    'scores': "Credit scores",
+}
+EXPORT_FORMATS = {'csv': "text/csv", 'parquet': "application/vnd.apache.parquet"}
+
+CREDIT_QUERY_TEMPLATE = "SELECT c.* FROM combined_credit_LoanHistory_vw c {where}"
+# household_features, or the same rows computed on the fly until it is built
+HOUSEHOLDS_QUERY_TEMPLATE = "SELECT * EXCLUDE (feature_version, built_at) FROM {source} {where} ORDER BY HouseholdID"
+
+
+def export_query(dataset, purposes=(), zones=(), sectors=(), amount_range=None, source=FEATURE_TABLE):
+    """SQL and parameters of an export for the Dashboard filters
+
+    Every filter applies to the credit data; households and scores only take the
+    zone and sector filters.
+    """
+    if dataset == 'credit':
+        where, params = loan_filter(purposes, zones, sectors, amount_range)
+        return CREDIT_QUERY_TEMPLATE.format(where=where), params
+    if dataset in ('households', 'scores'):
+        return HOUSEHOLDS_QUERY_TEMPLATE.format(source=source, where=household_filter(zones, sectors)), []
+    raise ValueError(f"unknown export {dataset!r}; expected one of {', '.join(EXPORTS)}")
+
+
+def _logged(conn):
+    """``conn`` with each query logged, on a cursor of its own (see QueryLoggingConnection)"""
+    return conn if isinstance(conn, QueryLoggingConnection) else QueryLoggingConnection(conn)
+
+
+def _execute(conn, dataset, filters, count=False):
+    query, params = export_query(dataset, **filters)
+    try:
+        return _logged(conn).execute(f"SELECT count(*) FROM ({query})" if count else query, params)
+    except Exception:
+        if dataset == 'credit':
+            raise
+        # Feature table not materialized yet: compute the household rows on the fly
+        query, params = export_query(dataset, **filters, source=f"({FEATURES_QUERY})")
+        return _logged(conn).execute(f"SELECT count(*) FROM ({query})" if count else query, params)
+
+
+def _scored(batch, model=None):
+    """Credit scores (and the trained model's repayment probability) of a batch of feature rows"""
+    features = batch.to_pandas()
+    scores = score_features(features)
+    if model is not None:
+        scores['repayment_probability'] = model.predict(features)['repaid'].to_numpy()
+    return pa.RecordBatch.from_pandas(scores, preserve_index=False)
+
+
+def export_batches(conn, dataset, filters=None, model=None, chunk_rows=EXPORT_CHUNK_ROWS):
+    """Record batches of an export, streamed from ``conn`` on a cursor of its own"""
+    reader = _execute(conn, dataset, filters or {}).fetch_record_batch(chunk_rows)
+    # Closed when the export stops early too (e.g. a dropped download): that logs the query and closes its cursor
+    batches = iter(reader)
+    try:
+        empty = True
+        for batch in batches:
+            empty = False
+            yield _scored(batch, model) if dataset == 'scores' else batch
+        if empty:
+            # No matching rows: one empty batch, so the file still gets its header or schema
+            batch = pa.RecordBatch.from_pylist([], schema=reader.schema)
+            yield _scored(batch, model) if dataset == 'scores' else batch
+    finally:
+        batches.close()
+
+
+def count_export(conn, dataset, filters=None):
+    """Number of rows an export would write"""
+    return _execute(conn, dataset, filters or {}, count=True).fetchone()[0]
+
+
+class ExportWriter:
+    """Writes record batches to a binary file object as CSV or Parquet (one row group per batch)
+
+    The file object only needs ``write``: Parquet is written front to back, so
+    the output can be a socket or an HTTP response.
+    """
+
+    def __init__(self, sink, export_format):
+        if export_format not in EXPORT_FORMATS:
+            raise ValueError(f"unknown format {export_format!r}; expected one of {', '.join(EXPORT_FORMATS)}")
+        self.sink = sink
+        self.format = export_format
+        self._writer = None
+        self.schema = None  # of the first batch; later batches are cast to it
+        self.rows = 0
+
+    def write(self, batch):
+        if self._writer is None:
+            self.schema = batch.schema
+            if self.format == 'parquet':
+                import pyarrow.parquet as pq
+                self._writer = pq.ParquetWriter(self.sink, batch.schema)
+            else:
+                import pyarrow.csv as pcsv
+                self._writer = pcsv.CSVWriter(self.sink, batch.schema)
+        elif batch.schema != self.schema:
+            batch = batch.cast(self.schema)  # e.g. a scores batch whose optional column is all missing
+        self._writer.write_batch(batch)
+        self.rows += batch.num_rows
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+
+
+def write_export(sink, conn, dataset, export_format, filters=None, model=None, chunk_rows=EXPORT_CHUNK_ROWS):
+    """Stream an export into ``sink``; returns the number of rows written"""
+    writer = ExportWriter(sink, export_format)
+    try:
+        for batch in export_batches(conn, dataset, filters, model, chunk_rows):
+            writer.write(batch)
+    finally:
+        writer.close()
+    return writer.rows
+
+
+def export_file(conn, dataset, export_format, filters=None, model=None):
+    """An export in a temporary file (on disk beyond a few MB), rewound for reading"""
+    output = tempfile.SpooledTemporaryFile(max_size=8 * 2**20)
+    write_export(output, conn, dataset, export_format, filters, model)
+    output.seek(0)
+    return output
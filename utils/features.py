@@ -0,0 +1,237 @@
+import hashlib
+
+import pandas as pd
+from .functions import get_duckdb_connection
+from .shared import shared_frame
+from .snapshots import snapshot, stamp_tables, table_versions
+from .scoring import INCLUSION_SERVICES, PRODUCTIVE_PURPOSES, scores_from_counts
+from .inclusion import mask_sql
+
+# Materialized by the ETL notebook: one row per household with the loan, savings,
+# income and crop features the pages and the scoring scripts use. Keys are
+# normalized to HouseholdID and survey yes/no codes (1 = yes, 2 = no) are decoded,
+# so consumers read one narrow row instead of joining and decoding on the fly.
+FEATURE_TABLE = "household_features"
+# Bump when a feature definition changes: the next build rebuilds the whole table
+FEATURES_VERSION = 2
+SOURCE_TABLES = [
+    "credit_history_loan_1",
+    "credit_history_loan_2",
+    "credit_history_loan_3",
+    "savings_and_insurance_data",
+    "Individual_level_data",
+    "crop_harvest_1",
+    "crop_harvest_2",
+]
+# Share of a household's respondents using each service: 2 - mean() of the yes/no code
+INCLUSION_RATES = {
+    'HasBankAccount': 'bank_account_rate',
+    'UsedCooperative': 'cooperative_rate',
+    'UsedInformalSavingsGroups': 'informal_savings_rate',
+    'HasInsurance': 'insurance_rate',
+    'HasProxyBankingAccess': 'proxy_banking_rate',
+}
+AGRICULTURAL_PURPOSES = [2, 3]  # Agricultural input codes
+# Registered with the household IDs to recompute during an incremental build
+REFRESH_IDS = "feature_refresh_ids"
+
+# Households are those the Individual Analytics page lists: everyone in the
+# credit history (the base of combined_credit_LoanHistory_vw) or in the savings
+# data. {households} restricts every source to the households being built
+# (DuckDB matches HouseHoldID and HouseholdID case-insensitively)
+FEATURES_QUERY_TEMPLATE = """
+WITH households AS (
+    SELECT HouseHoldID AS HouseholdID FROM credit_history_loan_1 WHERE {households}
+    UNION
+    SELECT HouseHoldID FROM savings_and_insurance_data WHERE {households}
+),
+members AS (
+    SELECT
+        HouseHoldID AS HouseholdID,
+        any_value(Region) AS Region,
+        any_value(State) AS State,
+        any_value(LocalGovernmentArea) AS LocalGovernmentArea,
+        any_value(UrbanRuralSector) AS UrbanRuralSector,
+        count(*) AS member_count,
+        count(*) FILTER (WHERE WorkLast7days = 1) AS working_members,
+        sum(LastSalary) AS salary_income
+    FROM Individual_level_data
+    WHERE {households}
+    GROUP BY ALL
+),
+credit_status AS (
+    SELECT
+        l1.HouseHoldID AS HouseholdID,
+        any_value(l1.Borrowed_Or_appliedLoan = 1) AS borrowed_or_applied,
+        any_value(l3.LoanApplicationRejected = 1) AS application_rejected,
+        any_value(l3.NeededLoan = 1) AS needed_loan,
+        any_value(l3.PrimaryRejectionReason) AS PrimaryRejectionReason,
+        any_value(l3.PrimaryReasonNoBorrowing) AS PrimaryReasonNoBorrowing
+    FROM (SELECT * FROM credit_history_loan_1 WHERE {households}) l1
+    LEFT JOIN (SELECT * FROM credit_history_loan_3 WHERE {households}) l3 ON l1.HouseHoldID = l3.HouseholdID
+    GROUP BY ALL
+),
+loans AS (
+    SELECT
+        HouseholdID,
+        count(*) AS loan_count,
+        count(DISTINCT LoanID) AS distinct_loans,
+        count(*) FILTER (WHERE IsFullyRepaid = 1) AS repaid_loans,
+        count(*) FILTER (WHERE LoanPurpose IN ({productive})) AS productive_loans,
+        count(*) FILTER (WHERE LoanPurpose IN ({agricultural})) AS agricultural_loans,
+        2 - avg(IsFullyRepaid) AS repayment_rate,
+        sum(LoanAmount) AS loan_amount_total,
+        sum(TotalAmountPaid) AS amount_paid_total
+    FROM credit_history_loan_2
+    WHERE {households}
+    GROUP BY ALL
+),
+inclusion AS (
+    SELECT
+        HouseHoldID AS HouseholdID,
+        count(*) AS respondents,
+        {inclusion_rates},
+        -- utils.inclusion bitmasks: services any respondent uses, and those of the first one listed
+        bit_or({services}) AS services_mask,
+        arg_min({services}, rowid) AS first_respondent_services
+    FROM savings_and_insurance_data
+    WHERE {households}
+    GROUP BY ALL
+),
+harvest AS (
+    SELECT HouseholdID, count(DISTINCT PlotID) AS plot_count, count(DISTINCT CropCode) AS crop_count,
+           sum(HarvestValue) AS harvest_value
+    FROM crop_harvest_1
+    WHERE {households}
+    GROUP BY ALL
+),
+sales AS (
+    SELECT HouseholdID, sum(SalesValue) AS crop_sales_value, sum(ProcessedSalesValue) AS processed_sales_value
+    FROM crop_harvest_2
+    WHERE {households}
+    GROUP BY ALL
+)
+SELECT
+    h.HouseholdID,
+    m.Region,
+    m.State,
+    m.LocalGovernmentArea,
+    m.UrbanRuralSector,
+    coalesce(m.member_count, 0) AS member_count,
+    coalesce(m.working_members, 0) AS working_members,
+    coalesce(m.salary_income, 0) AS salary_income,
+    coalesce(c.borrowed_or_applied, false) AS borrowed_or_applied,
+    coalesce(c.application_rejected, false) AS application_rejected,
+    coalesce(c.needed_loan, false) AS needed_loan,
+    c.PrimaryRejectionReason,
+    c.PrimaryReasonNoBorrowing,
+    coalesce(l.loan_count, 0) AS loan_count,
+    coalesce(l.distinct_loans, 0) AS distinct_loans,
+    coalesce(l.repaid_loans, 0) AS repaid_loans,
+    coalesce(l.productive_loans, 0) AS productive_loans,
+    coalesce(l.agricultural_loans, 0) AS agricultural_loans,
+    l.repayment_rate,
+    coalesce(l.loan_amount_total, 0) AS loan_amount_total,
+    coalesce(l.amount_paid_total, 0) AS amount_paid_total,
+    coalesce(i.respondents, 0) AS respondents,
+    {inclusion_columns},
+    coalesce(i.services_mask, 0)::UTINYINT AS services_mask,
+    coalesce(i.first_respondent_services, 0)::UTINYINT AS first_respondent_services,
+    coalesce(hv.plot_count, 0) AS plot_count,
+    coalesce(hv.crop_count, 0) AS crop_count,
+    coalesce(hv.harvest_value, 0) AS harvest_value,
+    coalesce(s.crop_sales_value, 0) AS crop_sales_value,
+    coalesce(s.processed_sales_value, 0) AS processed_sales_value,
+    {version} AS feature_version,
+    now() AS built_at
+FROM households h
+LEFT JOIN members m USING (HouseholdID)
+LEFT JOIN credit_status c USING (HouseholdID)
+LEFT JOIN loans l USING (HouseholdID)
+LEFT JOIN inclusion i USING (HouseholdID)
+LEFT JOIN harvest hv USING (HouseholdID)
+LEFT JOIN sales s USING (HouseholdID)
+ORDER BY h.HouseholdID
+"""
+
+
+def features_query(households="HouseholdID IS NOT NULL"):
+    """Feature rows for the households matching the ``households`` condition"""
+    return FEATURES_QUERY_TEMPLATE.format(
+        households=households,
+        productive=", ".join(map(str, PRODUCTIVE_PURPOSES)),
+        agricultural=", ".join(map(str, AGRICULTURAL_PURPOSES)),
+        inclusion_rates=",\n        ".join(f"2 - avg({code}) AS {rate}" for code, rate in INCLUSION_RATES.items()),
+        inclusion_columns=", ".join(f"i.{rate}" for rate in INCLUSION_RATES.values()),
+        services=mask_sql(),
+        version=FEATURES_VERSION,
+    )
+
+
+FEATURES_QUERY = features_query()
+REFRESH_QUERY = features_query(f"HouseholdID IN (SELECT HouseholdID FROM {REFRESH_IDS})")
+
+
+def _stored_version(conn):
+    try:
+        return conn.execute(f"SELECT max(feature_version) FROM {FEATURE_TABLE}").fetchone()[0]
+    except Exception:
+        return None
+
+
+def build_household_features(conn, household_ids=None):
+    """Materialize the household feature table (run from the ETL notebook)
+
+    With ``household_ids``, only those households are recomputed, e.g. the ones an
+    ETL batch touched; the whole table is rebuilt when it is missing or was built
+    with another FEATURES_VERSION.
+    """
+    if household_ids is None or _stored_version(conn) != FEATURES_VERSION:
+        conn.execute(f"CREATE OR REPLACE TABLE {FEATURE_TABLE} AS {FEATURES_QUERY}")
+        conn.execute(f"COMMENT ON TABLE {FEATURE_TABLE} IS 'One row per household, features version {FEATURES_VERSION}'")
+    else:
+        conn.register(REFRESH_IDS, pd.DataFrame({'HouseholdID': pd.Series(list(household_ids), dtype='int64')}))
+        try:
+            conn.execute("BEGIN TRANSACTION")
+            conn.execute(f"DELETE FROM {FEATURE_TABLE} WHERE HouseholdID IN (SELECT HouseholdID FROM {REFRESH_IDS})")
+            conn.execute(f"INSERT INTO {FEATURE_TABLE} {REFRESH_QUERY}")
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.unregister(REFRESH_IDS)
+    stamp_tables(conn, FEATURE_TABLE)
+    return conn.execute(f"SELECT count(*) FROM {FEATURE_TABLE}").fetchone()[0]
+
+
+def read_household_features(conn):
+    """The feature table, or the same rows computed on the fly when it is missing or outdated"""
+    if _stored_version(conn) == FEATURES_VERSION:
+        return conn.execute(f"SELECT * FROM {FEATURE_TABLE} ORDER BY HouseholdID").fetch_df()
+    return conn.execute(FEATURES_QUERY).fetch_df()
+
+
+def features_data_version(conn):
+    """Short hash of the versions of the feature table and its sources, which model and score artifacts record"""
+    versions = table_versions(conn, [FEATURE_TABLE, *SOURCE_TABLES])
+    return hashlib.sha1(repr(versions).encode()).hexdigest()[:12]
+
+
+@shared_frame
+@snapshot(FEATURE_TABLE, *SOURCE_TABLES)
+def load_household_features():
+    return read_household_features(get_duckdb_connection())
+
+
+def inclusion_rates(features, codes=INCLUSION_SERVICES):
+    """0-100 share of respondents using each service (columns named after the survey codes)"""
+    return pd.DataFrame({code: features[INCLUSION_RATES[code]] * 100 for code in codes}, index=features.index)
+
+
+def score_features(features):
+    """score_households() for feature rows"""
+    # NaN propagates like compute_credit_score(): a service with no answers voids the component
+    inclusion = inclusion_rates(features).mean(axis=1, skipna=False)
+    return scores_from_counts(features['HouseholdID'], features['loan_count'], features['repaid_loans'],
+                              features['productive_loans'], inclusion, features['respondents'] > 0)
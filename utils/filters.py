@@ -0,0 +1,122 @@
+import math
+import streamlit as st
+import pandas as pd
+from .functions import get_duckdb_connection
+from .shared import shared_frame
+from .cube import CUBE_QUERY_TEMPLATE, label_cube, load_credit_cube
+from .sketches import SKETCH_QUERY_TEMPLATE, label_sketches, load_loan_sketches
+from .mappings import zone_dict, sector_dict, loan_purpose_reasons
+
+# Bounded memoization: analysts flip filters constantly, so recent combinations
+# stay warm while old ones are evicted instead of growing the cache forever
+FILTER_CACHE_ENTRIES = 64
+
+
+def _codes(labels, mapping):
+    lookup = {label: code for code, label in mapping.items()}
+    return sorted(lookup[label] for label in labels if label in lookup)
+
+
+def _location_sql(zones=(), sectors=()):
+    location = []
+    if zones:
+        location.append(f"Region IN ({', '.join(str(c) for c in _codes(zones, zone_dict))})")
+    if sectors:
+        location.append(f"UrbanRuralSector IN ({', '.join(str(c) for c in _codes(sectors, sector_dict))})")
+    return " AND ".join(location)
+
+
+def _loan_filter_sql(purposes=(), zones=(), sectors=(), amount_range=None):
+    """WHERE clause over combined_credit_LoanHistory_vw for the selected filters"""
+    conditions = []
+    if purposes:
+        conditions.append(f"c.LoanPurpose IN ({', '.join(str(c) for c in _codes(purposes, loan_purpose_reasons))})")
+    if zones or sectors:
+        conditions.append(f"""c.HouseHoldID IN (
+            SELECT HouseHoldID FROM Individual_level_data WHERE {_location_sql(zones, sectors)})""")
+    if amount_range is not None:
+        conditions.append("TRY_CAST(c.LoanAmount AS DOUBLE) BETWEEN ? AND ?")
+    return ("WHERE " + " AND ".join(conditions)) if conditions else ""
+
+
+def _amount_params(amount_range):
+    return [float(amount_range[0]), float(amount_range[1])] if amount_range is not None else []
+
+
+def loan_filter(purposes=(), zones=(), sectors=(), amount_range=None):
+    """WHERE clause (over ``c``, the combined_credit_LoanHistory_vw rows) and its parameters for the Dashboard filters"""
+    return _loan_filter_sql(purposes, zones, sectors, amount_range), _amount_params(amount_range)
+
+
+def household_filter(zones=(), sectors=()):
+    """WHERE clause over Region and UrbanRuralSector codes (e.g. the household features) for the zone and sector filters"""
+    location = _location_sql(zones, sectors)
+    return f"WHERE {location}" if location else ""
+
+
+def filter_cube(cube, purposes=(), zones=(), sectors=()):
+    """Slice the rollup cube (or the sketches) on its labelled dimensions (empty selection = no filter)"""
+    mask = pd.Series(True, index=cube.index)
+    if purposes:
+        mask &= cube['LoanPurpose'].isin(purposes)
+    if zones:
+        mask &= cube['Region'].isin(zones)
+    if sectors:
+        mask &= cube['UrbanRuralSector'].isin(sectors)
+    return cube[mask]
+
+
+@shared_frame(max_entries=FILTER_CACHE_ENTRIES, show_spinner=False)
+def load_filtered_cube(purposes=(), zones=(), sectors=(), amount_range=None):
+    """Rollup cube for one filter combination
+
+    Purpose, zone and sector are cube dimensions and are answered from the
+    materialized cube. Loan amount is not, so an amount range is pushed down
+    into the database, which rolls up only the matching loans.
+    """
+    if amount_range is None:
+        cube = load_credit_cube()
+    else:
+        conn = get_duckdb_connection()
+        query = CUBE_QUERY_TEMPLATE.format(loan_filter=_loan_filter_sql(amount_range=amount_range))
+        cube = label_cube(conn.execute(query, _amount_params(amount_range)).fetch_df())
+    return filter_cube(cube, purposes, zones, sectors)
+
+
+@shared_frame(max_entries=FILTER_CACHE_ENTRIES, show_spinner=False)
+def load_filtered_sketches(purposes=(), zones=(), sectors=(), amount_range=None):
+    """Loan amount and repayment ratio sketch buckets for one filter combination
+
+    Like load_filtered_cube: segments are sliced from the materialized sketches,
+    and an amount range is pushed down into the database, which buckets only the
+    matching loans. Merge the result with QuantileSketch.from_rows().
+    """
+    if amount_range is None:
+        sketches = load_loan_sketches()
+    else:
+        conn = get_duckdb_connection()
+        query = SKETCH_QUERY_TEMPLATE.format(loan_filter=_loan_filter_sql(amount_range=amount_range))
+        sketches = label_sketches(conn.execute(query, _amount_params(amount_range)).fetch_df())
+    return filter_cube(sketches, purposes, zones, sectors)
+
+
+def render_sidebar_filters(cube):
+    """Draw the Dashboard filters and return them as hashable cache keys"""
+    st.sidebar.header("Filters")
+    st.sidebar.markdown("Filter the data to explore specific segments")
+
+    purposes = st.sidebar.multiselect("Loan Purpose", options=sorted(cube['LoanPurpose'].dropna().unique()))
+    zones = st.sidebar.multiselect("Zone", options=[z for z in zone_dict.values() if z in set(cube['Region'])])
+    sectors = st.sidebar.multiselect("Sector", options=[s for s in sector_dict.values() if s in set(cube['UrbanRuralSector'])])
+
+    amount_range = None
+    if cube['loan_count'].sum() > 0:
+        min_amount = math.floor(cube['loan_amount_min'].min())
+        max_amount = math.ceil(cube['loan_amount_max'].max())
+        if max_amount > min_amount:
+            selected_range = st.sidebar.slider("Loan Amount Range", min_amount, max_amount, (min_amount, max_amount))
+            if selected_range != (min_amount, max_amount):
+                amount_range = selected_range
+                st.sidebar.info(f"Showing only loans between {selected_range[0]:,} and {selected_range[1]:,} Naira.")
+
+    return tuple(purposes), tuple(zones), tuple(sectors), amount_range
@@ -3,27 +3,44 @@ import os
 from pathlib import Path
 import base64
 import uuid
-import duckdb
 from datetime import datetime
+from .querylog import QueryLoggingConnection
+from .telemetry import cache_resource
+from .assets import minified_css, minify_css, background_css
 
 ROOT_DIR = Path(__file__).parent.resolve()
-@st.cache_resource(show_spinner='Connecting... 🔌')
-def get_duckdb_connection():
-    motherduck_token = st.secrets["motherduck_token"]
+
+def open_duckdb_connection(read_only=False):
+    """Connect to MotherDuck, or to a local DuckDB file when NAIJAYIELD_DUCKDB_PATH is set"""
+    # Imported here so the login screen and static pages start without duckdb
+    import duckdb
+
+    local_path = os.getenv("NAIJAYIELD_DUCKDB_PATH")
+    if local_path:
+        return duckdb.connect(local_path, read_only=read_only)
+    motherduck_token = os.getenv("motherduck_token") or st.secrets["motherduck_token"]
     return duckdb.connect(f'md:NaijaYield?motherduck_token={motherduck_token}')
 
+@cache_resource(show_spinner='Connecting... 🔌')
+def get_duckdb_connection():
+    return QueryLoggingConnection(open_duckdb_connection())
+
+def is_admin_user():
+    """True when the logged-in user's e-mail is listed in NAIJAYIELD_ADMINS (comma separated)"""
+    admins = {email.strip().lower() for email in os.getenv("NAIJAYIELD_ADMINS", "").split(",") if email.strip()}
+    email = getattr(st.experimental_user, 'email', None)
+    return bool(email) and email.lower() in admins
+
 
 # Function to load CSS from file
 def load_css(css_file):
-    """Load CSS styling from a file"""
-    with open(css_file, 'r') as f:
-        st.markdown(f'<style>{f.read()}</style>', unsafe_allow_html=True)
-
-def add_bg_with_overlay(transparent=None):
+    """Load CSS styling from a file (minified and cached once per process)"""
+    st.markdown(f'<style>{minified_css(css_file)}</style>', unsafe_allow_html=True)
 
+@cache_resource(show_spinner=False)
+def _background_style(transparent):
     if transparent:
-        st.markdown("""
-        <style>
+        css = """
         .stApp::before {
             content: "";
             position: fixed;
@@ -31,7 +48,6 @@ def add_bg_with_overlay(transparent=None):
             left: 0;
             width: 100%;
             height: 100%;
-            background-image: url('https://images.unsplash.com/photo-1625246333195-78d9c38ad449?q=80&w=2070&auto=format&fit=crop&ixlib=rb-4.1.0&ixid=M3wxMjA3fDB8MHxwaG90by1wYWdlfHx8fGVufDB8fHx8fA%3D%3D');
             background-size: cover;
             background-position: center;
             background-repeat: no-repeat;
@@ -42,15 +58,11 @@ def add_bg_with_overlay(transparent=None):
         .stApp {
             position: relative;
         }
-        </style>
-        """, unsafe_allow_html=True)
+        """ + background_css(".stApp::before")
 
     else:
-        st.markdown(
-            """
-            <style>
+        css = """
             .stApp {
-                background-image: linear-gradient(rgba(0, 0, 0, 0.6), rgba(0, 0, 0, 0.6)), url('https://images.unsplash.com/photo-1625246333195-78d9c38ad449?q=80&w=2070&auto=format&fit=crop&ixlib=rb-4.1.0&ixid=M3wxMjA3fDB8MHxwaG90by1wYWdlfHx8fGVufDB8fHx8fA%3D%3D');
                 background-size: cover;
                 background-position: center;
                 background-repeat: no-repeat;
@@ -90,10 +102,12 @@ def add_bg_with_overlay(transparent=None):
                 line-height: 1.5;
                 font-weight: 500;
             }
-            </style>
-            """,
-            unsafe_allow_html=True
-        )
+            """ + background_css(".stApp", overlay="linear-gradient(rgba(0, 0, 0, 0.6), rgba(0, 0, 0, 0.6))")
+    return f"<style>{minify_css(css)}</style>"
+
+def add_bg_with_overlay(transparent=None):
+    """Background image from static/images, resized for the viewport and served by Streamlit"""
+    st.markdown(_background_style(bool(transparent)), unsafe_allow_html=True)
 
 def render_welcome_screen():
     """Render the welcome screen with login button"""
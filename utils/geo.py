@@ -0,0 +1,126 @@
+import pandas as pd
+from .functions import get_duckdb_connection
+from .telemetry import cache_resource
+from .shared import shared_frame
+from .snapshots import snapshot, stamp_tables
+from .features import FEATURE_TABLE, FEATURES_QUERY
+from .inclusion import SERVICES, SERVICE_BITS
+from .mappings import zone_dict, state_dict
+
+# Geographic rollup, materialized by the ETL notebook after the household
+# features: household counts and sums of the credit, financial inclusion and
+# harvest measures for the whole country, every zone, state and local government
+# area, in one GROUPING SETS pass. The drill-down page indexes the rows by their
+# parent area, so expanding a zone into states or a state into LGAs is a lookup.
+GEO_TABLE = "geo_rollup"
+GEO_LEVELS = ['Region', 'State', 'LocalGovernmentArea']
+LEVEL_NAMES = ['Nigeria', 'Zone', 'State', 'LGA']  # by depth
+
+GEO_QUERY_TEMPLATE = f"""
+SELECT
+    Region,
+    State,
+    LocalGovernmentArea,
+    CAST(3 - (GROUPING(Region) + GROUPING(State) + GROUPING(LocalGovernmentArea)) AS INTEGER) AS depth,
+    count(*) AS households,
+    count(*) FILTER (WHERE borrowed_or_applied) AS borrowers,
+    count(*) FILTER (WHERE application_rejected) AS rejected,
+    count(*) FILTER (WHERE needed_loan) AS needed_loan,
+    sum(loan_count) AS loans,
+    sum(repaid_loans) AS repaid_loans,
+    sum(loan_amount_total) AS loan_amount,
+    sum(amount_paid_total) AS amount_paid,
+    count(*) FILTER (WHERE respondents > 0) AS surveyed,
+    {", ".join(f"count(*) FILTER (WHERE respondents > 0 AND services_mask & {SERVICE_BITS[code]} <> 0) AS {code}"
+               for code in SERVICES)},
+    count(*) FILTER (WHERE plot_count > 0) AS farming,
+    sum(harvest_value) AS harvest_value,
+    sum(crop_sales_value) AS crop_sales_value
+FROM {{features}}
+WHERE Region IS NOT NULL AND State IS NOT NULL AND LocalGovernmentArea IS NOT NULL
+GROUP BY GROUPING SETS ((), (Region), (Region, State), (Region, State, LocalGovernmentArea))
+ORDER BY depth, Region, State, LocalGovernmentArea
+"""
+
+GEO_QUERY = GEO_QUERY_TEMPLATE.format(features=FEATURE_TABLE)
+
+
+def build_geo_rollup(conn):
+    """Materialize the geographic rollup (run from the ETL notebook, after the household features)"""
+    conn.execute(f"CREATE OR REPLACE TABLE {GEO_TABLE} AS {GEO_QUERY}")
+    conn.execute(f"COMMENT ON TABLE {GEO_TABLE} IS 'Household measures per zone, state and LGA'")
+    stamp_tables(conn, GEO_TABLE)
+    return conn.execute(f"SELECT count(*) FROM {GEO_TABLE}").fetchone()[0]
+
+
+def label_areas(rollup):
+    """Add the area name of each row (zone, state or LGA code)"""
+    rollup = rollup.copy()
+    lga = "LGA " + rollup['LocalGovernmentArea'].astype('Int64').astype(str)
+    state = rollup['State'].map(state_dict).fillna("State " + rollup['State'].astype('Int64').astype(str))
+    names = {0: LEVEL_NAMES[0], 1: rollup['Region'].map(zone_dict), 2: state, 3: lga}
+    rollup['area'] = LEVEL_NAMES[0]
+    for depth in (1, 2, 3):
+        at = rollup['depth'] == depth
+        rollup.loc[at, 'area'] = names[depth][at]
+    return rollup
+
+
+@shared_frame
+@snapshot(GEO_TABLE, FEATURE_TABLE)
+def load_geo_rollup():
+    conn = get_duckdb_connection()
+    try:
+        rollup = conn.execute(f"select * from {GEO_TABLE}").fetch_df()
+    except Exception:
+        # Rollup not materialized yet: aggregate the feature rows on the database side instead
+        rollup = conn.execute(GEO_QUERY_TEMPLATE.format(features=f"({FEATURES_QUERY})")).fetch_df()
+    return label_areas(rollup)
+
+
+def geo_metrics(rows):
+    """Rates (0-100) and averages of rollup rows, one output row per input row"""
+    metrics = pd.DataFrame({'area': rows['area'], 'households': rows['households']}, index=rows.index)
+    metrics['borrowing_rate'] = rows['borrowers'] / rows['households'] * 100
+    metrics['rejection_rate'] = rows['rejected'] / rows['borrowers'].where(rows['borrowers'] > 0) * 100
+    metrics['repayment_rate'] = rows['repaid_loans'] / rows['loans'].where(rows['loans'] > 0) * 100
+    metrics['average_loan'] = rows['loan_amount'] / rows['loans'].where(rows['loans'] > 0)
+    surveyed = rows['surveyed'].where(rows['surveyed'] > 0)
+    for code in SERVICES:
+        metrics[code] = rows[code] / surveyed * 100
+    farming = rows['farming'].where(rows['farming'] > 0)
+    metrics['harvest_value'] = rows['harvest_value'] / farming
+    metrics['crop_sales_value'] = rows['crop_sales_value'] / farming
+    return metrics
+
+
+class GeoIndex:
+    """Rollup rows keyed by area path: () for Nigeria, (zone,), (zone, state), (zone, state, lga)"""
+
+    def __init__(self, rollup):
+        self.rollup = rollup
+        depth = rollup['depth'].to_numpy()
+        codes = rollup[GEO_LEVELS].to_numpy()
+        self.rows = {}
+        positions = {}
+        for position, (level, area) in enumerate(zip(depth, codes)):
+            path = tuple(int(code) for code in area[:level])
+            self.rows[path] = position
+            if level:
+                positions.setdefault(path[:-1], []).append(position)
+        # Children of every area as a ready frame, in code order
+        self._children = {path: rollup.iloc[rows] for path, rows in positions.items()}
+
+    def area(self, path=()):
+        """The rollup row of one area"""
+        return self.rollup.iloc[self.rows[tuple(path)]]
+
+    def children(self, path=()):
+        """The rollup rows of the areas one level below ``path`` (empty below LGAs)"""
+        return self._children.get(tuple(path), self.rollup.iloc[:0])
+
+
+@cache_resource(show_spinner=False)
+def load_geo_index():
+    """GeoIndex over the geographic rollup, built once per process"""
+    return GeoIndex(load_geo_rollup())
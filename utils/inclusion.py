@@ -0,0 +1,100 @@
+import numpy as np
+import pandas as pd
+from .functions import get_duckdb_connection
+from .shared import shared_frame
+from .snapshots import snapshot
+from .scoring import INCLUSION_SERVICES
+
+# Financial services as bits of one UTINYINT per adult and per household, so
+# inclusion analytics are popcounts and bit tests over a small integer array
+# instead of float means over several survey columns. Bit i is SERVICES[i];
+# a survey answer sets it when the code is 1 (yes).
+SERVICES = INCLUSION_SERVICES + ['HasProxyBankingAccess']
+SERVICE_BITS = {code: 1 << bit for bit, code in enumerate(SERVICES)}
+SERVICE_LABELS = {
+    'HasBankAccount': 'Bank Account',
+    'UsedCooperative': 'Cooperative',
+    'UsedInformalSavingsGroups': 'Informal Savings',
+    'HasInsurance': 'Insurance',
+    'HasProxyBankingAccess': 'Proxy Banking',
+}
+
+
+def service_mask(codes):
+    """Bitmask with the bits of ``codes`` set"""
+    mask = 0
+    for code in codes:
+        mask |= SERVICE_BITS[code]
+    return mask
+
+
+SCORED_MASK = service_mask(INCLUSION_SERVICES)  # the services the credit score counts
+
+
+def mask_sql(test="{code} = 1"):
+    """SQL expression packing ``test`` for every service into a UTINYINT bitmask"""
+    return " | ".join(f"(coalesce({test.format(code=code)}, false)::UTINYINT << {bit})"
+                      for bit, code in enumerate(SERVICES))
+
+
+ADULT_SERVICES_QUERY = f"""
+SELECT
+    HouseHoldID AS HouseholdID,
+    {mask_sql()} AS services,
+    {mask_sql("{code} IS NOT NULL")} AS answered
+FROM savings_and_insurance_data
+"""
+
+
+@shared_frame
+@snapshot("savings_and_insurance_data")
+def load_adult_services():
+    """One row per savings_and_insurance_data respondent: HouseholdID, services used and services answered"""
+    return get_duckdb_connection().execute(ADULT_SERVICES_QUERY).fetch_df()
+
+
+def popcount(masks):
+    """Number of services set in each mask"""
+    return np.bitwise_count(np.asarray(masks, dtype=np.uint8))
+
+
+def services_in(mask, codes=SERVICES):
+    """The services of ``codes`` set in a single mask"""
+    return [code for code in codes if int(mask) & SERVICE_BITS[code]]
+
+
+def service_flags(masks, codes=SERVICES):
+    """Boolean frame with one column per service of ``codes``"""
+    bits = np.unpackbits(np.asarray(masks, dtype=np.uint8)[:, None], axis=1, bitorder='little')
+    index = masks.index if isinstance(masks, pd.Series) else None
+    return pd.DataFrame({code: bits[:, SERVICES.index(code)].astype(bool) for code in codes}, index=index)
+
+
+def breadth_scores(masks, codes=INCLUSION_SERVICES):
+    """0-100 share of the services in ``codes`` used, per mask"""
+    return popcount(np.asarray(masks, dtype=np.uint8) & service_mask(codes)) / len(codes) * 100
+
+
+def service_counts(masks, codes=SERVICES):
+    """Number of masks with each service of ``codes`` set"""
+    masks = np.asarray(masks, dtype=np.uint8)
+    return pd.Series([np.count_nonzero(masks & SERVICE_BITS[code]) for code in codes], index=codes)
+
+
+def service_shares(services, answered, codes=SERVICES):
+    """0-100 share of respondents using each service, among those who answered for it"""
+    asked = service_counts(answered, codes)
+    return service_counts(services, codes) / asked.where(asked > 0) * 100
+
+
+def inclusion_rollup(features, by):
+    """Per group of ``by``: households, 0-100 share of households where any adult uses
+    each service, and the mean breadth score"""
+    masks = features['services_mask']
+    flags = service_flags(masks).astype(float) * 100
+    flags['breadth_score'] = breadth_scores(masks)
+    flags['households'] = 1
+    grouped = flags.groupby([features[column] for column in np.atleast_1d(by)])
+    rollup = grouped.mean()
+    rollup['households'] = grouped['households'].sum()
+    return rollup
@@ -0,0 +1,56 @@
+import streamlit as st
+import pandas as pd
+from .functions import get_duckdb_connection
+from .shared import shared_frame
+from .snapshots import snapshot
+from .mappings import loan_denial_reasons, loan_purpose_reasons, loan_non_application_reasons
+
+
+# Load credit history data
+@shared_frame
+@snapshot("combined_credit_LoanHistory_vw")
+def load_credit_data():
+    conn = get_duckdb_connection()
+    try:
+        credit_loan_history = conn.execute("select * from combined_credit_LoanHistory_vw").fetch_df()       
+        credit_history = credit_loan_history.copy()
+    except Exception:
+        st.warning("Credit history data not found. Please check the database connection.")
+        raise
+
+
+    # Apply mappings
+    credit_history['PrimaryRejectionReason'] = credit_history['PrimaryRejectionReason'].map(loan_denial_reasons)
+    credit_history['PrimaryReasonNoBorrowing'] = credit_history['PrimaryReasonNoBorrowing'].map(loan_non_application_reasons)
+    credit_history['LoanPurpose'] = credit_history['LoanPurpose'].map(loan_purpose_reasons)
+    
+    # Convert numeric columns
+    numeric_columns = ['LoanAmount', 'IsFullyRepaid', 'TotalAmountPaid']
+    for col in numeric_columns:
+        credit_history[col] = pd.to_numeric(credit_history[col], errors='coerce')
+    
+    # Calculate repayment ratio
+    credit_history['RepaymentRatio'] = credit_history['TotalAmountPaid'] / credit_history['LoanAmount']
+    
+    return credit_history
+
+# Load financial inclusion data
+@shared_frame
+@snapshot("savings_and_insurance_data")
+def load_insurance_data():
+    conn = get_duckdb_connection()
+    try:
+        insurance_data_db = conn.execute("select * from savings_and_insurance_data").fetch_df()       
+        insurance_data = insurance_data_db.copy()
+    except Exception:
+        st.warning("Savings and insurance data not found. Please check the database connection.")
+        raise
+
+    return insurance_data
+
+# Load loan-level records (one row per LoanID)
+@shared_frame
+@snapshot("credit_history_loan_2")
+def load_loan_records():
+    conn = get_duckdb_connection()
+    return conn.execute("select * from credit_history_loan_2;").fetch_df()
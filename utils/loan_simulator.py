@@ -0,0 +1,101 @@
+import numpy as np
+import pandas as pd
+from .telemetry import cache_data
+
+# Loan what-if simulator for the Credit Score Education page. Every scenario in
+# the grid loan amount x tenor x interest rate x income shock is priced at once
+# with NumPy broadcasting (equal monthly instalments, interest compounded
+# monthly), so a page interaction evaluates thousands of scenarios in a few
+# milliseconds, and the grids are memoized per input set.
+DTI_HEALTHY = 36  # % of income lenders typically prefer at most
+DTI_CONCERNING = 42  # above this most lenders consider the borrower risky
+SIMULATION_CACHE_ENTRIES = 64
+
+
+def monthly_payments(amounts, tenors, annual_rates):
+    """Equal monthly instalment of each loan; arguments broadcast against each other
+
+    ``tenors`` are in months and ``annual_rates`` in percent a year.
+    """
+    amounts = np.asarray(amounts, dtype=float)
+    tenors = np.asarray(tenors, dtype=float)
+    rates = np.asarray(annual_rates, dtype=float) / 100 / 12
+    with np.errstate(divide='ignore', invalid='ignore'):
+        annuity = rates / -np.expm1(-tenors * np.log1p(rates))
+    return amounts * np.where(rates > 0, annuity, 1 / tenors)
+
+
+def affordable_amounts(payments, tenors, annual_rates):
+    """Largest loan whose monthly instalment is ``payments`` (the inverse of monthly_payments)"""
+    payments = np.maximum(np.asarray(payments, dtype=float), 0)
+    tenors = np.asarray(tenors, dtype=float)
+    rates = np.asarray(annual_rates, dtype=float) / 100 / 12
+    with np.errstate(divide='ignore', invalid='ignore'):
+        present_value = -np.expm1(-tenors * np.log1p(rates)) / rates
+    return payments * np.where(rates > 0, present_value, tenors)
+
+
+def amortization_schedule(amount, tenor, annual_rate):
+    """Month-by-month instalment, interest, principal and remaining balance of one loan"""
+    months = np.arange(1, int(tenor) + 1)
+    rate = annual_rate / 100 / 12
+    payment = float(monthly_payments(amount, tenor, annual_rate))
+    # Closed-form balance after each month: no running loop over the schedule
+    growth = (1 + rate) ** np.append(0, months)
+    balance = amount * growth - payment * (np.expm1(np.append(0, months) * np.log1p(rate)) / rate
+                                           if rate > 0 else np.append(0, months))
+    balance = np.maximum(balance, 0)
+    interest = balance[:-1] * rate
+    return pd.DataFrame({
+        'Month': months,
+        'Payment': payment,
+        'Interest': interest,
+        'Principal': payment - interest,
+        'Balance': balance[1:],
+    })
+
+
+class LoanScenarios:
+    """Instalments, debt-to-income ratios and affordability over a scenario grid
+
+    Arrays are indexed [amount, tenor, rate] for instalments and
+    [amount, tenor, rate, shock] for debt-to-income ratios.
+    """
+
+    def __init__(self, amounts, tenors, rates, shocks, monthly_income, other_debts=0):
+        self.amounts = np.asarray(amounts, dtype=float)
+        self.tenors = np.asarray(tenors, dtype=float)
+        self.rates = np.asarray(rates, dtype=float)
+        self.shocks = np.asarray(shocks, dtype=float)  # % change in income, e.g. -30 for a poor harvest
+        self.monthly_income = float(monthly_income)
+        self.other_debts = float(other_debts)
+
+        self.payments = monthly_payments(self.amounts[:, None, None], self.tenors[None, :, None],
+                                         self.rates[None, None, :])
+        self.incomes = self.monthly_income * (1 + self.shocks / 100)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            self.dti = (self.payments[..., None] + self.other_debts) / self.incomes * 100
+        self.dti[..., self.incomes <= 0] = np.inf
+
+    @property
+    def size(self):
+        return self.dti.size
+
+    def affordable(self, threshold=DTI_HEALTHY):
+        """True where the debt-to-income ratio stays within ``threshold`` percent"""
+        return self.dti <= threshold
+
+    def affordable_share(self, threshold=DTI_HEALTHY):
+        """[amount, tenor, rate] share (0-100) of the income shocks under which the loan stays affordable"""
+        return self.affordable(threshold).mean(axis=3) * 100
+
+    def max_affordable(self, threshold=DTI_HEALTHY):
+        """[tenor, rate, shock] largest loan keeping the debt-to-income ratio within ``threshold``"""
+        budget = self.incomes * threshold / 100 - self.other_debts
+        return affordable_amounts(budget[None, None, :], self.tenors[:, None, None], self.rates[None, :, None])
+
+
+@cache_data(max_entries=SIMULATION_CACHE_ENTRIES, show_spinner=False)
+def simulate_loans(amounts, tenors, rates, shocks, monthly_income, other_debts=0):
+    """LoanScenarios for one set of inputs, memoized per input set (pass tuples)"""
+    return LoanScenarios(amounts, tenors, rates, shocks, monthly_income, other_debts)
@@ -0,0 +1,88 @@
+# Survey code -> label mappings shared by the pages and the ETL rollups
+zone_dict = {
+    1: "NORTH CENTRAL",
+    2: "NORTH EAST",
+    3: "NORTH WEST",
+    4: "SOUTH EAST",
+    5: "SOUTH SOUTH",
+    6: "SOUTH WEST"
+}
+
+sector_dict = {
+    0 : "NEW",
+    1 : "URBAN",
+    2 : "RURAL"
+}
+
+state_dict = {
+    1: "ABIA",
+    2: "ADAMAWA",
+    3: "AKWA IBOM",
+    4: "ANAMBRA",
+    5: "BAUCHI",
+    6: "BAYELSA",
+    7: "BENUE",
+    8: "BORNO",
+    9: "CROSS RIVER",
+    10: "DELTA",
+    11: "EBONYI",
+    12: "EDO",
+    13: "EKITI",
+    14: "ENUGU",
+    15: "GOMBE",
+    16: "IMO",
+    17: "JIGAWA",
+    18: "KADUNA",
+    19: "KANO",
+    20: "KATSINA",
+    21: "KEBBI",
+    22: "KOGI",
+    23: "KWARA",
+    24: "LAGOS",
+    25: "NASARAWA",
+    26: "NIGER",
+    27: "OGUN",
+    28: "ONDO",
+    29: "OSUN",
+    30: "OYO",
+    31: "PLATEAU",
+    32: "RIVERS",
+    33: "SOKOTO",
+    34: "TARABA",
+    35: "YOBE",
+    36: "ZAMFARA",
+    37: "FCT ABUJA"
+}
+
+loan_denial_reasons = {
+    1: "LACK OF COLLATERAL",
+    2: "NO SAVINGS/SHARES",
+    3: "BAD CREDIT HISTORY",
+    4: "ITEMS DIDN'T QUALIFY FOR A LOAN",
+    5: "LACK OF GUARANTORS",
+    6: "OTHER"
+}
+
+loan_purpose_reasons = {
+    1: "PURCHASE LAND",
+    2: "PURCHASE AGRICULTURAL INPUTS FOR FOOD CROP",
+    3: "PURCHASE INPUTS FOR CASH CROP",
+    4: "BUSINESS START UP CAPITAL",
+    5: "NON FARM BUSINESS COSTS",
+    6: "CEREMONIES (MARRIAGE, BURIAL, OTHER SOCIAL FUNCTIONS ETC)",
+    7: "EDUCATION",
+    8: "MOTOR VEHICLE PURCHASE",
+    9: "HOME PURCHASE OR CONSTRUCTION",
+    10: "OTHER HOUSEHOLD CONSUMPTION",
+    11: "OTHER (SPECIFY)"
+}
+
+loan_non_application_reasons = {
+    1: "BELIEVED IT WOULD BE REFUSED",
+    2: "TOO EXPENSIVE",
+    3: "TOO MUCH TROUBLE FOR WHAT IT WAS WORTH",
+    4: "INADEQUATE COLLATERAL",
+    6: "DO NOT LIKE TO BE IN DEBT",
+    7: "DO NOT KNOW ANY LENDER",
+    8: "OTHER (SPECIFY)"
+}
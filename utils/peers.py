@@ -0,0 +1,78 @@
+import numpy as np
+import pandas as pd
+from .telemetry import cache_resource
+from .features import load_household_features, inclusion_rates, score_features
+
+# Where a household stands among its peers. Every metric is kept sorted once per
+# peer group (one array per group column, ordered by group then value, with a view
+# per group), so a percentile or a histogram is a few binary searches instead of
+# a scan over every household.
+PEER_GROUPS = {
+    'All households': None,
+    'Zone': 'Region',
+    'Sector': 'UrbanRuralSector',
+    'State': 'State',
+}
+PEER_METRICS = {
+    'score': 'Credit Score',
+    'inclusion': 'Financial Inclusion',
+    'loan_amount_total': 'Total Borrowed',
+    'harvest_value': 'Harvest Value',
+}
+
+
+def peer_metrics(features):
+    """PEER_METRICS values per feature row; NaN where a metric does not apply (e.g. no loans)"""
+    return pd.DataFrame({
+        'score': score_features(features)['score'].to_numpy(),
+        'inclusion': inclusion_rates(features).mean(axis=1, skipna=False).to_numpy(),
+        'loan_amount_total': features['loan_amount_total'].where(features['loan_count'] > 0).to_numpy(),
+        'harvest_value': features['harvest_value'].where(features['plot_count'] > 0).to_numpy(),
+    }, index=features.index)
+
+
+class PeerIndex:
+    """Sorted metric values per peer group, searched with np.searchsorted"""
+
+    def __init__(self, metrics, groups):
+        self._peers = {}
+        for metric in metrics.columns:
+            for column in PEER_GROUPS.values():
+                values = metrics[metric].to_numpy(dtype=float)
+                keys = np.zeros(len(values)) if column is None else groups[column].to_numpy(dtype=float)
+                valid = ~np.isnan(values) & ~np.isnan(keys)
+                values, keys = values[valid], keys[valid]
+                order = np.lexsort((values, keys))
+                values, keys = values[order], keys[order]
+                group_keys, starts = np.unique(keys, return_index=True)
+                ends = np.append(starts[1:], len(keys))
+                self._peers[(metric, column)] = {key: values[start:end]
+                                                 for key, start, end in zip(group_keys, starts, ends)}
+
+    def peers(self, metric, column=None, key=None):
+        """Sorted values of ``metric`` for the households whose ``column`` equals ``key``"""
+        groups = self._peers[(metric, column)]
+        return groups.get(0.0 if column is None else float(key), np.empty(0))
+
+    def percentile(self, metric, value, column=None, key=None):
+        """0-100 share of peers with a lower value (ties count half), or None without peers"""
+        peers = self.peers(metric, column, key)
+        if len(peers) == 0 or value is None or np.isnan(value):
+            return None
+        below = np.searchsorted(peers, value, side='left')
+        at_or_below = np.searchsorted(peers, value, side='right')
+        return (below + at_or_below) / 2 / len(peers) * 100
+
+    def histogram(self, metric, edges, column=None, key=None):
+        """Peer counts between consecutive ``edges`` (the last bin includes its right edge)"""
+        peers = self.peers(metric, column, key)
+        positions = np.searchsorted(peers, edges, side='left')
+        positions[-1] = np.searchsorted(peers, edges[-1], side='right')
+        return np.diff(positions)
+
+
+@cache_resource(show_spinner=False)
+def load_peer_index():
+    """PeerIndex over every household, built once per process"""
+    features = load_household_features()
+    return PeerIndex(peer_metrics(features), features[[column for column in PEER_GROUPS.values() if column]])
@@ -0,0 +1,141 @@
+import numpy as np
+import pandas as pd
+from .functions import get_duckdb_connection
+from .telemetry import cache_data
+from .shared import shared_frame
+from .snapshots import snapshot
+from .features import load_household_features, score_features, inclusion_rates
+from .scoring import RISK_BANDS, LOWEST_BAND
+
+# Monte Carlo loss distribution of a loan portfolio: one loan per household,
+# sized from its recommended max-loan band. A household defaults with a
+# probability derived from the repayment records in credit_history_loan_2, and a
+# defaulted loan loses a share of its amount drawn from what unrepaid loans in
+# the data actually lost. Paths are simulated in chunks of at most CHUNK_DRAWS
+# household draws, so memory stays bounded whatever the number of paths.
+DEFAULT_PATHS = 200_000
+CHUNK_DRAWS = 1_000_000  # household draws per chunk: ~4 MB per float32 array
+# A household's own loans count like this many loans at its inclusion band's average
+PRIOR_LOANS = 4
+TAIL_LEVELS = [0.95, 0.99, 0.999]
+SIMULATION_CACHE_ENTRIES = 16
+# Naira range of each max-loan band (RISK_BANDS), to size a household's loan
+BAND_LOAN_RANGES = {
+    "Very Low Risk": (500_000, 500_000),
+    "Low Risk": (250_000, 500_000),
+    "Medium Risk": (100_000, 250_000),
+    "High Risk": (50_000, 100_000),
+    "Very High Risk": (0, 50_000),
+}
+LOAN_SIZING = {'Lower bound': 0.0, 'Midpoint': 0.5, 'Upper bound': 1.0}
+RISK_CATEGORIES = [band[1] for band in RISK_BANDS] + [LOWEST_BAND[0]]
+
+# Share of the amount lost on every loan that was not fully repaid
+LOSS_SEVERITY_QUERY = """
+SELECT greatest(0, least(1, 1 - coalesce(TotalAmountPaid, 0) / LoanAmount)) AS loss_fraction
+FROM credit_history_loan_2
+WHERE IsFullyRepaid = 2 AND LoanAmount > 0
+"""
+
+
+@shared_frame
+@snapshot("credit_history_loan_2")
+def load_loss_severities():
+    return get_duckdb_connection().execute(LOSS_SEVERITY_QUERY).fetch_df()
+
+
+def default_probabilities(features):
+    """Probability that each household does not fully repay a loan
+
+    The share of a household's loans not fully repaid, shrunk by PRIOR_LOANS
+    towards the share among borrowers in the same financial inclusion band (the
+    risk bands applied to the inclusion average alone), so households without
+    loans get a rate derived from repayments too.
+    """
+    loans = features['loan_count'].to_numpy(dtype=float)
+    unrepaid = loans - features['repaid_loans'].to_numpy(dtype=float)
+    inclusion = inclusion_rates(features).mean(axis=1, skipna=False).to_numpy()
+    band = np.select([inclusion >= threshold for threshold, *_ in RISK_BANDS], range(len(RISK_BANDS)),
+                     len(RISK_BANDS))
+    band[np.isnan(inclusion)] = -1  # no savings data
+    bands = pd.DataFrame({'loans': loans, 'unrepaid': unrepaid}).groupby(band).sum()
+    overall = unrepaid.sum() / loans.sum() if loans.sum() else 0.0
+    band_rates = (bands['unrepaid'] / bands['loans'].where(bands['loans'] > 0)).fillna(overall)
+    prior = band_rates.reindex(band).to_numpy()
+    return (unrepaid + PRIOR_LOANS * prior) / (loans + PRIOR_LOANS)
+
+
+def portfolio_loans(features, sizing='Midpoint'):
+    """One loan per feature row: score, risk category, default probability and amount"""
+    scores = score_features(features)
+    low, high = (pd.DataFrame(BAND_LOAN_RANGES, index=['low', 'high']).T
+                 .reindex(scores['risk_category']).to_numpy().T)
+    return pd.DataFrame({
+        'HouseholdID': features['HouseholdID'].to_numpy(),
+        'Region': features['Region'].to_numpy(),
+        'score': scores['score'].to_numpy(),
+        'risk_category': scores['risk_category'].to_numpy(),
+        'default_probability': default_probabilities(features),
+        'amount': low + (high - low) * LOAN_SIZING[sizing],
+    })
+
+
+def simulate_losses(default_probability, amount, severities, paths=DEFAULT_PATHS, seed=0, chunk_draws=CHUNK_DRAWS):
+    """Portfolio loss (naira) on each of ``paths`` simulated paths
+
+    One uniform draw u per household and path decides both the default (u < p)
+    and, for defaults, the loss severity: u / p is again uniform, so it picks a
+    quantile of the empirical ``severities``. Draws past the last quantile are the
+    households that repaid and index a trailing zero.
+    """
+    probability = np.asarray(default_probability, dtype=np.float32)
+    # A household that never defaults contributes nothing, whatever it draws
+    amount = np.where(probability > 0, np.asarray(amount, dtype=np.float32), np.float32(0))
+    severities = np.sort(np.asarray(severities, dtype=np.float32))
+    if len(severities) == 0:
+        severities = np.ones(1, dtype=np.float32)  # no unrepaid loans on record: lose the whole amount
+    severities = np.append(severities, np.float32(0))
+    repaid = len(severities) - 1
+    scale = (repaid / np.maximum(probability, np.float32(1e-12))).astype(np.float32)
+
+    rng = np.random.default_rng(seed)
+    losses = np.empty(paths)
+    chunk_paths = max(1, chunk_draws // max(len(amount), 1))
+    for start in range(0, paths, chunk_paths):
+        draws = rng.random((min(chunk_paths, paths - start), len(amount)), dtype=np.float32)
+        draws *= scale
+        positions = np.minimum(draws, repaid, out=draws).astype(np.int32)
+        losses[start:start + len(draws)] = severities[positions] @ amount
+    return losses
+
+
+def loss_summary(losses, exposure, levels=TAIL_LEVELS):
+    """Expected loss, value at risk and expected shortfall at each tail level, in naira"""
+    losses = np.sort(losses)
+    summary = {'exposure': float(exposure), 'expected_loss': float(losses.mean()), 'paths': len(losses)}
+    for level in levels:
+        cutoff = int(np.floor(level * len(losses)))
+        summary[f'var_{level:g}'] = float(losses[min(cutoff, len(losses) - 1)])
+        summary[f'es_{level:g}'] = float(losses[cutoff:].mean()) if cutoff < len(losses) else summary[f'var_{level:g}']
+    return summary
+
+
+def expected_losses(loans, severities):
+    """Analytic expected loss per loan: default probability x mean severity x amount"""
+    mean_severity = float(np.mean(severities)) if len(severities) else 1.0
+    return loans['default_probability'] * mean_severity * loans['amount']
+
+
+@shared_frame(max_entries=len(LOAN_SIZING), show_spinner=False)
+def load_portfolio_loans(sizing='Midpoint'):
+    """portfolio_loans() of every household, so a household's default probability is the same in any portfolio"""
+    return portfolio_loans(load_household_features(), sizing)
+
+
+@cache_data(max_entries=SIMULATION_CACHE_ENTRIES, show_spinner=False)
+def simulate_portfolio(household_ids, sizing='Midpoint', paths=DEFAULT_PATHS, seed=0):
+    """The loans of ``household_ids`` (a tuple) and their simulated path losses, memoized per input set"""
+    population = load_portfolio_loans(sizing)
+    loans = population[population['HouseholdID'].isin(household_ids)].reset_index(drop=True)
+    severities = load_loss_severities()['loss_fraction'].to_numpy()
+    return loans, simulate_losses(loans['default_probability'], loans['amount'], severities, paths, seed)
@@ -0,0 +1,235 @@
+import cProfile
+import io
+import json
+import os
+import pstats
+import re
+import sys
+import sysconfig
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+import streamlit as st
+
+# Opt-in rerun profiling. NAIJAYIELD_PROFILE=1 profiles every rerun; admins can
+# profile their own reruns with ?profile=1 (add ?profile=flame for stack samples).
+# Output goes to profiles/<page title>/<time>-<session>.{prof,json[,collapsed]}.
+APP_DIR = Path(__file__).parent.parent.resolve()
+STDLIB_DIR = Path(sysconfig.get_paths()["stdlib"]).resolve()
+DEFAULT_PROFILE_DIR = APP_DIR / "profiles"
+SAMPLE_INTERVAL = 0.005
+TOP_FUNCTIONS = 25
+
+# Where the time goes, by the package that owns the code (self time)
+PACKAGE_GROUPS = {
+    "duckdb": "data loading (duckdb)",
+    "pyarrow": "data loading (duckdb)",
+    "pandas": "pandas transforms",
+    "numpy": "pandas transforms",
+    "plotly": "plotly figures",
+    "_plotly_utils": "plotly figures",
+    "json": "serialization",
+    "google": "serialization",
+    "streamlit": "streamlit",
+}
+
+_active = threading.local()
+# cProfile can only be active for one rerun at a time in a process
+_profiler_lock = threading.Lock()
+
+
+def profile_mode():
+    """"cprofile", "flame" or None for the current rerun"""
+    setting = os.getenv("NAIJAYIELD_PROFILE", "").lower()
+    if setting in ("1", "true", "cprofile"):
+        return "cprofile"
+    if setting == "flame":
+        return "flame"
+    requested = st.query_params.get("profile")
+    if requested and _is_admin():
+        return "flame" if requested == "flame" else "cprofile"
+    return None
+
+
+def _is_admin():
+    from .functions import is_admin_user
+    return is_admin_user()
+
+
+def checkpoint(label):
+    """Attribute the wall time since the previous checkpoint (or rerun start) to ``label``
+
+    A no-op unless the current rerun is being profiled.
+    """
+    rerun = getattr(_active, 'rerun', None)
+    if rerun is None:
+        return
+    now = time.perf_counter()
+    rerun['sections'].append((label, now - rerun['last']))
+    rerun['last'] = now
+
+
+class _StackSampler(threading.Thread):
+    """Samples one thread's Python stack to produce collapsed stacks for flame graphs"""
+
+    def __init__(self, target_ident, interval=SAMPLE_INTERVAL):
+        super().__init__(daemon=True, name="rerun-stack-sampler")
+        self.target_ident = target_ident
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.target_ident)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+
+def _package_of(filename):
+    """Top-level package a source file belongs to ("app" for this repository)"""
+    path = Path(filename)
+    if "site-packages" in path.parts:
+        return path.parts[path.parts.index("site-packages") + 1].split(".")[0]
+    if path.is_relative_to(APP_DIR):
+        return "app"
+    return None
+
+
+def _group_of(function):
+    """Breakdown group of a pstats function key; None for the stdlib and unattributed built-ins"""
+    filename, _, name = function
+    if filename == "~":
+        # C methods name their type, e.g. <method 'fetch_df' of 'duckdb.DuckDBPyConnection' objects>
+        owner = re.search(r" of '(\w+)\.", name)
+        return PACKAGE_GROUPS.get(owner.group(1)) if owner else None
+    package = _package_of(filename)
+    if package == "app":
+        return "app code"
+    if package is None:
+        return PACKAGE_GROUPS.get(Path(filename).parent.name) if filename.startswith(str(STDLIB_DIR)) else None
+    return PACKAGE_GROUPS.get(package, "other")
+
+
+def package_breakdown(stats):
+    """Self time per PACKAGE_GROUPS group
+
+    Time spent in the standard library and C built-ins is charged to whichever
+    packages called it, split by the time spent on each caller edge.
+    """
+    owners = {}
+
+    def owner(function, visiting=frozenset()):
+        if function not in owners:
+            group = _group_of(function)
+            if group is not None:
+                owners[function] = {group: 1.0}
+                return owners[function]
+            callers = {caller: edge for caller, edge in stats.stats[function][4].items()
+                       if caller in stats.stats and caller not in visiting}
+            # Weight callers by time on the edge, or by call count when that is all zero
+            weights = {caller: edge[2] for caller, edge in callers.items()}
+            if not any(weights.values()):
+                weights = {caller: edge[1] for caller, edge in callers.items()}
+            total = sum(weights.values())
+            shares = Counter()
+            for caller, weight in weights.items():
+                if weight:
+                    for caller_group, share in owner(caller, visiting | {function}).items():
+                        shares[caller_group] += share * weight / total
+            owners[function] = dict(shares) or {"other": 1.0}
+        return owners[function]
+
+    totals = Counter()
+    for function, (_, _, tottime, _, _) in stats.stats.items():
+        for group, share in owner(function).items():
+            totals[group] += tottime * share
+    return dict(totals.most_common())
+
+
+def _top_functions(stats, limit=TOP_FUNCTIONS):
+    rows = sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)[:limit]
+    return [
+        {"function": f"{function} ({Path(filename).name}:{line})", "calls": calls,
+         "tottime": tottime, "cumtime": cumtime}
+        for (filename, line, function), (_, calls, tottime, cumtime, _) in rows
+    ]
+
+
+def _output_stem(page):
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+    ctx = get_script_run_ctx(suppress_warning=True)
+    session = re.sub(r"\W+", "", ctx.session_id)[:8] if ctx else "nosession"
+    directory = Path(os.getenv("NAIJAYIELD_PROFILE_DIR") or DEFAULT_PROFILE_DIR) / re.sub(r"\W+", "_", page).strip("_")
+    directory.mkdir(parents=True, exist_ok=True)
+    return directory / f"{datetime.now():%Y%m%d-%H%M%S-%f}-{session}"
+
+
+@contextmanager
+def profile_rerun(page):
+    """Profile the page rerun run inside this block when profiling is switched on"""
+    mode = profile_mode()
+    if mode is None:
+        yield
+        return
+
+    started = time.perf_counter()
+    _active.rerun = {'sections': [], 'last': started}
+    profiler = cProfile.Profile() if _profiler_lock.acquire(blocking=False) else None
+    sampler = _StackSampler(threading.get_ident()) if mode == "flame" else None
+    if sampler:
+        sampler.start()
+    if profiler:
+        profiler.enable()
+    try:
+        yield
+    finally:
+        if profiler:
+            profiler.disable()
+            _profiler_lock.release()
+        if sampler:
+            sampler.stop()
+        checkpoint("rest of page")
+        rerun, _active.rerun = _active.rerun, None
+        _write_profile(page, time.perf_counter() - started, rerun['sections'], profiler, sampler)
+
+
+def _write_profile(page, seconds, sections, profiler, sampler):
+    stem = _output_stem(page)
+    summary = {
+        "page": page,
+        "seconds": seconds,
+        "sections": [{"label": label, "seconds": section_seconds} for label, section_seconds in sections
+                     if section_seconds > 0],
+    }
+    if profiler:
+        profiler.dump_stats(stem.with_suffix(".prof"))
+        stats = pstats.Stats(profiler, stream=io.StringIO())
+        summary["by_package"] = package_breakdown(stats)
+        summary["top_functions"] = _top_functions(stats)
+    else:
+        summary["note"] = "cProfile skipped: another rerun was being profiled"
+    if sampler:
+        with open(stem.with_suffix(".collapsed"), "w") as f:
+            for stack, count in sampler.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+    stem.with_suffix(".json").write_text(json.dumps(summary, indent=2))
+
+    if os.getenv("NAIJAYIELD_PROFILE") is None:
+        # Requested through the query parameter: show the admin where it went
+        breakdown = ", ".join(f"{label} {section_seconds * 1000:.0f} ms" for label, section_seconds in sections)
+        st.sidebar.caption(f"⏱️ {page}: {seconds * 1000:.0f} ms ({breakdown}) → {stem.name}")
@@ -0,0 +1,240 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from datetime import datetime, timezone
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+
+# Structured log of every query sent through get_duckdb_connection(): one JSON
+# object per line in logs/queries.jsonl, rotated at 5 MB. Point
+# NAIJAYIELD_QUERY_LOG at another file, or set it to "off" to disable logging.
+DEFAULT_QUERY_LOG = Path(__file__).parent.parent.resolve() / "logs" / "queries.jsonl"
+QUERY_LOG_MAX_BYTES = 5 * 2**20
+QUERY_LOG_BACKUPS = 5
+MAX_SQL_CHARS = 2000
+
+_logger = logging.getLogger("naijayield.queries")
+_logger.propagate = False
+_setup_lock = threading.Lock()
+
+
+def query_log_path():
+    """Current query log file, or None when logging is switched off"""
+    setting = os.getenv("NAIJAYIELD_QUERY_LOG", "")
+    if setting.lower() in ("off", "0", "false", "none"):
+        return None
+    return Path(setting) if setting else DEFAULT_QUERY_LOG
+
+
+def _get_logger():
+    path = query_log_path()
+    if path is None:
+        return None
+    with _setup_lock:
+        if not any(getattr(handler, 'baseFilename', None) == str(path) for handler in _logger.handlers):
+            for handler in list(_logger.handlers):
+                _logger.removeHandler(handler)
+                handler.close()
+            path.parent.mkdir(parents=True, exist_ok=True)
+            handler = RotatingFileHandler(path, maxBytes=QUERY_LOG_MAX_BYTES, backupCount=QUERY_LOG_BACKUPS,
+                                          encoding="utf-8")
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            _logger.addHandler(handler)
+            _logger.setLevel(logging.INFO)
+    return _logger
+
+
+def normalize_sql(sql):
+    """Collapse whitespace and replace literals so repeated queries share one fingerprint"""
+    sql = re.sub(r"\s+", " ", sql).strip().rstrip(";")
+    sql = re.sub(r"'(?:[^']|'')*'", "?", sql)
+    return re.sub(r"\b\d+(?:\.\d+)?\b", "?", sql)
+
+
+def query_fingerprint(normalized_sql):
+    return hashlib.sha1(normalized_sql.encode()).hexdigest()[:12]
+
+
+def _script_context():
+    """Page and session of the Streamlit script run issuing the query, if any"""
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+    ctx = get_script_run_ctx(suppress_warning=True)
+    if ctx is None:
+        return None, None
+    page_info = ctx.pages_manager.get_pages().get(ctx.active_script_hash, {})
+    script_path = page_info.get("script_path")
+    page = Path(script_path).stem if script_path else page_info.get("page_name")
+    return page, ctx.session_id
+
+
+def _result_size(result):
+    if hasattr(result, 'memory_usage'):
+        # DataFrame (duck-typed so pandas is only imported by pages that fetch one). Shallow size: string columns are counted by pointer, which keeps logging cheap
+        return len(result), int(result.memory_usage(index=True, deep=False).sum())
+    if isinstance(result, list):
+        return len(result), None
+    if isinstance(result, tuple):
+        return 1, None
+    if result is None:
+        return 0, None
+    if hasattr(result, 'num_rows'):
+        return result.num_rows, result.nbytes
+    return None, None
+
+
+class _LoggedResult:
+    """Pending result of one logged query on a cursor of its own
+
+    The record is written, and the cursor closed, on fetch or when the result is
+    dropped. ``fetchmany`` and ``fetch_record_batch`` keep the cursor open for
+    the next rows; a record batch stream is logged once it has been read.
+    """
+
+    FETCH_METHODS = ('fetch_df', 'df', 'fetchdf', 'fetchone', 'fetchall', 'fetchmany',
+                     'fetchnumpy', 'fetch_arrow_table', 'arrow', 'pl')
+
+    def __init__(self, cursor, record):
+        self._cursor = cursor
+        self._record = record
+
+    def __getattr__(self, name):
+        attribute = getattr(self._cursor, name)
+        if name == 'fetch_record_batch' and self._record is not None:
+            return lambda *args, **kwargs: _LoggedReader(self, attribute(*args, **kwargs))
+        if name not in self.FETCH_METHODS or self._record is None:
+            return attribute
+
+        def fetch(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                result = attribute(*args, **kwargs)
+            except Exception as e:
+                self._record['fetch_seconds'] = time.perf_counter() - started
+                self._record['error'] = f"{type(e).__name__}: {e}"
+                self._finish()
+                raise
+            self._record['fetch_seconds'] = time.perf_counter() - started
+            self._record['rows'], self._record['bytes'] = _result_size(result)
+            if name == 'fetchmany':
+                self._write()
+            else:
+                self._finish()
+            return result
+
+        return fetch
+
+    def _write(self):
+        record, self._record = self._record, None
+        if record is None:
+            return
+        record['seconds'] = record['execute_seconds'] + record.get('fetch_seconds', 0.0)
+        logger = _get_logger()
+        if logger is not None:
+            logger.info(json.dumps(record, default=str))
+
+    def _finish(self):
+        self._write()
+        try:
+            self._cursor.close()
+        except Exception:
+            pass
+
+    def __del__(self):
+        # Statements that are never fetched (INSERT, UPDATE, DDL) are logged here
+        self._finish()
+
+
+class _LoggedReader:
+    """Record batch stream of a logged query; rows, bytes and read time are logged when it ends"""
+
+    def __init__(self, result, reader):
+        self._result = result
+        self._reader = reader
+        self.schema = reader.schema
+
+    def __iter__(self):
+        record = self._result._record
+        record['fetch_seconds'], record['rows'], record['bytes'] = 0.0, 0, 0
+        try:
+            while True:
+                started = time.perf_counter()
+                try:
+                    batch = self._reader.read_next_batch()
+                except StopIteration:
+                    break
+                finally:
+                    record['fetch_seconds'] += time.perf_counter() - started
+                record['rows'] += batch.num_rows
+                record['bytes'] += batch.nbytes
+                yield batch
+        except Exception as e:
+            record['error'] = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            self._result._finish()
+
+
+class QueryLoggingConnection:
+    """DuckDB connection wrapper that logs timing, rows, bytes, page and session of each query
+
+    A DuckDB connection must not be used from several threads at once, and every
+    Streamlit session runs in a thread of its own, so each query runs on a
+    cursor (a connection of its own to the same database) that is closed once
+    the result is fetched. Statements therefore do not share a transaction.
+    """
+
+    def __init__(self, connection):
+        self._connection = connection
+
+    def execute(self, query, parameters=None):
+        page, session_id = _script_context()
+        # Literals are masked so e-mail addresses and other user input stay out of the log
+        sql = normalize_sql(query)
+        record = {
+            'ts': datetime.now(timezone.utc).isoformat(timespec='milliseconds'),
+            'query_id': query_fingerprint(sql),
+            'sql': sql[:MAX_SQL_CHARS],
+            'params': len(parameters) if parameters else 0,
+            'page': page,
+            'session': session_id,
+            'thread': threading.current_thread().name,
+        }
+        started = time.perf_counter()
+        cursor = self._connection.cursor()
+        try:
+            if parameters is None:
+                cursor.execute(query)
+            else:
+                cursor.execute(query, parameters)
+        except Exception as e:
+            record['execute_seconds'] = time.perf_counter() - started
+            record['error'] = f"{type(e).__name__}: {e}"
+            _LoggedResult(cursor, record)._finish()
+            raise
+        record['execute_seconds'] = time.perf_counter() - started
+        return _LoggedResult(cursor, record)
+
+    def __getattr__(self, name):
+        return getattr(self._connection, name)
+
+
+def read_query_log(path=None):
+    """Query log records, including rotated files, as a DataFrame (oldest first)"""
+    import pandas as pd
+
+    path = Path(path) if path else (query_log_path() or DEFAULT_QUERY_LOG)
+    # Rotated files are queries.jsonl.1 (newest) .. .N (oldest)
+    rotated = sorted((p for p in path.parent.glob(path.name + ".*") if p.suffix[1:].isdigit()),
+                     key=lambda p: int(p.suffix[1:]), reverse=True)
+    records = []
+    for log_file in rotated + [path]:
+        if not log_file.exists():
+            continue
+        with open(log_file, encoding="utf-8") as f:
+            records.extend(json.loads(line) for line in f if line.strip())
+    return pd.DataFrame(records)
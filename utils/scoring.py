@@ -0,0 +1,141 @@
+import numpy as np
+import pandas as pd
+
+# Credit score rules used on the Individual Analytics page:
+# repayment history (40 points), loan utilization (20) and financial inclusion (40),
+# rescaled to 0-100 over whichever components the household has data for
+PRODUCTIVE_PURPOSES = [1, 2, 3, 4]  # Land, ag inputs, business
+INCLUSION_SERVICES = ['HasBankAccount', 'UsedCooperative', 'UsedInformalSavingsGroups', 'HasInsurance']
+
+RISK_BANDS = [
+    (80, "Very Low Risk", "darkgreen", "₦500,000+"),
+    (60, "Low Risk", "green", "₦250,000-500,000"),
+    (40, "Medium Risk", "orange", "₦100,000-250,000"),
+    (20, "High Risk", "red", "₦50,000-100,000"),
+]
+LOWEST_BAND = ("Very High Risk", "darkred", "< ₦50,000")
+
+
+def _band(score):
+    for threshold, category, color, max_loan in RISK_BANDS:
+        if score >= threshold:
+            return category, color, max_loan
+    return LOWEST_BAND
+
+
+def risk_category(score):
+    """Risk label and gauge colour for a 0-100 score"""
+    category, color, _ = _band(score)
+    return category, color
+
+
+def max_loan_band(score):
+    """Recommended maximum loan for a 0-100 score"""
+    return _band(score)[2]
+
+
+def compute_credit_score(household_loans, household_fin):
+    """Score one household from its credit_history_loan_2 rows and savings_and_insurance_data rows"""
+    credit_score = 0
+    max_score = 0
+    score_components = {}
+
+    # 1. Repayment history (40 points)
+    if not household_loans.empty and 'IsFullyRepaid' in household_loans.columns:
+        # IsFullyRepaid = 1 means fully repaid
+        fully_repaid_count = (household_loans['IsFullyRepaid'] == 1).sum()
+        total_loans = len(household_loans)
+        repayment_rate = fully_repaid_count / total_loans if total_loans > 0 else 0
+        repayment_score = repayment_rate * 40
+        credit_score += repayment_score
+        score_components['Repayment History'] = repayment_score
+        max_score += 40
+
+    # 2. Loan utilization (20 points): share of loans with a productive purpose
+    if not household_loans.empty and 'LoanPurpose' in household_loans.columns:
+        productive_count = household_loans['LoanPurpose'].isin(PRODUCTIVE_PURPOSES).sum()
+        total_count = len(household_loans)
+        if total_count > 0:
+            utilization_score = (productive_count / total_count) * 20
+            credit_score += utilization_score
+            score_components['Loan Utilization'] = utilization_score
+        max_score += 20
+
+    # 3. Financial inclusion (40 points): average share of adults using each service
+    if not household_fin.empty:
+        inclusion_values = [(2 - household_fin[service].mean()) * 100 for service in INCLUSION_SERVICES]
+        financial_inclusion_score = sum(inclusion_values) / len(inclusion_values)
+        fin_inclusion_score = financial_inclusion_score * 0.4
+        credit_score += fin_inclusion_score
+        score_components['Financial Inclusion'] = fin_inclusion_score
+        max_score += 40
+
+    final_score = (credit_score / max_score * 100) if max_score > 0 else 0
+    category, color, max_loan = _band(final_score)
+    return {
+        'score': final_score,
+        'components': score_components,
+        'risk_category': category,
+        'color': color,
+        'max_loan': max_loan,
+    }
+
+
+def score_households(loans, fin, household_ids=None):
+    """Vectorized compute_credit_score for many households at once
+
+    ``loans`` has credit_history_loan_2 columns (keyed by HouseholdID) and ``fin``
+    savings_and_insurance_data columns (keyed by HouseHoldID). Returns one row per
+    household with the score, its components, risk category and max-loan band.
+    """
+    loan_groups = loans.groupby('HouseholdID')
+    loan_stats = pd.DataFrame({
+        'loan_count': loan_groups.size(),
+        'repaid_count': (loans['IsFullyRepaid'] == 1).groupby(loans['HouseholdID']).sum(),
+        'productive_count': loans['LoanPurpose'].isin(PRODUCTIVE_PURPOSES).groupby(loans['HouseholdID']).sum(),
+    })
+    service_means = fin.groupby('HouseHoldID')[INCLUSION_SERVICES].mean()
+    # NaN propagates like the per-household sum(): a service with no answers voids the component
+    inclusion = ((2 - service_means) * 100).mean(axis=1, skipna=False)
+
+    if household_ids is None:
+        household_ids = loan_stats.index.union(inclusion.index)
+    index = pd.Index(household_ids, name='HouseholdID')
+    loan_stats = loan_stats.reindex(index)
+    return scores_from_counts(index, loan_stats['loan_count'], loan_stats['repaid_count'],
+                              loan_stats['productive_count'], inclusion.reindex(index),
+                              index.isin(service_means.index))
+
+
+def scores_from_counts(household_ids, loan_count, repaid_count, productive_count, inclusion, has_fin):
+    """Credit scores from per-household loan counts and the 0-100 inclusion average
+
+    The arrays are aligned with ``household_ids``; ``has_fin`` marks households with
+    savings_and_insurance_data rows. Returns the same frame as score_households().
+    """
+    index = pd.Index(household_ids, name='HouseholdID')
+    loan_count = np.asarray(loan_count, dtype=float)
+    inclusion = np.asarray(inclusion, dtype=float)
+    has_fin = np.asarray(has_fin, dtype=bool)
+    has_loans = np.nan_to_num(loan_count) > 0
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        repayment_score = np.where(has_loans, np.asarray(repaid_count, dtype=float) / loan_count * 40, np.nan)
+        utilization_score = np.where(has_loans, np.asarray(productive_count, dtype=float) / loan_count * 20, np.nan)
+    inclusion_score = np.where(has_fin, inclusion * 0.4, np.nan)
+
+    credit_score = (np.where(has_loans, repayment_score + utilization_score, 0)
+                    + np.where(has_fin, inclusion_score, 0))
+    max_score = has_loans * 60 + has_fin * 40
+    with np.errstate(invalid='ignore', divide='ignore'):
+        final_score = np.where(max_score > 0, credit_score / max_score * 100, 0)
+
+    thresholds = [final_score >= threshold for threshold, *_ in RISK_BANDS]
+    return pd.DataFrame({
+        'score': final_score,
+        'repayment_score': repayment_score,
+        'utilization_score': utilization_score,
+        'inclusion_score': inclusion_score,
+        'risk_category': np.select(thresholds, [band[1] for band in RISK_BANDS], LOWEST_BAND[0]),
+        'max_loan': np.select(thresholds, [band[3] for band in RISK_BANDS], LOWEST_BAND[2]),
+    }, index=index).reset_index()
@@ -0,0 +1,105 @@
+import functools
+
+import pandas as pd
+
+from .telemetry import cache_resource
+
+# Frames cached with st.cache_data are unpickled into a fresh copy for every
+# caller, so memory grows with concurrent sessions. Loaders decorated with
+# shared_frame are cached once per process through st.cache_resource and every
+# session reads the same ReadOnlyFrame; derived frames (filters, groupbys,
+# copies) are ordinary, writable DataFrames.
+
+
+class SharedFrameMutationError(TypeError):
+    """Raised when code tries to modify a frame shared between sessions"""
+
+
+def _refuse(*_args, **_kwargs):
+    raise SharedFrameMutationError(
+        "This DataFrame is shared by every session and is read-only; call .copy() and modify the copy."
+    )
+
+
+class _ReadOnlyIndexer:
+    """.loc/.iloc/.at/.iat of a ReadOnlyFrame: reads pass through, writes raise"""
+
+    def __init__(self, indexer):
+        self._indexer = indexer
+
+    def __getitem__(self, key):
+        return self._indexer[key]
+
+    def __call__(self, *args, **kwargs):
+        return _ReadOnlyIndexer(self._indexer(*args, **kwargs))
+
+    __setitem__ = _refuse
+
+
+def _read_only_indexer(name):
+    base = getattr(pd.DataFrame, name)
+    return property(lambda self: _ReadOnlyIndexer(base.fget(self)))
+
+
+class ReadOnlyFrame(pd.DataFrame):
+    """DataFrame whose columns, values and index cannot be changed in place"""
+
+    @property
+    def _constructor(self):
+        # Anything derived from a shared frame is a normal DataFrame again
+        return pd.DataFrame
+
+    __setitem__ = _refuse
+    __delitem__ = _refuse
+    insert = _refuse
+    pop = _refuse
+    _update_inplace = _refuse
+    _set_value = _refuse
+    loc = _read_only_indexer('loc')
+    iloc = _read_only_indexer('iloc')
+    at = _read_only_indexer('at')
+    iat = _read_only_indexer('iat')
+
+    def __setattr__(self, name, value):
+        # Covers df.index = ..., df.columns = ... (also used by in-place rename and
+        # set_index) and df.col = ..., which writes an existing column
+        if name in ('index', 'columns') or (not name.startswith('_') and name in getattr(self, 'columns', ())):
+            _refuse()
+        super().__setattr__(name, value)
+
+
+def _numpy_buffers(values):
+    """numpy arrays behind a block: the array itself, or the buffers of an extension array"""
+    if hasattr(values, 'flags'):
+        # Some pandas internals (e.g. memory_usage(deep=True)) need writable object arrays;
+        # string columns are still covered by the ReadOnlyFrame guards
+        return [values] if values.dtype != object else []
+    # datetime/categorical/nullable (Int64, boolean, ...) arrays; Arrow-backed ones are immutable already
+    buffers = [getattr(values, name, None) for name in ('_ndarray', '_data', '_mask', '_codes')]
+    return [buffer for buffer in buffers if hasattr(buffer, 'flags')]
+
+
+def freeze(frame):
+    """ReadOnlyFrame over the same data, with every underlying array marked read-only"""
+    frozen = ReadOnlyFrame(frame, copy=False)
+    for block in frozen._mgr.blocks:
+        for buffer in _numpy_buffers(block.values):
+            buffer.flags.writeable = False
+    for buffer in _numpy_buffers(frozen.index._data):
+        buffer.flags.writeable = False
+    return frozen
+
+
+def shared_frame(func=None, **kwargs):
+    """Cache a DataFrame loader once per process and give every caller the same read-only frame
+
+    Accepts the same keyword arguments as st.cache_resource (max_entries, ttl, ...).
+    """
+    def decorate(func):
+        @functools.wraps(func)
+        def load(*args, **call_kwargs):
+            return freeze(func(*args, **call_kwargs))
+
+        return cache_resource(**kwargs)(load)
+
+    return decorate(func) if func is not None else decorate
@@ -0,0 +1,128 @@
+import numpy as np
+import pandas as pd
+from .telemetry import cache_resource
+from .features import load_household_features, score_features
+from .inclusion import service_flags
+
+# "Farmers like you": every household is a point in a normalized feature space
+# (loan history, financial services, location, farm size and harvest) and the
+# most similar households are its nearest points. Vectors are float32 rows of one
+# contiguous matrix, so a query is a matrix-vector product and an argpartition over
+# the households of its own zone and sector: milliseconds even over millions.
+COUNT_FEATURES = ['loan_count', 'productive_loans', 'member_count', 'plot_count']
+AMOUNT_FEATURES = ['loan_amount_total', 'harvest_value', 'salary_income']  # naira, log-scaled
+CATEGORY_FEATURES = ['Region', 'UrbanRuralSector']
+# A different zone or sector weighs as much as 2 standard deviations on one feature
+CATEGORY_WEIGHT = 2 ** 0.5
+# Squared distance a different zone or sector adds at least (two one-hot columns differ)
+BLOCK_GAP = 2 * CATEGORY_WEIGHT ** 2
+DEFAULT_NEIGHBOURS = 10
+
+
+def feature_vectors(features):
+    """Normalized similarity vectors, one float32 row per feature row"""
+    loans = features['loan_count'].where(features['loan_count'] > 0)
+    numeric = pd.DataFrame({
+        **{column: np.log1p(features[column].astype(float)) for column in COUNT_FEATURES + AMOUNT_FEATURES},
+        'repaid_share': (features['repaid_loans'] / loans).fillna(0),
+        'borrowed_or_applied': features['borrowed_or_applied'].astype(float),
+        'application_rejected': features['application_rejected'].astype(float),
+        **service_flags(features['services_mask']).astype(float).add_prefix('uses_'),
+    }, index=features.index)
+    spread = numeric.std(ddof=0).replace(0, 1)
+    numeric = (numeric - numeric.mean()) / spread
+    categories = pd.get_dummies(features[CATEGORY_FEATURES].astype('Int64'), columns=CATEGORY_FEATURES,
+                                dummy_na=True, dtype=float) * CATEGORY_WEIGHT
+    vectors = pd.concat([numeric, categories], axis=1).fillna(0)
+    return np.ascontiguousarray(vectors.to_numpy(dtype=np.float32))
+
+
+class SimilarityIndex:
+    """Exact Euclidean nearest neighbours over the rows of a vector matrix
+
+    Rows are stored grouped by ``blocks`` (e.g. zone x sector), where rows of
+    different blocks are at least ``sqrt(block_gap)`` apart. A query scans its own
+    block first and only falls back to every row when its k-th neighbour there is
+    not closer than that gap, so most queries read a fraction of the matrix.
+    """
+
+    def __init__(self, vectors, household_ids, blocks=None, block_gap=0.0):
+        blocks = np.zeros(len(vectors), dtype=np.int64) if blocks is None else np.asarray(blocks)
+        self._rows = np.argsort(blocks, kind='stable')  # stored order -> input row
+        self.vectors = np.ascontiguousarray(np.asarray(vectors, dtype=np.float32)[self._rows])
+        # |x - q|² = |x|² - 2 x·q + |q|²: the norms are computed once
+        self._norms = np.einsum('ij,ij->i', self.vectors, self.vectors)
+        self._ids = pd.Index(np.asarray(household_ids)[self._rows])
+        # pandas builds an index's hash table on first lookup, which is not safe from
+        # several session threads at once: build it here, before the index is shared
+        self._ids.get_indexer(self._ids[:1])
+        block_keys, starts = np.unique(blocks[self._rows], return_index=True)
+        ends = np.append(starts[1:], len(self._rows))
+        self._block_ranges = dict(zip(block_keys.tolist(), zip(starts.tolist(), ends.tolist())))
+        self._stored_blocks = blocks[self._rows]
+        self.block_gap = block_gap
+
+    def __len__(self):
+        return len(self._ids)
+
+    def _scan(self, vector, k, start, end, exclude):
+        distances = self._norms[start:end] - 2 * (self.vectors[start:end] @ vector)
+        if exclude is not None and start <= exclude < end:
+            distances[exclude - start] = np.inf
+        k = min(k, end - start - (exclude is not None and start <= exclude < end))
+        if k <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        candidates = np.argpartition(distances, k - 1)[:k] + start
+        # The expanded form loses precision in float32; recompute the k winners directly
+        squared = np.square(self.vectors[candidates] - vector, dtype=np.float64).sum(axis=1)
+        order = np.lexsort((candidates, squared))
+        return candidates[order], squared[order]
+
+    def _nearest(self, vector, k, block=None, exclude=None):
+        if block in self._block_ranges and self.block_gap > 0:
+            start, end = self._block_ranges[block]
+            stored, squared = self._scan(vector, k, start, end, exclude)
+            # Rows of any other block are at least block_gap away (squared)
+            if len(stored) == k and squared[-1] < self.block_gap:
+                return stored, squared
+        return self._scan(vector, k, 0, len(self._rows), exclude)
+
+    def nearest(self, vector, k=DEFAULT_NEIGHBOURS, block=None):
+        """Input rows and distances of the ``k`` rows closest to ``vector`` (in ``block``), closest first"""
+        stored, squared = self._nearest(np.asarray(vector, dtype=np.float32), k, block)
+        return self._rows[stored], np.sqrt(squared)
+
+    def similar_to(self, household_id, k=DEFAULT_NEIGHBOURS):
+        """nearest() for an indexed household, leaving the household itself out"""
+        position = self._ids.get_indexer([household_id])[0]
+        if position < 0:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        stored, squared = self._nearest(self.vectors[position], k, self._stored_blocks[position], exclude=position)
+        return self._rows[stored], np.sqrt(squared)
+
+
+def similar_households(features, positions, distances):
+    """Feature rows at ``positions`` with their outcomes: loans, repayment, rejection and credit score"""
+    neighbours = features.iloc[positions]
+    scores = score_features(neighbours)
+    return pd.DataFrame({
+        'HouseholdID': neighbours['HouseholdID'].to_numpy(),
+        'distance': distances,
+        'Region': neighbours['Region'].to_numpy(),
+        'UrbanRuralSector': neighbours['UrbanRuralSector'].to_numpy(),
+        'borrowed_or_applied': neighbours['borrowed_or_applied'].to_numpy(),
+        'loan_count': neighbours['loan_count'].to_numpy(),
+        'repaid_loans': neighbours['repaid_loans'].to_numpy(),
+        'application_rejected': neighbours['application_rejected'].to_numpy(),
+        'services': neighbours['services_mask'].to_numpy(),
+        'score': scores['score'].to_numpy(),
+        'risk_category': scores['risk_category'].to_numpy(),
+    })
+
+
+@cache_resource(show_spinner=False)
+def load_similarity_index():
+    """SimilarityIndex over every household, built once per process"""
+    features = load_household_features()
+    blocks = features.groupby(CATEGORY_FEATURES, dropna=False, sort=False).ngroup()
+    return SimilarityIndex(feature_vectors(features), features['HouseholdID'], blocks, BLOCK_GAP)
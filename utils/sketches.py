@@ -0,0 +1,162 @@
+import math
+
+import numpy as np
+from .functions import get_duckdb_connection
+from .shared import shared_frame
+from .snapshots import snapshot, stamp_tables
+from .mappings import zone_dict, sector_dict, loan_purpose_reasons
+
+# Mergeable quantile sketches of loan amounts and repayment ratios per Dashboard
+# segment (zone x sector x purpose), materialized by the ETL notebook next to the
+# rollup cube. A sketch counts values in logarithmic buckets (DDSketch): every
+# quantile is within RELATIVE_ACCURACY of the exact one, and merging segments is
+# adding their bucket counts, so IQR bounds, medians and histograms for any filter
+# combination come from a few thousand bucket rows instead of every loan.
+SKETCH_TABLE = "loan_value_sketches"
+SKETCH_MEASURES = ["LoanAmount", "RepaymentRatio"]
+RELATIVE_ACCURACY = 0.01
+GAMMA = (1 + RELATIVE_ACCURACY) / (1 - RELATIVE_ACCURACY)
+LOG_GAMMA = math.log(GAMMA)
+ZERO_BUCKET = -(2 ** 31)  # values <= 0
+
+# Same loans, location and repayment ratio as the cube; {loan_filter} is a WHERE
+# clause over combined_credit_LoanHistory_vw (see utils.filters)
+SKETCH_QUERY_TEMPLATE = f"""
+WITH household_location AS (
+    SELECT HouseHoldID,
+           any_value(Region) AS Region,
+           any_value(UrbanRuralSector) AS UrbanRuralSector
+    FROM Individual_level_data
+    GROUP BY HouseHoldID
+),
+loans AS (
+    SELECT
+        hl.Region,
+        hl.UrbanRuralSector,
+        c.LoanPurpose,
+        TRY_CAST(c.LoanAmount AS DOUBLE) AS LoanAmount,
+        TRY_CAST(c.TotalAmountPaid AS DOUBLE) / NULLIF(TRY_CAST(c.LoanAmount AS DOUBLE), 0) AS RepaymentRatio
+    FROM combined_credit_LoanHistory_vw c
+    LEFT JOIN household_location hl ON c.HouseHoldID = hl.HouseHoldID
+    {{loan_filter}}
+),
+loan_values AS (
+    SELECT Region, UrbanRuralSector, LoanPurpose, 'LoanAmount' AS measure, LoanAmount AS value
+    FROM loans WHERE LoanAmount IS NOT NULL
+    UNION ALL
+    SELECT Region, UrbanRuralSector, LoanPurpose, 'RepaymentRatio' AS measure, RepaymentRatio AS value
+    FROM loans WHERE RepaymentRatio IS NOT NULL
+)
+SELECT
+    Region,
+    UrbanRuralSector,
+    LoanPurpose,
+    measure,
+    CASE WHEN value > 0 THEN CAST(ceil(ln(value) / {LOG_GAMMA!r}) AS INTEGER) ELSE {ZERO_BUCKET} END AS bucket,
+    count(*) AS count
+FROM loan_values
+GROUP BY ALL
+"""
+
+SKETCH_QUERY = SKETCH_QUERY_TEMPLATE.format(loan_filter="")
+
+
+def build_loan_sketches(conn):
+    """Materialize the Dashboard loan value sketches (run from the ETL notebook)"""
+    conn.execute(f"CREATE OR REPLACE TABLE {SKETCH_TABLE} AS {SKETCH_QUERY}")
+    conn.execute(f"COMMENT ON TABLE {SKETCH_TABLE} IS 'Quantile sketch buckets of loan amounts and repayment ratios per segment'")
+    stamp_tables(conn, SKETCH_TABLE)
+    return conn.execute(f"SELECT count(*) FROM {SKETCH_TABLE}").fetchone()[0]
+
+
+def label_sketches(sketches):
+    """Replace segment codes with the labels of the Dashboard filters"""
+    sketches = sketches.copy()
+    sketches['Region'] = sketches['Region'].map(zone_dict)
+    sketches['UrbanRuralSector'] = sketches['UrbanRuralSector'].map(sector_dict)
+    sketches['LoanPurpose'] = sketches['LoanPurpose'].map(loan_purpose_reasons)
+    return sketches
+
+
+@shared_frame
+@snapshot(SKETCH_TABLE, "combined_credit_LoanHistory_vw", "Individual_level_data")
+def load_loan_sketches():
+    conn = get_duckdb_connection()
+    try:
+        sketches = conn.execute(f"select * from {SKETCH_TABLE}").fetch_df()
+    except Exception:
+        # Sketches not materialized yet: bucket on the database side instead
+        sketches = conn.execute(SKETCH_QUERY).fetch_df()
+    return label_sketches(sketches)
+
+
+def bucket_index(values):
+    """Sketch bucket of each value, as in SKETCH_QUERY"""
+    values = np.asarray(values, dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        buckets = np.ceil(np.log(values) / LOG_GAMMA)
+    return np.where(values > 0, buckets, ZERO_BUCKET).astype(np.int64)
+
+
+class QuantileSketch:
+    """Value counts per logarithmic bucket, merged by adding counts"""
+
+    def __init__(self, buckets=(), counts=()):
+        buckets = np.asarray(buckets, dtype=np.int64)
+        counts = np.asarray(counts, dtype=np.int64)
+        self.buckets, positions = np.unique(buckets, return_inverse=True)
+        self.counts = np.bincount(positions, weights=counts, minlength=len(self.buckets)).astype(np.int64)
+
+    @classmethod
+    def from_values(cls, values):
+        values = np.asarray(values, dtype=float)
+        buckets, counts = np.unique(bucket_index(values[~np.isnan(values)]), return_counts=True)
+        return cls(buckets, counts)
+
+    @classmethod
+    def from_rows(cls, rows, measure=None):
+        """Merge the sketch rows (bucket, count) of every segment in ``rows``, optionally of one measure"""
+        if measure is not None:
+            rows = rows[rows['measure'] == measure]
+        return cls(rows['bucket'].to_numpy(), rows['count'].to_numpy())
+
+    def merge(self, other):
+        return QuantileSketch(np.concatenate([self.buckets, other.buckets]), np.concatenate([self.counts, other.counts]))
+
+    @property
+    def count(self):
+        return int(self.counts.sum())
+
+    def values(self):
+        """Representative value of each bucket: within RELATIVE_ACCURACY of everything it counts"""
+        with np.errstate(over='ignore'):
+            values = 2 * GAMMA ** self.buckets.astype(float) / (GAMMA + 1)
+        return np.where(self.buckets == ZERO_BUCKET, 0.0, values)
+
+    def quantiles(self, qs):
+        """Estimates of the ``qs`` quantiles (pandas' rank q * (n - 1)), NaN for an empty sketch"""
+        qs = np.asarray(qs, dtype=float)
+        if self.count == 0:
+            return np.full(qs.shape, np.nan)
+        positions = np.searchsorted(np.cumsum(self.counts), qs * (self.count - 1), side='right')
+        return self.values()[np.minimum(positions, len(self.buckets) - 1)]
+
+    def quantile(self, q):
+        return float(self.quantiles([q])[0])
+
+    def mean(self):
+        return float((self.values() * self.counts).sum() / self.count) if self.count else float('nan')
+
+    def between(self, low=-np.inf, high=np.inf):
+        """The part of the sketch whose buckets represent values in [low, high]"""
+        values = self.values()
+        keep = (values >= low) & (values <= high)
+        return QuantileSketch(self.buckets[keep], self.counts[keep])
+
+    def histogram(self, edges):
+        """Counts between consecutive ``edges`` (the last bin includes its right edge)"""
+        edges = np.asarray(edges, dtype=float)
+        values = self.values()
+        inside = (values >= edges[0]) & (values <= edges[-1])
+        bins = np.minimum(np.searchsorted(edges, values[inside], side='right') - 1, len(edges) - 2)
+        return np.bincount(bins, weights=self.counts[inside], minlength=len(edges) - 1).astype(np.int64)
@@ -0,0 +1,214 @@
+import functools
+import hashlib
+import inspect
+import json
+import logging
+import os
+import re
+from pathlib import Path
+
+import numpy as np
+import pyarrow as pa
+
+from .functions import get_duckdb_connection
+
+# Arrow IPC snapshots of loader results. The first replica to load a table
+# version writes snapshots/<loader>-<version>.arrow (NAIJAYIELD_SNAPSHOT_DIR,
+# "off" to disable); every replica then memory-maps that file, so numeric
+# columns are read zero-copy through the page cache and their physical memory
+# is shared by all replicas on the host instead of multiplied by their number.
+DEFAULT_SNAPSHOT_DIR = Path(__file__).parent.parent.resolve() / "snapshots"
+
+NAN_COLUMNS_KEY = b"naijayield.nan_columns"
+
+# Written by the ETL (stamp_tables) whenever it loads or rebuilds a table
+DATA_VERSIONS_TABLE = "naijayield_data_versions"
+DATA_VERSIONS_DDL = f"""
+CREATE TABLE IF NOT EXISTS {DATA_VERSIONS_TABLE} (
+    table_name VARCHAR PRIMARY KEY,
+    refreshed_at TIMESTAMP NOT NULL,
+    checksum VARCHAR
+)
+"""
+TABLES_QUERY = """
+SELECT lower(table_name) FROM duckdb_tables()
+WHERE database_name = current_database() AND schema_name = current_schema()
+"""
+VIEWS_QUERY = """
+SELECT lower(view_name), sql FROM duckdb_views()
+WHERE database_name = current_database() AND schema_name = current_schema() AND NOT internal
+"""
+
+_logger = logging.getLogger(__name__)
+# Snapshotted loaders by name, for scripts.build_snapshots
+SNAPSHOT_LOADERS = {}
+# SQL of every view by lower-case name, listed once per process: the catalog
+# functions take milliseconds on a fresh cursor, a stamp lookup a fraction of one
+_view_sql = None
+
+
+def snapshot_dir():
+    """Current snapshot directory, or None when snapshots are switched off"""
+    setting = os.getenv("NAIJAYIELD_SNAPSHOT_DIR", "")
+    if setting.lower() in ("off", "0", "false", "none"):
+        return None
+    return Path(setting) if setting else DEFAULT_SNAPSHOT_DIR
+
+
+def stamp_tables(conn, *tables):
+    """Record that the ETL (re)wrote ``tables``, which gives the snapshots that read them a new version"""
+    conn.execute(DATA_VERSIONS_DDL)
+    for table in tables:
+        conn.execute(f"INSERT OR REPLACE INTO {DATA_VERSIONS_TABLE} VALUES (?, current_timestamp, NULL)",
+                     [table.lower()])
+
+
+def _data_versions(conn):
+    try:
+        rows = conn.execute(f"SELECT table_name, refreshed_at, checksum FROM {DATA_VERSIONS_TABLE}").fetchall()
+    except Exception:
+        return {}  # no table stamped yet
+    return {table: (refreshed_at, checksum) for table, refreshed_at, checksum in rows}
+
+
+def _views(conn):
+    global _view_sql
+    if _view_sql is None:
+        _view_sql = dict(conn.execute(VIEWS_QUERY).fetchall())
+    return _view_sql
+
+
+def _base_tables(name, tables, views):
+    """The tables (of ``tables``) a view names in its SQL, or the table itself"""
+    if name not in views:
+        return [name]
+    return sorted(table for table in tables if re.search(rf"\b{re.escape(table)}\b", views[name], re.IGNORECASE))
+
+
+def table_versions(conn, tables):
+    """Refresh stamps of the tables (and of the tables under views), or NAIJAYIELD_DATA_VERSION when a deploy pins one
+
+    The stamps come from the data version table, which the ETL updates whenever
+    it writes a table (stamp_tables): one small lookup, no table is scanned. A
+    table without a stamp keeps its version until it gets one.
+    """
+    pinned = os.getenv("NAIJAYIELD_DATA_VERSION")
+    if pinned:
+        return pinned
+    stamps = _data_versions(conn)
+    views = _views(conn)
+    versions = []
+    for table in tables:
+        name = table.lower()
+        versions.append((table, views.get(name),
+                         [(base, str(stamps.get(base, (None,))[0])) for base in _base_tables(name, stamps, views)]))
+    return versions
+
+
+def verify_checksums(conn, tables):
+    """Stamp the tables (or the tables under views) whose content changed without a refresh stamp
+
+    Compares a full content checksum (the sum of the row hashes) with the one
+    recorded at the last check, so it scans every table: run it from
+    scripts.build_snapshots, not from a replica. Returns the tables it stamped.
+    """
+    conn.execute(DATA_VERSIONS_DDL)
+    stamps = _data_versions(conn)
+    catalog = [table for (table,) in conn.execute(TABLES_QUERY).fetchall()]
+    views = _views(conn)
+    bases = sorted({base for table in tables for base in _base_tables(table.lower(), catalog, views)
+                    if base in catalog})
+    stamped = []
+    for table in bases:
+        checksum = str(conn.execute(f"SELECT sum(hash(t)) FROM {table} AS t").fetchone()[0])
+        refreshed_at, recorded = stamps.get(table, (None, None))
+        if refreshed_at is not None and recorded in (None, checksum):
+            # Stamped by the ETL since the last check, or unchanged: just record the checksum
+            if recorded is None:
+                conn.execute(f"UPDATE {DATA_VERSIONS_TABLE} SET checksum = ? WHERE table_name = ?", [checksum, table])
+        else:
+            conn.execute(f"INSERT OR REPLACE INTO {DATA_VERSIONS_TABLE} VALUES (?, current_timestamp, ?)",
+                         [table, checksum])
+            stamped.append(table)
+    return stamped
+
+
+def _missing_as_nan(column):
+    missing = column[column.isna()]
+    return column.dtype == object and not missing.empty and missing.iloc[0] is not None
+
+
+def write_snapshot(frame, path):
+    """Write ``frame`` as an uncompressed Arrow IPC file, atomically replacing ``path``"""
+    table = pa.Table.from_pandas(frame)
+    for name in frame.columns:
+        if frame[name].dtype.kind == 'f':
+            # Keep NaN as a value rather than a null so the column maps back zero-copy
+            index = table.schema.get_field_index(name)
+            table = table.set_column(index, table.field(index), pa.array(frame[name].to_numpy()))
+    # Arrow has a single null; remember which object columns used NaN (e.g. unmapped labels)
+    nan_columns = [name for name in frame.columns if _missing_as_nan(frame[name])]
+    table = table.replace_schema_metadata({**table.schema.metadata, NAN_COLUMNS_KEY: json.dumps(nan_columns)})
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with pa.OSFile(str(tmp_path), "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+    os.replace(tmp_path, path)
+
+
+def read_snapshot(path):
+    """DataFrame over a memory-mapped snapshot; numeric columns without nulls are not copied"""
+    table = pa.ipc.open_file(pa.memory_map(str(path))).read_all()
+    frame = table.to_pandas(split_blocks=True)
+    for name in json.loads(table.schema.metadata.get(NAN_COLUMNS_KEY, b"[]")):
+        frame[name] = frame[name].fillna(np.nan)
+    return frame
+
+
+def _prune(directory, name, keep):
+    # Replicas still mapping an old version keep their mapping after the unlink
+    for old in directory.glob(f"{name}-*.arrow"):
+        if old != keep:
+            try:
+                old.unlink()
+            except OSError:
+                pass
+
+
+def snapshot(*tables):
+    """Serve a DataFrame loader from a memory-mapped Arrow snapshot, rebuilt when ``tables`` change
+
+    The version also covers the loader's source, so editing its transforms
+    invalidates the snapshot (see table_versions). Use under shared_frame.
+    """
+    def decorate(func):
+        code_version = hashlib.sha1(inspect.getsource(func).encode()).hexdigest()
+
+        @functools.wraps(func)
+        def load():
+            directory = snapshot_dir()
+            if directory is None:
+                return func()
+            versions = table_versions(get_duckdb_connection(), tables)
+            version = hashlib.sha1(repr((code_version, versions)).encode()).hexdigest()[:16]
+            path = directory / f"{func.__name__}-{version}.arrow"
+            if path.exists():
+                try:
+                    return read_snapshot(path)
+                except (OSError, pa.ArrowException) as error:
+                    _logger.warning("Rebuilding unreadable snapshot %s: %s", path, error)
+            frame = func()
+            try:
+                write_snapshot(frame, path)
+            except (OSError, pa.ArrowException) as error:
+                _logger.warning("Could not write snapshot %s: %s", path, error)
+                return frame
+            _prune(directory, func.__name__, keep=path)
+            # Map the file this replica just wrote too, so its heap copy can be freed
+            return read_snapshot(path)
+
+        load.tables = tables
+        SNAPSHOT_LOADERS[func.__name__] = load
+        return load
+
+    return decorate
@@ -0,0 +1,371 @@
+"""Synthetic GHS-Panel (wave 3) data generator for scale testing.
+
+Writes tables with the same names and columns as the ETL notebook loads into
+MotherDuck, so the pages and scoring code can be pointed at a local DuckDB
+file (see ``NAIJAYIELD_DUCKDB_PATH``) and exercised at many times the size of
+the real survey.
+
+    python -m scripts.generate_synthetic_data data/synthetic.duckdb --scale 10
+"""
+import time
+
+import numpy as np
+import pandas as pd
+
+# Households in the real wave 3 panel; ``scale`` multiplies this
+BASE_HOUSEHOLDS = 4_600
+
+ZONE_WEIGHTS = {1: 0.17, 2: 0.16, 3: 0.20, 4: 0.15, 5: 0.16, 6: 0.16}
+
+# GHS state codes per geopolitical zone
+ZONE_STATES = {
+    1: [7, 22, 23, 25, 26, 31, 37],
+    2: [2, 5, 8, 15, 34, 35],
+    3: [17, 18, 19, 20, 21, 33, 36],
+    4: [1, 4, 11, 14, 16],
+    5: [3, 6, 9, 10, 12, 32],
+    6: [13, 24, 27, 28, 29, 30],
+}
+
+LOAN_PURPOSE_WEIGHTS = {
+    1: 0.03, 2: 0.22, 3: 0.05, 4: 0.12, 5: 0.16, 6: 0.07,
+    7: 0.10, 8: 0.02, 9: 0.04, 10: 0.17, 11: 0.02,
+}
+LENDER_TYPE_WEIGHTS = {
+    1: 0.05, 2: 0.03, 3: 0.06, 4: 0.05, 5: 0.04, 6: 0.09,
+    7: 0.22, 8: 0.30, 9: 0.04, 10: 0.06, 11: 0.03, 12: 0.03,
+}
+REJECTION_REASON_WEIGHTS = {1: 0.32, 2: 0.18, 3: 0.07, 4: 0.13, 5: 0.12, 6: 0.18}
+NO_BORROWING_REASON_WEIGHTS = {1: 0.14, 2: 0.12, 3: 0.10, 4: 0.16, 6: 0.24, 7: 0.15, 8: 0.09}
+
+CROPS = {
+    1010: ("BEANS/COWPEA", 0.13), 1020: ("CASSAVA", 0.16), 1040: ("COCOYAM", 0.05),
+    1060: ("GROUNDNUT", 0.08), 1070: ("SORGHUM", 0.11), 1080: ("MAIZE", 0.20),
+    1100: ("MILLET", 0.07), 1110: ("RICE", 0.06), 1121: ("YAM", 0.10),
+    2170: ("PLANTAIN", 0.04),
+}
+
+TABLE_DDL = {
+    "Individual_level_data": """
+        UniqueId VARCHAR, HouseHoldID BIGINT, Region BIGINT, State BIGINT,
+        LocalGovernmentArea BIGINT, UrbanRuralSector BIGINT, MainJob DOUBLE,
+        WorkLast7days DOUBLE, LastSalary DOUBLE
+    """,
+    "savings_and_insurance_data": """
+        UniqueId VARCHAR, HouseHoldID BIGINT, IsAdult DOUBLE, HasBankAccount DOUBLE,
+        SoughtAccountInfo DOUBLE, ConsideredAlternatives DOUBLE, CheckedDetailedTerms DOUBLE,
+        ThoroughnessOfTermsReview DOUBLE, HasProxyBankingAccess DOUBLE, UsedCooperative DOUBLE,
+        SavingsInstitutionType1 DOUBLE, UsedInformalSavingsGroups DOUBLE, HasInsurance DOUBLE,
+        InsuranceInstitutionType1 DOUBLE
+    """,
+    "credit_history_loan_1": "HouseHoldID BIGINT, Borrowed_Or_appliedLoan DOUBLE",
+    "credit_history_loan_2": """
+        HouseholdID BIGINT, LoanID BIGINT, LenderType DOUBLE, PrimaryLoanResponsible DOUBLE,
+        SecondaryLoanResponsible DOUBLE, TertiaryLoanResponsible DOUBLE, LoanPurpose DOUBLE,
+        LoanPurposeOther VARCHAR, LoanStatus DOUBLE, LoanAmount DOUBLE, LoanSufficient DOUBLE,
+        LoanReceiveMonth DOUBLE, LoanReceiveYear DOUBLE, IsFullyRepaid DOUBLE,
+        ExpectedFinalPaymentMonth DOUBLE, ExpectedFinalPaymentYear DOUBLE, TotalAmountPaid DOUBLE
+    """,
+    "credit_history_loan_3": """
+        HouseholdID BIGINT, LoanApplicationRejected DOUBLE, RejectedLoanPurpose DOUBLE,
+        RejectedLoanPurposeOther VARCHAR, PrimaryRejectionSource DOUBLE,
+        PrimaryRejectionSourceOther VARCHAR, SecondaryRejectionSource DOUBLE,
+        PrimaryRejectionReason DOUBLE, PrimaryRejectionReasonOther VARCHAR,
+        SecondaryRejectionReason DOUBLE, NeededLoan DOUBLE, PrimaryReasonNoBorrowing DOUBLE,
+        PrimaryReasonNoBorrowingOther VARCHAR, SecondaryReasonNoBorrowing DOUBLE
+    """,
+    "crop_harvest_1": """
+        HouseholdID BIGINT, PlotID BIGINT, CropID BIGINT, CropName VARCHAR, CropCode BIGINT,
+        Region BIGINT, State BIGINT, LocalGovernmentArea BIGINT, UrbanRuralSector BIGINT,
+        CropHarvested DOUBLE, ReasonNotHarvested DOUBLE, HarvestQuantity DOUBLE,
+        HarvestUnit DOUBLE, HarvestValue DOUBLE, HarvestCompleted DOUBLE,
+        ExpectedAdditionalHarvest DOUBLE, ExpectedHarvestUnit DOUBLE,
+        PrimaryHarvestDecisionMaker DOUBLE, SecondaryHarvestDecisionMaker DOUBLE
+    """,
+    "crop_harvest_2": """
+        HouseholdID BIGINT, CropName VARCHAR, CropCode BIGINT, Region BIGINT, State BIGINT,
+        UrbanRuralSector BIGINT, SoldUnprocessedCrop DOUBLE, QuantitySold DOUBLE,
+        QuantitySoldUnit DOUBLE, SalesValue DOUBLE, PrimaryBuyer DOUBLE,
+        PrimaryEarningsDecisionMaker DOUBLE, PaymentPromptness DOUBLE, SoldProcessedCrop DOUBLE,
+        ProcessedQuantitySold DOUBLE, ProcessedSalesValue DOUBLE, ProcessingType DOUBLE
+    """,
+    "naijayield_users": """
+        user_id VARCHAR(36) PRIMARY KEY, email VARCHAR(255) NOT NULL UNIQUE,
+        name VARCHAR(255) NOT NULL, first_name VARCHAR(100), last_name VARCHAR(100),
+        login_count INT DEFAULT 0, last_login TIMESTAMP,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    """,
+}
+
+# The MotherDuck view the pages read loan history from: one row per
+# household, repeated for every loan the household holds
+COMBINED_VIEW_SQL = """
+CREATE OR REPLACE VIEW combined_credit_LoanHistory_vw AS
+SELECT
+    l1.HouseHoldID,
+    l1.Borrowed_Or_appliedLoan,
+    l3.* EXCLUDE (HouseholdID),
+    l2.* EXCLUDE (HouseholdID)
+FROM credit_history_loan_1 l1
+LEFT JOIN credit_history_loan_3 l3 ON l1.HouseHoldID = l3.HouseholdID
+LEFT JOIN credit_history_loan_2 l2 ON l1.HouseHoldID = l2.HouseholdID
+"""
+
+
+def _choice(rng, weights, size):
+    codes = np.fromiter(weights.keys(), dtype=np.int64)
+    probs = np.fromiter(weights.values(), dtype=float)
+    return rng.choice(codes, size=size, p=probs / probs.sum())
+
+
+def _yes_no(rng, p_yes, size=None):
+    """Survey coding: 1 = YES, 2 = NO"""
+    return np.where(rng.random(np.shape(p_yes) if size is None else size) < p_yes, 1.0, 2.0)
+
+
+def _sigmoid(x):
+    return 1.0 / (1.0 + np.exp(-x))
+
+
+def _within_group_index(sizes):
+    """1-based position of each repeated row inside its group, e.g. [2, 3] -> 1 2 1 2 3"""
+    starts = np.cumsum(sizes) - sizes
+    return np.arange(sizes.sum()) - np.repeat(starts, sizes) + 1
+
+
+def _households(rng, first_id, n):
+    hhid = np.arange(first_id, first_id + n, dtype=np.int64)
+    region = _choice(rng, ZONE_WEIGHTS, n)
+    state = np.empty(n, dtype=np.int64)
+    for zone, states in ZONE_STATES.items():
+        mask = region == zone
+        state[mask] = rng.choice(states, size=mask.sum())
+    lga = state * 100 + rng.integers(1, 21, size=n)
+    sector = np.where(rng.random(n) < 0.3, 1, 2)
+    # Latent financial capability drives inclusion, borrowing and repayment
+    # together, so the generated tables keep their real-world correlations
+    capability = rng.normal(size=n) + np.where(sector == 1, 0.5, 0.0)
+    return pd.DataFrame({
+        "HouseHoldID": hhid, "Region": region, "State": state,
+        "LocalGovernmentArea": lga, "UrbanRuralSector": sector, "capability": capability,
+    })
+
+
+def _individuals(rng, hh):
+    sizes = np.clip(rng.poisson(5.5, size=len(hh)), 1, 20)
+    idx = np.repeat(np.arange(len(hh)), sizes)
+    indiv = _within_group_index(sizes)
+    members = hh.iloc[idx].reset_index(drop=True)
+    n = len(members)
+    working = _yes_no(rng, 0.55, n)
+    salary = np.where(rng.random(n) < 0.12, np.round(rng.lognormal(10.3, 0.9, n), -2), np.nan)
+    individuals = pd.DataFrame({
+        "UniqueId": members["HouseHoldID"].astype(str) + "_" + indiv.astype(str),
+        "HouseHoldID": members["HouseHoldID"],
+        "Region": members["Region"],
+        "State": members["State"],
+        "LocalGovernmentArea": members["LocalGovernmentArea"],
+        "UrbanRuralSector": members["UrbanRuralSector"],
+        "MainJob": np.where(working == 1, rng.integers(1, 10, n), np.nan).astype(float),
+        "WorkLast7days": working,
+        "LastSalary": salary,
+    })
+    return individuals, members["capability"].to_numpy(), indiv
+
+
+def _savings(rng, individuals, capability, indiv):
+    n = len(individuals)
+    is_adult = np.where((indiv <= 2) | (rng.random(n) < 0.35), 1.0, 2.0)
+    adult = is_adult == 1
+
+    def adult_answer(p_yes):
+        return np.where(adult, _yes_no(rng, p_yes, n), np.nan)
+
+    has_bank = adult_answer(_sigmoid(-1.2 + 1.1 * capability))
+    has_insurance = adult_answer(_sigmoid(-4.0 + 0.9 * capability))
+    return pd.DataFrame({
+        "UniqueId": individuals["UniqueId"],
+        "HouseHoldID": individuals["HouseHoldID"],
+        "IsAdult": is_adult,
+        "HasBankAccount": has_bank,
+        "SoughtAccountInfo": adult_answer(0.3),
+        "ConsideredAlternatives": adult_answer(0.2),
+        "CheckedDetailedTerms": adult_answer(0.25),
+        "ThoroughnessOfTermsReview": np.where(adult, rng.integers(1, 4, n), np.nan),
+        "HasProxyBankingAccess": adult_answer(_sigmoid(-2.0 + 0.8 * capability)),
+        "UsedCooperative": adult_answer(_sigmoid(-2.6 + 0.6 * capability)),
+        "SavingsInstitutionType1": np.where(has_bank == 1, rng.integers(1, 8, n), np.nan),
+        "UsedInformalSavingsGroups": adult_answer(_sigmoid(-1.8 + 0.3 * capability)),
+        "HasInsurance": has_insurance,
+        "InsuranceInstitutionType1": np.where(has_insurance == 1, rng.integers(1, 6, n), np.nan),
+    })
+
+
+def _credit(rng, hh):
+    n = len(hh)
+    capability = hh["capability"].to_numpy()
+    applied = _yes_no(rng, _sigmoid(-1.5 + 0.4 * capability))
+    loan_1 = pd.DataFrame({"HouseHoldID": hh["HouseHoldID"], "Borrowed_Or_appliedLoan": applied})
+
+    applicant = applied == 1
+    rejected = np.where(applicant, _yes_no(rng, _sigmoid(-2.0 - 0.5 * capability)), 2.0)
+    needed = np.where(applicant, np.nan, _yes_no(rng, 0.35, n))
+    was_rejected = rejected == 1
+    did_not_apply = needed == 1
+
+    def coded(mask, weights):
+        return np.where(mask, _choice(rng, weights, n), np.nan).astype(float)
+
+    loan_3 = pd.DataFrame({
+        "HouseholdID": hh["HouseHoldID"],
+        "LoanApplicationRejected": rejected,
+        "RejectedLoanPurpose": coded(was_rejected, LOAN_PURPOSE_WEIGHTS),
+        "RejectedLoanPurposeOther": None,
+        "PrimaryRejectionSource": coded(was_rejected, LENDER_TYPE_WEIGHTS),
+        "PrimaryRejectionSourceOther": None,
+        "SecondaryRejectionSource": np.nan,
+        "PrimaryRejectionReason": coded(was_rejected, REJECTION_REASON_WEIGHTS),
+        "PrimaryRejectionReasonOther": None,
+        "SecondaryRejectionReason": np.nan,
+        "NeededLoan": needed,
+        "PrimaryReasonNoBorrowing": coded(did_not_apply, NO_BORROWING_REASON_WEIGHTS),
+        "PrimaryReasonNoBorrowingOther": None,
+        "SecondaryReasonNoBorrowing": np.nan,
+    })
+
+    borrower = applicant & ~was_rejected
+    loans_per_hh = np.where(borrower, 1 + rng.poisson(0.6, size=n), 0)
+    idx = np.repeat(np.arange(n), loans_per_hh)
+    m = len(idx)
+    loan_id = _within_group_index(loans_per_hh)
+    loan_capability = capability[idx]
+    amount = np.round(rng.lognormal(10.4 + 0.25 * loan_capability, 1.1), -2)
+    receive_year = rng.choice([2013.0, 2014.0, 2015.0], size=m, p=[0.2, 0.35, 0.45])
+    receive_month = rng.integers(1, 13, size=m).astype(float)
+    term_months = rng.choice([3, 6, 9, 12, 18, 24], size=m, p=[0.15, 0.3, 0.15, 0.25, 0.08, 0.07])
+    final_index = receive_year * 12 + receive_month - 1 + term_months
+    fully_repaid = _yes_no(rng, _sigmoid(0.1 + 0.9 * loan_capability))
+    paid_share = np.where(fully_repaid == 1, rng.uniform(1.0, 1.35, m), rng.beta(1.5, 2.5, m))
+    loan_2 = pd.DataFrame({
+        "HouseholdID": hh["HouseHoldID"].to_numpy()[idx],
+        "LoanID": loan_id,
+        "LenderType": _choice(rng, LENDER_TYPE_WEIGHTS, m).astype(float),
+        "PrimaryLoanResponsible": rng.integers(1, 4, m).astype(float),
+        "SecondaryLoanResponsible": np.nan,
+        "TertiaryLoanResponsible": np.nan,
+        "LoanPurpose": _choice(rng, LOAN_PURPOSE_WEIGHTS, m).astype(float),
+        "LoanPurposeOther": None,
+        "LoanStatus": rng.choice([1.0, 2.0, 3.0], size=m, p=[0.7, 0.2, 0.1]),
+        "LoanAmount": amount,
+        "LoanSufficient": _yes_no(rng, 0.62, m),
+        "LoanReceiveMonth": receive_month,
+        "LoanReceiveYear": receive_year,
+        "IsFullyRepaid": fully_repaid,
+        "ExpectedFinalPaymentMonth": final_index % 12 + 1,
+        "ExpectedFinalPaymentYear": final_index // 12,
+        "TotalAmountPaid": np.round(amount * paid_share, -1),
+    })
+    return loan_1, loan_2, loan_3
+
+
+def _crops(rng, hh):
+    farming = hh[rng.random(len(hh)) < 0.7]
+    n_crops = rng.integers(1, 6, size=len(farming))
+    idx = np.repeat(np.arange(len(farming)), n_crops)
+    rows = farming.iloc[idx].reset_index(drop=True)
+    m = len(rows)
+    codes = np.fromiter(CROPS.keys(), dtype=np.int64)
+    probs = np.array([w for _, w in CROPS.values()])
+    crop_code = rng.choice(codes, size=m, p=probs / probs.sum())
+    crop_name = pd.Series(crop_code).map({code: name for code, (name, _) in CROPS.items()})
+    harvested = _yes_no(rng, 0.88, m)
+    got_harvest = harvested == 1
+    value = np.where(got_harvest, np.round(rng.lognormal(10.6 + 0.2 * rows["capability"].to_numpy(), 1.0), -2), np.nan)
+    harvest_1 = pd.DataFrame({
+        "HouseholdID": rows["HouseHoldID"],
+        "PlotID": rng.integers(1, 5, m),
+        "CropID": _within_group_index(n_crops),
+        "CropName": crop_name,
+        "CropCode": crop_code,
+        "Region": rows["Region"],
+        "State": rows["State"],
+        "LocalGovernmentArea": rows["LocalGovernmentArea"],
+        "UrbanRuralSector": rows["UrbanRuralSector"],
+        "CropHarvested": harvested,
+        "ReasonNotHarvested": np.where(got_harvest, np.nan, rng.integers(1, 8, m)),
+        "HarvestQuantity": np.where(got_harvest, np.round(rng.lognormal(4.5, 1.2, m)), np.nan),
+        "HarvestUnit": np.where(got_harvest, rng.choice([1.0, 2.0, 3.0], size=m), np.nan),
+        "HarvestValue": value,
+        "HarvestCompleted": np.where(got_harvest, _yes_no(rng, 0.8, m), np.nan),
+        "ExpectedAdditionalHarvest": np.nan,
+        "ExpectedHarvestUnit": np.nan,
+        "PrimaryHarvestDecisionMaker": rng.integers(1, 4, m).astype(float),
+        "SecondaryHarvestDecisionMaker": np.nan,
+    })
+
+    sold = np.where(got_harvest, _yes_no(rng, 0.45, m), 2.0)
+    did_sell = sold == 1
+    processed = _yes_no(rng, 0.08, m)
+    harvest_2 = pd.DataFrame({
+        "HouseholdID": rows["HouseHoldID"],
+        "CropName": crop_name,
+        "CropCode": crop_code,
+        "Region": rows["Region"],
+        "State": rows["State"],
+        "UrbanRuralSector": rows["UrbanRuralSector"],
+        "SoldUnprocessedCrop": sold,
+        "QuantitySold": np.where(did_sell, np.round(rng.lognormal(3.5, 1.0, m)), np.nan),
+        "QuantitySoldUnit": np.where(did_sell, rng.choice([1.0, 2.0, 3.0], size=m), np.nan),
+        "SalesValue": np.where(did_sell, np.round(np.nan_to_num(value) * rng.uniform(0.1, 0.8, m), -2), np.nan),
+        "PrimaryBuyer": np.where(did_sell, rng.integers(1, 7, m), np.nan),
+        "PrimaryEarningsDecisionMaker": np.where(did_sell, rng.integers(1, 4, m), np.nan),
+        "PaymentPromptness": np.where(did_sell, rng.integers(1, 4, m), np.nan),
+        "SoldProcessedCrop": processed,
+        "ProcessedQuantitySold": np.where(processed == 1, np.round(rng.lognormal(2.5, 1.0, m)), np.nan),
+        "ProcessedSalesValue": np.where(processed == 1, np.round(rng.lognormal(9.5, 1.0, m), -2), np.nan),
+        "ProcessingType": np.where(processed == 1, rng.integers(1, 6, m), np.nan),
+    })
+    return harvest_1, harvest_2
+
+
+def generate(conn, scale=1.0, seed=42, chunk_households=100_000, progress=None):
+    """Populate ``conn`` with synthetic survey tables; returns row counts per table"""
+    n_households = max(1, int(round(BASE_HOUSEHOLDS * scale)))
+    for table, columns in TABLE_DDL.items():
+        conn.execute(f"CREATE OR REPLACE TABLE {table} ({columns})")
+
+    row_counts = dict.fromkeys(TABLE_DDL, 0)
+    first_id = 10_001
+    for chunk_no, start in enumerate(range(0, n_households, chunk_households)):
+        started = time.perf_counter()
+        # One generator per chunk keeps output identical for a given seed
+        # regardless of how the chunk size is tuned
+        rng = np.random.default_rng([seed, start])
+        hh = _households(rng, first_id + start, min(chunk_households, n_households - start))
+        individuals, capability, indiv = _individuals(rng, hh)
+        savings = _savings(rng, individuals, capability, indiv)
+        loan_1, loan_2, loan_3 = _credit(rng, hh)
+        harvest_1, harvest_2 = _crops(rng, hh)
+
+        frames = {
+            "Individual_level_data": individuals,
+            "savings_and_insurance_data": savings,
+            "credit_history_loan_1": loan_1,
+            "credit_history_loan_2": loan_2,
+            "credit_history_loan_3": loan_3,
+            "crop_harvest_1": harvest_1,
+            "crop_harvest_2": harvest_2,
+        }
+        for table, frame in frames.items():
+            conn.register("synthetic_chunk", frame)
+            conn.execute(f"INSERT INTO {table} BY NAME SELECT * FROM synthetic_chunk")
+            conn.unregister("synthetic_chunk")
+            row_counts[table] += len(frame)
+        if progress:
+            progress(chunk_no, len(hh), time.perf_counter() - started)
+
+    conn.execute(COMBINED_VIEW_SQL)
+    # Imported here so generating data does not need streamlit
+    from .snapshots import stamp_tables
+    stamp_tables(conn, *frames)
+    return row_counts
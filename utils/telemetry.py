@@ -0,0 +1,281 @@
+import atexit
+import functools
+import hashlib
+import logging
+import os
+import resource
+import socket
+import sys
+import threading
+import time
+import weakref
+from collections import defaultdict
+from pathlib import Path
+
+import streamlit as st
+
+# Cache and memory telemetry. Cached loaders use the cache_data / cache_resource
+# decorators below instead of st.cache_data / st.cache_resource so calls, misses
+# and recomputations are counted. Metrics are written in Prometheus text format
+# to logs/metrics/<replica>.prom (NAIJAYIELD_METRICS_DIR) every METRICS_INTERVAL
+# seconds, one file per replica, for a textfile scraper. The replica is named by
+# NAIJAYIELD_REPLICA, or host and pid; its file is deleted when the process exits.
+DEFAULT_METRICS_DIR = Path(__file__).parent.parent.resolve() / "logs" / "metrics"
+METRICS_INTERVAL = 15
+MAX_TRACKED_KEYS = 10_000  # argument fingerprints kept per function to spot recomputes
+
+_logger = logging.getLogger(__name__)
+_stats_lock = threading.Lock()
+_cache_stats = defaultdict(lambda: {'kind': None, 'hits': 0, 'misses': 0, 'recomputes': 0,
+                                    'compute_seconds': 0.0, 'seen_keys': set()})
+# Deep size of shared frames by id(), dropped when the frame is garbage collected
+_frame_sizes = {}
+# Set once the cache sizes failed, so the warning is logged only once
+_sizes_unavailable = []
+# Names of the cached functions whose body ran during the current call, per thread
+_computed = threading.local()
+
+
+def _argument_key(args, kwargs):
+    # Underscore-prefixed parameters are not part of Streamlit's cache key either
+    kwargs = {name: value for name, value in kwargs.items() if not name.startswith('_')}
+    return hashlib.sha1(repr((args, sorted(kwargs.items()))).encode()).hexdigest()
+
+
+def _tracked(streamlit_decorator, kind, func, **kwargs):
+    name = f"{func.__module__}.{func.__qualname__}"
+
+    @functools.wraps(func)
+    def compute(*args, **call_kwargs):
+        _computed.names.add(name)
+        started = time.perf_counter()
+        try:
+            return func(*args, **call_kwargs)
+        finally:
+            key = _argument_key(args, call_kwargs)
+            with _stats_lock:
+                stats = _cache_stats[name]
+                stats['misses'] += 1
+                stats['compute_seconds'] += time.perf_counter() - started
+                # Computing arguments that were cached before means the entry was
+                # evicted (max_entries), expired (ttl) or cleared
+                if key in stats['seen_keys']:
+                    stats['recomputes'] += 1
+                elif len(stats['seen_keys']) < MAX_TRACKED_KEYS:
+                    stats['seen_keys'].add(key)
+
+    cached = streamlit_decorator(**kwargs)(compute)
+
+    @functools.wraps(func)
+    def call(*args, **call_kwargs):
+        if not hasattr(_computed, 'names'):
+            _computed.names = set()
+        _computed.names.discard(name)
+        result = cached(*args, **call_kwargs)
+        with _stats_lock:
+            _cache_stats[name]['kind'] = kind
+            if name not in _computed.names:
+                _cache_stats[name]['hits'] += 1
+        return result
+
+    call.clear = cached.clear
+    return call
+
+
+def cache_data(func=None, **kwargs):
+    """st.cache_data that also counts calls, misses and recomputations"""
+    if func is None:
+        return lambda func: _tracked(st.cache_data, "data", func, **kwargs)
+    return _tracked(st.cache_data, "data", func, **kwargs)
+
+
+def cache_resource(func=None, **kwargs):
+    """st.cache_resource that also counts calls, misses and recomputations"""
+    if func is None:
+        return lambda func: _tracked(st.cache_resource, "resource", func, **kwargs)
+    return _tracked(st.cache_resource, "resource", func, **kwargs)
+
+
+def _frame_bytes(frame):
+    """Deep size of a frame shared through cache_resource, measured once per frame
+
+    Shared frames are read-only (see utils.shared), so their size never changes.
+    """
+    key = id(frame)
+    if key not in _frame_sizes:
+        _frame_sizes[key] = int(frame.memory_usage(index=True, deep=True).sum())
+        weakref.finalize(frame, _frame_sizes.pop, key, None)
+    return _frame_sizes[key]
+
+
+def _resource_entry_sizes(function_cache):
+    """Entry bytes of a cache_resource function; DataFrames are sized without walking every object"""
+    # Without pandas loaded there are no frames to size; don't import it from the metrics thread
+    pd = sys.modules.get("pandas")
+    with function_cache._mem_cache_lock:
+        values = [entry.value for entry in function_cache._mem_cache.values()]
+    if pd is None or not all(isinstance(value, pd.DataFrame) for value in values):
+        return [stat.byte_length for stat in function_cache.get_stats()]
+    return [_frame_bytes(value) for value in values]
+
+
+def _entry_sizes():
+    """Entry count and bytes per cached function, from Streamlit's own cache stats
+
+    These come from Streamlit internals (its function caches and their locks).
+    If a Streamlit upgrade changes them, sizes are reported as unknown (None)
+    instead of breaking the metrics or the admin page.
+    """
+    sizes = defaultdict(lambda: {'entries': 0, 'bytes': 0})
+    try:
+        from streamlit.runtime.caching.cache_data_api import get_data_cache_stats_provider
+        from streamlit.runtime.caching.cache_resource_api import get_resource_cache_stats_provider
+
+        for provider in (get_data_cache_stats_provider(), get_resource_cache_stats_provider()):
+            # The providers' get_stats() merges entries per function; ask each function cache instead
+            for function_cache in list(provider._function_caches.values()):
+                if hasattr(function_cache, '_mem_cache_lock'):
+                    entry_bytes = _resource_entry_sizes(function_cache)
+                else:
+                    entry_bytes = [stat.byte_length for stat in function_cache.get_stats()]
+                sizes[function_cache.display_name]['entries'] += len(entry_bytes)
+                sizes[function_cache.display_name]['bytes'] += sum(entry_bytes)
+    except Exception as error:
+        if not _sizes_unavailable:
+            _logger.warning("Cache sizes unavailable with this Streamlit version: %r", error)
+            _sizes_unavailable.append(error)
+        return defaultdict(lambda: {'entries': None, 'bytes': None})
+    return sizes
+
+
+def cache_report():
+    """One dict per tracked cache: calls, hits, misses, hit rate, recomputes, entries and bytes"""
+    sizes = _entry_sizes()
+    with _stats_lock:
+        stats = {name: dict(values) for name, values in _cache_stats.items()}
+    report = []
+    for name, values in sorted(stats.items()):
+        calls = values['hits'] + values['misses']
+        report.append({
+            'cache': name,
+            'kind': values['kind'],
+            'calls': calls,
+            'hits': values['hits'],
+            'misses': values['misses'],
+            'hit_rate': values['hits'] / calls if calls else None,
+            'recomputes': values['recomputes'],
+            'compute_seconds': values['compute_seconds'],
+            'entries': sizes[name]['entries'],
+            'bytes': sizes[name]['bytes'],
+        })
+    return report
+
+
+def resident_memory_bytes():
+    """Current RSS of this process (peak RSS where /proc is not available)"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def peak_memory_bytes():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def active_sessions():
+    """Browser sessions connected to this Streamlit server, or None outside a server"""
+    from streamlit import runtime
+
+    if not runtime.exists():
+        return None
+    try:
+        # Streamlit internals: a version without them reports no session count
+        return len(runtime.get_instance()._session_mgr.list_active_sessions())
+    except Exception:
+        return None
+
+
+def metrics_text():
+    """All telemetry in Prometheus text exposition format"""
+    replica = f'replica="{replica_name()}"'
+    lines = [
+        "# HELP naijayield_resident_memory_bytes Resident set size of the replica process.",
+        "# TYPE naijayield_resident_memory_bytes gauge",
+        f"naijayield_resident_memory_bytes{{{replica}}} {resident_memory_bytes()}",
+        "# HELP naijayield_peak_memory_bytes Peak resident set size of the replica process.",
+        "# TYPE naijayield_peak_memory_bytes gauge",
+        f"naijayield_peak_memory_bytes{{{replica}}} {peak_memory_bytes()}",
+    ]
+    sessions = active_sessions()
+    if sessions is not None:
+        lines += [
+            "# HELP naijayield_active_sessions Browser sessions connected to the replica.",
+            "# TYPE naijayield_active_sessions gauge",
+            f"naijayield_active_sessions{{{replica}}} {sessions}",
+        ]
+    metrics = [
+        ('calls', 'counter', 'Calls to a cached function.'),
+        ('hits', 'counter', 'Calls answered from the cache.'),
+        ('misses', 'counter', 'Calls that ran the function.'),
+        ('recomputes', 'counter', 'Misses for arguments cached before (evicted, expired or cleared).'),
+        ('compute_seconds', 'counter', 'Time spent running the function on misses.'),
+        ('entries', 'gauge', 'Entries currently held by the cache.'),
+        ('bytes', 'gauge', 'Bytes currently held by the cache.'),
+    ]
+    report = cache_report()
+    for field, metric_type, description in metrics:
+        metric = f"naijayield_cache_{field}_total" if metric_type == 'counter' else f"naijayield_cache_{field}"
+        lines += [f"# HELP {metric} {description}", f"# TYPE {metric} {metric_type}"]
+        for row in report:
+            if row[field] is None:
+                continue
+            lines.append(f'{metric}{{{replica},cache="{row["cache"]}",kind="{row["kind"]}"}} {row[field]}')
+    return "\n".join(lines) + "\n"
+
+
+def replica_name():
+    """NAIJAYIELD_REPLICA (a stable name per replica, e.g. from the process manager), or host:pid"""
+    return os.getenv("NAIJAYIELD_REPLICA") or f"{socket.gethostname()}:{os.getpid()}"
+
+
+def metrics_path():
+    directory = Path(os.getenv("NAIJAYIELD_METRICS_DIR") or DEFAULT_METRICS_DIR)
+    return directory / f"{replica_name().replace(':', '_').replace('/', '_')}.prom"
+
+
+def remove_metrics(path=None):
+    """Delete the replica's metrics file, so the scraper stops reporting it"""
+    try:
+        Path(path or metrics_path()).unlink()
+    except OSError:
+        pass
+
+
+def write_metrics(path=None):
+    """Atomically replace the replica's metrics file"""
+    path = Path(path) if path else metrics_path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".prom.tmp")
+    tmp_path.write_text(metrics_text())
+    os.replace(tmp_path, path)
+    return path
+
+
+@st.cache_resource
+def start_metrics_writer(interval=METRICS_INTERVAL):
+    """Write the metrics file every ``interval`` seconds for the life of the process"""
+    def loop():
+        while True:
+            # Sleep first so the first write (which sizes every cache) stays out of the replica's startup
+            time.sleep(interval)
+            try:
+                write_metrics()
+            except Exception:
+                _logger.exception("Could not write the metrics file")
+
+    atexit.register(remove_metrics)
+    thread = threading.Thread(target=loop, daemon=True, name="naijayield-metrics-writer")
+    thread.start()
+    return thread
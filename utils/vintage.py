@@ -0,0 +1,169 @@
+import pandas as pd
+from .functions import get_duckdb_connection
+from .shared import shared_frame
+from .snapshots import snapshot, stamp_tables
+from .mappings import loan_purpose_reasons
+
+# Loan vintage curves, materialized by the ETL notebook: for each cohort of
+# loans (quarter received x lender type x purpose) and each month since the loan
+# was received, how many loans had reached their expected final payment and how
+# many of those were fully repaid. A loan counts as repaid in the month of its
+# expected final payment: the survey records whether and how much was repaid,
+# not when. Rows hold counts and sums rather than shares, so the Dashboard adds
+# up any combination of cohorts and a batch of new loans only rebuilds its cohorts.
+VINTAGE_TABLE = "loan_vintage_curves"
+MAX_MONTHS = 48  # longer terms are counted at the last month
+COHORT_COLUMNS = ['vintage_year', 'vintage_quarter', 'LenderType', 'LoanPurpose']
+# Registered with the household IDs whose loans changed, during an incremental build
+REFRESH_IDS = "vintage_refresh_ids"
+
+# One row per dated loan, with its cohort and months from receipt to expected final payment
+LOANS_QUERY = f"""
+SELECT
+    HouseholdID,
+    CAST(LoanReceiveYear AS INTEGER) AS vintage_year,
+    CAST((LoanReceiveMonth - 1) // 3 + 1 AS INTEGER) AS vintage_quarter,
+    LenderType,
+    LoanPurpose,
+    LoanAmount,
+    TotalAmountPaid,
+    IsFullyRepaid = 1 AS repaid,
+    CAST(least(greatest((ExpectedFinalPaymentYear * 12 + ExpectedFinalPaymentMonth)
+                        - (LoanReceiveYear * 12 + LoanReceiveMonth), 0), {MAX_MONTHS}) AS INTEGER) AS term
+FROM credit_history_loan_2
+WHERE LoanReceiveYear IS NOT NULL AND LoanReceiveMonth BETWEEN 1 AND 12
+"""
+
+
+def _same_cohort(left, right):
+    # Lender type and purpose may be missing: NULL keys match each other
+    return " AND ".join(f"{left}.{column} IS NOT DISTINCT FROM {right}.{column}" for column in COHORT_COLUMNS)
+
+
+VINTAGE_QUERY_TEMPLATE = f"""
+WITH loans AS ({LOANS_QUERY}),
+selected AS (
+    SELECT * FROM loans WHERE {{cohorts}}
+),
+cohorts AS (
+    SELECT vintage_year, vintage_quarter, LenderType, LoanPurpose,
+           count(*) AS loans, sum(LoanAmount) AS amount
+    FROM selected
+    GROUP BY ALL
+),
+by_term AS (
+    SELECT vintage_year, vintage_quarter, LenderType, LoanPurpose, term,
+           count(*) AS matured,
+           count(*) FILTER (WHERE repaid) AS repaid,
+           coalesce(sum(TotalAmountPaid) FILTER (WHERE repaid), 0) AS repaid_amount
+    FROM selected
+    WHERE term IS NOT NULL
+    GROUP BY ALL
+)
+SELECT
+    c.vintage_year,
+    c.vintage_quarter,
+    c.LenderType,
+    c.LoanPurpose,
+    m.month,
+    c.loans,
+    c.amount,
+    sum(coalesce(t.matured, 0)) OVER cohort AS matured_loans,
+    sum(coalesce(t.repaid, 0)) OVER cohort AS repaid_loans,
+    sum(coalesce(t.repaid_amount, 0)) OVER cohort AS repaid_amount,
+    now() AS built_at
+FROM cohorts c
+CROSS JOIN range(0, {MAX_MONTHS + 1}) m(month)
+LEFT JOIN by_term t ON {_same_cohort('t', 'c')} AND t.term = m.month
+WINDOW cohort AS (PARTITION BY c.vintage_year, c.vintage_quarter, c.LenderType, c.LoanPurpose ORDER BY m.month)
+ORDER BY ALL
+"""
+
+VINTAGE_QUERY = VINTAGE_QUERY_TEMPLATE.format(cohorts="true")
+# Cohorts to rebuild during an incremental build: those with a loan of the
+# households in REFRESH_IDS, plus any whose stored totals no longer match the
+# loans (e.g. a loan moved to another lender type or purpose, or was removed)
+REFRESH_COHORTS_QUERY = f"""
+WITH loans AS ({LOANS_QUERY}),
+current AS (
+    SELECT vintage_year, vintage_quarter, LenderType, LoanPurpose, count(*) AS loans, sum(LoanAmount) AS amount
+    FROM loans
+    GROUP BY ALL
+),
+stored AS (
+    SELECT vintage_year, vintage_quarter, LenderType, LoanPurpose, loans, amount
+    FROM {VINTAGE_TABLE}
+    WHERE month = 0
+)
+SELECT DISTINCT vintage_year, vintage_quarter, LenderType, LoanPurpose FROM loans
+WHERE HouseholdID IN (SELECT HouseholdID FROM {REFRESH_IDS})
+UNION
+SELECT coalesce(c.vintage_year, s.vintage_year), coalesce(c.vintage_quarter, s.vintage_quarter),
+       coalesce(c.LenderType, s.LenderType), coalesce(c.LoanPurpose, s.LoanPurpose)
+FROM current c
+FULL JOIN stored s ON {_same_cohort('c', 's')}
+WHERE c.loans IS DISTINCT FROM s.loans OR c.amount IS DISTINCT FROM s.amount
+"""
+REFRESH_QUERY = VINTAGE_QUERY_TEMPLATE.format(
+    cohorts=f"EXISTS (SELECT 1 FROM vintage_cohorts r WHERE {_same_cohort('r', 'loans')})")
+
+
+def build_vintage_curves(conn, household_ids=None):
+    """Materialize the loan vintage curves (run from the ETL notebook)
+
+    With ``household_ids``, only the cohorts of those households' loans (and any
+    cohort whose loans no longer add up) are recomputed, e.g. after an ETL batch
+    added or updated their loans.
+    """
+    if household_ids is None:
+        conn.execute(f"CREATE OR REPLACE TABLE {VINTAGE_TABLE} AS {VINTAGE_QUERY}")
+        conn.execute(f"COMMENT ON TABLE {VINTAGE_TABLE} IS 'Cumulative matured and repaid loans per cohort and month since receipt'")
+    else:
+        conn.register(REFRESH_IDS, pd.DataFrame({'HouseholdID': pd.Series(list(household_ids), dtype='int64')}))
+        try:
+            conn.execute("BEGIN TRANSACTION")
+            conn.execute(f"CREATE OR REPLACE TEMP TABLE vintage_cohorts AS {REFRESH_COHORTS_QUERY}")
+            conn.execute(f"DELETE FROM {VINTAGE_TABLE} v WHERE EXISTS "
+                         f"(SELECT 1 FROM vintage_cohorts r WHERE {_same_cohort('r', 'v')})")
+            conn.execute(f"INSERT INTO {VINTAGE_TABLE} {REFRESH_QUERY}")
+            conn.execute("DROP TABLE vintage_cohorts")
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.unregister(REFRESH_IDS)
+    stamp_tables(conn, VINTAGE_TABLE)
+    return conn.execute(f"SELECT count(*) FROM {VINTAGE_TABLE}").fetchone()[0]
+
+
+def label_vintages(curves):
+    """Add the vintage label (e.g. 2014 Q3) and readable lender types and purposes"""
+    curves = curves.copy()
+    curves['vintage'] = curves['vintage_year'].astype(str) + " Q" + curves['vintage_quarter'].astype(str)
+    curves['LenderType'] = curves['LenderType'].map(lambda code: "Unknown" if pd.isna(code) else f"Lender type {code:g}")
+    curves['LoanPurpose'] = curves['LoanPurpose'].map(loan_purpose_reasons).fillna("Unknown")
+    return curves
+
+
+@shared_frame
+@snapshot(VINTAGE_TABLE, "credit_history_loan_2")
+def load_vintage_curves():
+    conn = get_duckdb_connection()
+    try:
+        curves = conn.execute(f"select * from {VINTAGE_TABLE}").fetch_df()
+    except Exception:
+        # Curves not materialized yet: compute them on the database side instead
+        curves = conn.execute(VINTAGE_QUERY).fetch_df()
+    return label_vintages(curves)
+
+
+def repayment_curves(curves, by):
+    """Cumulative shares (0-100) per group of ``by`` and month: loans matured, loans fully
+    repaid, and amount repaid out of the amount lent"""
+    columns = ['loans', 'amount', 'matured_loans', 'repaid_loans', 'repaid_amount']
+    totals = curves.groupby([by, 'month'], observed=True)[columns].sum().reset_index()
+    totals['matured_share'] = totals['matured_loans'] / totals['loans'] * 100
+    totals['repaid_share'] = totals['repaid_loans'] / totals['loans'] * 100
+    totals['amount_repaid_share'] = totals['repaid_amount'] / totals['amount'] * 100
+    return totals